@@ -1,20 +1,196 @@
+import logging
+import os
+from datetime import date
 from functools import partial
 from pathlib import Path
+from typing import Callable, Hashable, NamedTuple, Optional, Tuple
 
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from faicons import icon_svg
-from shiny import render
-from shiny.express import input, ui
+from shiny import reactive, render
+from shiny.express import input, session, ui
 from shiny.ui import page_navbar
 from shinywidgets import render_plotly
 
-from utils.helpers import string_to_date, filter_by_date
+from scripts import config
+from utils import storage
+from utils.aggregates import AggregateCube, build_aggregate_cube
+from utils.data_provider import shared_provider
+from utils.date_index import DateIndexedTable
+from utils.downsample import downsample
+from utils.figure_cache import figure_cache
+from utils.helpers import resolve_channel_dir, compact_videos, titles_with_id, memory_usage_mb
+from utils.instrumentation import metrics, serve_metrics, start_profiler_from_env
+from utils.reactive_stats import ReactiveStats
+from utils.table_view import iter_csv_chunks, iter_parquet_chunks, page_count, page_of, search_rows, sort_rows
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# each dashboard worker only reads the data partition of the channel it shows
+data_dir = Path(resolve_channel_dir(os.environ.get('DASHBOARD_DATA_DIR', Path(__file__).parent / 'data'),
+                                    os.environ.get('DASHBOARD_CHANNEL_ID', config.CHANNEL_ID)))
+# stage metrics of this process served at http://<host>:<port>/metrics when the port variable is set, and the
+# sampling profiler when its variable is; both are started once per process, and assigned so express does not
+# render them
+metrics_server = serve_metrics(int(os.environ[config.METRICS_PORT_ENV])) \
+    if os.environ.get(config.METRICS_PORT_ENV) else None
+profiler = start_profiler_from_env(config.PROFILE_ENV, config.PROFILE_INTERVAL_ENV)
+DATA_SORT_COLUMNS = {'date': 'Date', 'ID': 'ID', 'title': 'Title', 'views': 'Views', 'likes': 'Likes',
+                     'comments': 'Comments', 'duration': 'Duration', 'sponsor': 'Sponsor'}
+
+
+class DashboardData(NamedTuple):
+    version: Hashable
+    videos: DateIndexedTable
+    cube: AggregateCube
+    channel: pd.DataFrame
+    # views of each video at HISTORY_AGES_DAYS after publication, when the statistics history has been processed
+    growth: Optional[DateIndexedTable]
+
+
+def data_version() -> Hashable:
+    # the processed table, the tables derived from it and the channel statistics, as last written
+    paths = [storage.find_data_path(data_dir, name, config.STORAGE_FORMAT)
+             for name in ('processed_video_stats', 'video_aggregates', 'channel_stats', 'video_growth')]
+    paths.append(str(data_dir / config.DASHBOARD_SNAPSHOT_FILE))
+    return tuple(storage.table_version(path) if os.path.exists(path) else None for path in paths)
+
+
+@metrics.timed('dashboard.load_data', rows=lambda data: len(data.videos.df))
+def load_data() -> DashboardData:
+    version = data_version()
+    processed_path = storage.find_data_path(data_dir, 'processed_video_stats', config.STORAGE_FORMAT)
+    snapshot_path = str(data_dir / config.DASHBOARD_SNAPSHOT_FILE)
+    if storage.is_up_to_date(snapshot_path, processed_path):
+        # written by data_processing with the compact column types, and mapped into memory rather than parsed
+        df_videos = storage.read_snapshot(snapshot_path)
+        logging.info(f"Video table: {len(df_videos)} rows mapped from {snapshot_path}")
+    else:
+        # only the columns the dashboard shows are read
+        df_videos = storage.read_table(processed_path, columns=config.DASHBOARD_COLUMNS,
+                                       schema=storage.PROCESSED_VIDEO_SCHEMA)
+        # compact column types, so that more dashboard workers fit in the memory of one host
+        stored_mb = memory_usage_mb(df_videos)
+        df_videos = compact_videos(df_videos)
+        logging.info(f"Video table: {len(df_videos)} rows, {memory_usage_mb(df_videos):.2f} MB in memory "
+                     f"({stored_mb:.2f} MB with the stored types)")
+    # KPIs and duration histograms come from the prefix sums written by data_processing; they are built here for
+    # processed tables written before them or since
+    aggregates_path = storage.find_data_path(data_dir, 'video_aggregates', config.STORAGE_FORMAT)
+    if storage.is_up_to_date(aggregates_path, processed_path):
+        cube = AggregateCube(storage.read_table(aggregates_path, schema=storage.AGGREGATE_SCHEMA))
+    else:
+        logging.info(f"No up to date {aggregates_path}, aggregating the video table.")
+        cube = AggregateCube(build_aggregate_cube(df_videos, separator=config.SPONSOR_SEPARATOR,
+                                                  bin_seconds=config.DURATION_BIN_SECONDS,
+                                                  max_bins=config.DURATION_MAX_BINS))
+    df_channel = storage.read_table(storage.find_data_path(data_dir, 'channel_stats', config.STORAGE_FORMAT),
+                                    columns=['subscriberCount'], schema=storage.CHANNEL_SCHEMA)
+    logging.info(f"Channel table: {memory_usage_mb(df_channel):.3f} MB in memory")
+    # one row per video, so the growth chart never reads the history itself
+    growth_path = storage.find_data_path(data_dir, 'video_growth', config.STORAGE_FORMAT)
+    growth = DateIndexedTable(compact_videos(storage.read_table(growth_path, schema=storage.GROWTH_SCHEMA)),
+                              separator=config.SPONSOR_SEPARATOR) if os.path.exists(growth_path) else None
+    # sorted by date once, so the date slider's range queries are binary searches
+    return DashboardData(version, DateIndexedTable(df_videos, separator=config.SPONSOR_SEPARATOR), cube, df_channel,
+                         growth)
+
+
+# loaded by the first session of this process and shared with the next ones; new data written by
+# data_collection or data_processing is loaded in the background and swapped in while sessions keep running
+data_provider = shared_provider(str(data_dir), load_data, data_version, config.DATA_RELOAD_SECONDS,
+                                logging.getLogger('dashboard'))
+
+
+@reactive.poll(lambda: data_provider.version, config.DATA_RELOAD_SECONDS)
+def dashboard_data() -> DashboardData:
+    data = data_provider.data
+    # figures are shared by the sessions of this process, until the data they show is reloaded
+    figure_cache.set_version(data.version)
+    return data
+
+
+# every output reads the datasets derived from the date slider from these calcs, so a slider move filters the
+# videos once per dataset; their evaluations are logged once per interaction
+stats = ReactiveStats(logging.getLogger('dashboard'), details=figure_cache.summary)
+# assigned, as express would otherwise render the returned cancel function
+_cancel_stats = session.on_flushed(stats.flushed, once=False)
+
+
+def slider_bounds(data: DashboardData) -> Tuple[date, date]:
+    # the dates of the loaded partition, or today for a channel without videos yet
+    return data.videos.span() or (date.today(), date.today())
+
+
+def slider_value(value: Tuple[date, date], old: Tuple[date, date], new: Tuple[date, date]) -> Tuple[date, date]:
+    # a range reaching an end of the old dates follows it to the new end, other ranges stay within the new dates
+    start = new[0] if value[0] <= old[0] else min(max(value[0], new[0]), new[1])
+    end = new[1] if value[1] >= old[1] else min(max(value[1], new[0]), new[1])
+    return start, max(start, end)
+
+
+# dates of the slider of this session, updated with the data
+date_bounds = [slider_bounds(data_provider.data)]
+
+
+@reactive.effect
+def update_date_range():
+    bounds = slider_bounds(dashboard_data())
+    if bounds == date_bounds[0]:
+        return
+    with reactive.isolate():
+        value = slider_value(tuple(input.date_range()), date_bounds[0], bounds)
+    date_bounds[0] = bounds
+    ui.update_slider('date_range', min=bounds[0], max=bounds[1], value=value)
+
+
+@stats.timed('figures')
+def cached_figure(chart_id: str, sponsor: Optional[str], build: Callable[[], go.Figure]) -> go.FigureWidget:
+    return figure_cache.figure((chart_id, tuple(input.date_range()), sponsor, dashboard_data().version), build)
+
+
+@reactive.calc
+@stats.timed('filtered_all')
+def filtered_all():
+    return dashboard_data().videos.between(input.date_range())
+
+
+@reactive.calc
+@stats.timed('filtered_xtb')
+def filtered_xtb():
+    return dashboard_data().videos.between(input.date_range(), sponsor='XTB')
+
+
+@reactive.calc
+@stats.timed('filtered_no_sponsor')
+def filtered_no_sponsor():
+    return dashboard_data().videos.between(input.date_range(), sponsor='No sponsor')
+
+
+@reactive.calc
+@stats.timed('data_view')
+def data_view():
+    return sort_rows(search_rows(filtered_all(), input.data_search()), input.data_sort(), input.data_descending())
+
+
+def data_rows(df: pd.DataFrame) -> pd.DataFrame:
+    # the rows as the Data tab shows and exports them
+    return df.assign(title=titles_with_id(df), date=df['date'].dt.strftime('%Y-%m-%d'))
+
+
+@reactive.calc
+@stats.timed('kpis')
+def kpis():
+    totals = dashboard_data().cube.totals(input.date_range())
+    total_views = totals['views']
+    return {
+        'total_views': total_views,
+        'total_videos': totals['videos'],
+        'avg_views': total_views / totals['videos'] if totals['videos'] else float('nan'),
+        'engagement_rate': (totals['likes'] + totals['comments']) / total_views * 100 if total_views else float('nan'),
+    }
 
-data_dir = Path(__file__).parent / 'data'
-df_videos = pd.read_csv(data_dir / 'processed_video_stats.csv')
-df_channel = pd.read_csv(data_dir / 'channel_stats.csv')
 
 ui.page_opts(
     title="Youtube analysis - XTB partnership",
@@ -26,9 +202,9 @@ with ui.nav_panel("Analysis"):
         with ui.sidebar(bg="#f8f8f8"):
             "Filter options"
             ui.input_slider("date_range", "Filter by date",
-                            min=string_to_date('2017-03-04'),
-                            max=string_to_date('2024-07-25'),
-                            value=[string_to_date(x) for x in ['2017-03-04', '2024-07-25']]
+                            min=date_bounds[0][0],
+                            max=date_bounds[0][1],
+                            value=list(date_bounds[0])
                             )
         with ui.layout_column_wrap(fill=False):
             with ui.value_box(showcase=icon_svg("child-reaching")):
@@ -36,8 +212,9 @@ with ui.nav_panel("Analysis"):
 
 
                 @render.text
+                @metrics.timed('render.total_subs')
                 def total_subs():
-                    total_subscribers = df_channel['subscriberCount'].iloc[0]
+                    total_subscribers = dashboard_data().channel['subscriberCount'].iloc[0]
                     return f"{total_subscribers:,}".replace(',', ' ')
 
             with ui.value_box(showcase=icon_svg("eye")):
@@ -45,9 +222,9 @@ with ui.nav_panel("Analysis"):
 
 
                 @render.text
+                @metrics.timed('render.total_views')
                 def total_views():
-                    filtered_df = filter_by_date(df_videos, input.date_range())
-                    total_views = filtered_df['views'].sum()
+                    total_views = kpis()['total_views']
                     return f"{total_views:,}".replace(',', ' ')
 
             with ui.value_box(showcase=icon_svg("youtube")):
@@ -55,9 +232,9 @@ with ui.nav_panel("Analysis"):
 
 
                 @render.text
+                @metrics.timed('render.total_videos')
                 def total_videos():
-                    filtered_df = filter_by_date(df_videos, input.date_range())
-                    total_videos_count = filtered_df.shape[0]
+                    total_videos_count = kpis()['total_videos']
                     return f"{total_videos_count:,}"
 
             with ui.value_box(showcase=icon_svg("chart-line")):
@@ -65,9 +242,9 @@ with ui.nav_panel("Analysis"):
 
 
                 @render.text
+                @metrics.timed('render.avg_views')
                 def avg_views():
-                    filtered_df = filter_by_date(df_videos, input.date_range())
-                    average_views = filtered_df['views'].mean()
+                    average_views = kpis()['avg_views']
                     return f"{average_views:,.0f}".replace(',', ' ')
 
             with ui.value_box(showcase=icon_svg("hand-point-up")):
@@ -75,16 +252,14 @@ with ui.nav_panel("Analysis"):
 
 
                 @render.text
+                @metrics.timed('render.engagement_rate')
                 def engagement_rate():
-                    filtered_df = filter_by_date(df_videos, input.date_range())
-                    total_views = filtered_df['views'].sum()
-                    total_likes = filtered_df['likes'].sum()
-                    total_comments = filtered_df['comments'].sum()
-                    engagement_rate = (total_likes + total_comments) / total_views * 100
+                    engagement_rate = kpis()['engagement_rate']
                     return f"{engagement_rate:,.2f}%".replace(',', ' ')
 
 
         @render.text
+        @metrics.timed('render.text_kpis')
         def text_kpis():
             return """
             The channel has 131,000 subscribers and over 18 million views, with an average of 44,636 views per video 
@@ -99,79 +274,94 @@ with ui.nav_panel("Analysis"):
 
 
                 @render_plotly
+                @metrics.timed('render.plot_cumulative_views_all')
                 def plot_cumulative_views_all():
                     """
                     This function generates a line chart of cumulative views over time for all data.
                     """
-                    filtered_df = filter_by_date(df_videos, input.date_range())
-                    fig = go.Figure()
+                    def build():
+                        filtered_df = downsample(filtered_all(), 'date', 'cumulative_views', config.PLOT_MAX_POINTS)
+                        fig = go.Figure()
+
+                        fig.add_trace(
+                            go.Scatter(x=filtered_df['date'], y=filtered_df['cumulative_views'], mode='lines',
+                                       name='Cumulative Views', line=dict(color='#1A1B41')))
 
-                    fig.add_trace(
-                        go.Scatter(x=filtered_df['date'], y=filtered_df['cumulative_views'], mode='lines',
-                                   name='Cumulative Views', line=dict(color='#1A1B41')))
+                        fig.update_layout(
+                            title=dict(text='All data', font=dict(color='#1A1B41')),
+                            xaxis_title='Date',
+                            yaxis_title='Cumulative Views',
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                            yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                        )
+                        return fig
 
-                    fig.update_layout(
-                        title=dict(text='All data', font=dict(color='#1A1B41')),
-                        xaxis_title='Date',
-                        yaxis_title='Cumulative Views',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                        yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                    )
-                    return fig
+                    return cached_figure('plot_cumulative_views_all', None, build)
 
 
                 with ui.layout_column_wrap(width=1 / 2):
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_cumulative_views_no_sponsor')
                         def plot_cumulative_views_no_sponsor():
                             """
                             This function generates a line chart of cumulative views over time for videos with No sponsor.
                             """
-                            filtered_df = filter_by_date(df_videos[df_videos['sponsor'] == 'No sponsor'],
-                                                         input.date_range())
-                            fig = go.Figure()
-
-                            fig.add_trace(
-                                go.Scatter(x=filtered_df['date'], y=filtered_df['cumulative_views_No_sponsor'],
-                                           mode='lines',
-                                           name='Cumulative Views No Sponsor', line=dict(color='#006E90')))
-
-                            fig.update_layout(
-                                title=dict(text='No sponsor', font=dict(color='#006E90')),
-                                xaxis_title='Date',
-                                yaxis_title='Cumulative Views',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                filtered_df = downsample(filtered_no_sponsor(), 'date', 'cumulative_views_No_sponsor',
+                                                         config.PLOT_MAX_POINTS)
+                                fig = go.Figure()
+
+                                fig.add_trace(
+                                    go.Scatter(x=filtered_df['date'], y=filtered_df['cumulative_views_No_sponsor'],
+                                               mode='lines',
+                                               name='Cumulative Views No Sponsor', line=dict(color='#006E90')))
+
+                                fig.update_layout(
+                                    title=dict(text='No sponsor', font=dict(color='#006E90')),
+                                    xaxis_title='Date',
+                                    yaxis_title='Cumulative Views',
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_cumulative_views_no_sponsor', 'No sponsor', build)
 
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_cumulative_views_xtb')
                         def plot_cumulative_views_xtb():
                             """
                             This function generates a line chart of cumulative views over time for videos with XTB sponsor.
                             """
-                            filtered_df = filter_by_date(df_videos[df_videos['sponsor'] == 'XTB'], input.date_range())
-                            fig = go.Figure()
-
-                            fig.add_trace(
-                                go.Scatter(x=filtered_df['date'], y=filtered_df['cumulative_views_XTB'], mode='lines',
-                                           name='Cumulative Views XTB', line=dict(color='#B80C09')))
-
-                            fig.update_layout(
-                                title=dict(text='XTB', font=dict(color='#B80C09')),
-                                xaxis_title='Date',
-                                yaxis_title='Cumulative Views',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                filtered_df = downsample(filtered_xtb(), 'date', 'cumulative_views_XTB',
+                                                         config.PLOT_MAX_POINTS)
+                                fig = go.Figure()
+
+                                fig.add_trace(
+                                    go.Scatter(x=filtered_df['date'], y=filtered_df['cumulative_views_XTB'],
+                                               mode='lines',
+                                               name='Cumulative Views XTB', line=dict(color='#B80C09')))
+
+                                fig.update_layout(
+                                    title=dict(text='XTB', font=dict(color='#B80C09')),
+                                    xaxis_title='Date',
+                                    yaxis_title='Cumulative Views',
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_cumulative_views_xtb', 'XTB', build)
 
 
                 @render.text
+                @metrics.timed('render.text_cumulative')
                 def text_cumulative():
                     return """
                     The cumulative views chart shows consistent growth in viewership for both non-sponsored and 
@@ -185,75 +375,85 @@ with ui.nav_panel("Analysis"):
                 with ui.layout_column_wrap(width=1 / 2):
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_top_performing_videos_no_sponsor')
                         def plot_top_performing_videos_no_sponsor():
                             """
                             Generate a bar chart displaying the top 5 videos by likes per 1000 views and comments per 100 views for videos with No sponsor.
                             """
-                            filtered_df = filter_by_date(df_videos[df_videos['sponsor'] == 'No sponsor'],
-                                                         input.date_range())
-                            filtered_df['likes_per_1000_views'] = filtered_df['likes'] / (filtered_df['views'] / 1000)
-                            filtered_df['comments_per_1000_views'] = filtered_df['comments'] / (
-                                    filtered_df['views'] / 1000)
-                            top_videos = filtered_df.nlargest(5, ['likes_per_1000_views', 'comments_per_1000_views'])
-
-                            # Truncate titles to the first 30 characters
-                            top_videos['short_title'] = top_videos['title'].str.slice(0, 30) + '...'
-
-                            fig = go.Figure()
-                            fig.add_trace(
-                                go.Bar(x=top_videos['short_title'], y=top_videos['likes_per_1000_views'],
-                                       name='Likes per 1000 Views', marker=dict(color='#006E90')))
-                            fig.add_trace(
-                                go.Bar(x=top_videos['short_title'], y=top_videos['comments_per_1000_views'],
-                                       name='Comments per 1000 Views', marker=dict(color='#3B8DE6')))
-
-                            fig.update_layout(
-                                title=dict(text='No sponsor', font=dict(color='#006E90')),
-                                xaxis_title='Video Title',
-                                yaxis_title='Rate',
-                                barmode='group',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                filtered_df = filtered_no_sponsor()
+                                filtered_df = filtered_df.assign(
+                                    likes_per_1000_views=filtered_df['likes'] / (filtered_df['views'] / 1000),
+                                    comments_per_1000_views=filtered_df['comments'] / (filtered_df['views'] / 1000))
+                                top_videos = filtered_df.nlargest(5, ['likes_per_1000_views',
+                                                                      'comments_per_1000_views'])
+
+                                # Truncate titles to the first 30 characters
+                                top_videos['short_title'] = titles_with_id(top_videos).str.slice(0, 30) + '...'
+
+                                fig = go.Figure()
+                                fig.add_trace(
+                                    go.Bar(x=top_videos['short_title'], y=top_videos['likes_per_1000_views'],
+                                           name='Likes per 1000 Views', marker=dict(color='#006E90')))
+                                fig.add_trace(
+                                    go.Bar(x=top_videos['short_title'], y=top_videos['comments_per_1000_views'],
+                                           name='Comments per 1000 Views', marker=dict(color='#3B8DE6')))
+
+                                fig.update_layout(
+                                    title=dict(text='No sponsor', font=dict(color='#006E90')),
+                                    xaxis_title='Video Title',
+                                    yaxis_title='Rate',
+                                    barmode='group',
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_top_performing_videos_no_sponsor', 'No sponsor', build)
 
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_top_performing_videos_xtb')
                         def plot_top_performing_videos_xtb():
                             """
                             Generate a bar chart displaying the top 5 videos by likes per 1000 views and comments per 100 views for videos with XTB sponsor.
                             """
-                            filtered_df = filter_by_date(df_videos[df_videos['sponsor'] == 'XTB'], input.date_range())
-                            filtered_df['likes_per_1000_views'] = filtered_df['likes'] / (filtered_df['views'] / 1000)
-                            filtered_df['comments_per_1000_views'] = filtered_df['comments'] / (
-                                    filtered_df['views'] / 1000)
-                            top_videos = filtered_df.nlargest(5, ['likes_per_1000_views', 'comments_per_1000_views'])
-
-                            # Truncate titles to the first 30 characters
-                            top_videos['short_title'] = top_videos['title'].str.slice(0, 30) + '...'
-
-                            fig = go.Figure()
-                            fig.add_trace(
-                                go.Bar(x=top_videos['short_title'], y=top_videos['likes_per_1000_views'],
-                                       name='Likes per 1000 Views', marker=dict(color='#B80C09')))
-                            fig.add_trace(
-                                go.Bar(x=top_videos['short_title'], y=top_videos['comments_per_1000_views'],
-                                       name='Comments per 1000 Views', marker=dict(color='#F38743')))
-
-                            fig.update_layout(
-                                title=dict(text='XTB', font=dict(color='#B80C09')),
-                                xaxis_title='Video Title',
-                                yaxis_title='Rate',
-                                barmode='group',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                filtered_df = filtered_xtb()
+                                filtered_df = filtered_df.assign(
+                                    likes_per_1000_views=filtered_df['likes'] / (filtered_df['views'] / 1000),
+                                    comments_per_1000_views=filtered_df['comments'] / (filtered_df['views'] / 1000))
+                                top_videos = filtered_df.nlargest(5, ['likes_per_1000_views',
+                                                                      'comments_per_1000_views'])
+
+                                # Truncate titles to the first 30 characters
+                                top_videos['short_title'] = titles_with_id(top_videos).str.slice(0, 30) + '...'
+
+                                fig = go.Figure()
+                                fig.add_trace(
+                                    go.Bar(x=top_videos['short_title'], y=top_videos['likes_per_1000_views'],
+                                           name='Likes per 1000 Views', marker=dict(color='#B80C09')))
+                                fig.add_trace(
+                                    go.Bar(x=top_videos['short_title'], y=top_videos['comments_per_1000_views'],
+                                           name='Comments per 1000 Views', marker=dict(color='#F38743')))
+
+                                fig.update_layout(
+                                    title=dict(text='XTB', font=dict(color='#B80C09')),
+                                    xaxis_title='Video Title',
+                                    yaxis_title='Rate',
+                                    barmode='group',
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_top_performing_videos_xtb', 'XTB', build)
 
 
                 @render.text
+                @metrics.timed('render.text_top_performing')
                 def text_top_performing():
                     return """
                     Top-performing videos, both sponsored and non-sponsored, receive high likes and comments per 
@@ -266,87 +466,98 @@ with ui.nav_panel("Analysis"):
                 with ui.layout_column_wrap(fill=False):
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_boxplot_views')
                         def plot_boxplot_views():
                             """
                             Generate a boxplot for views for No sponsor and XTB videos.
                             """
-                            filtered_no_sponsor_df = filter_by_date(df_videos[df_videos['sponsor'] == 'No sponsor'],
-                                                                    input.date_range())
-                            filtered_xtb_df = filter_by_date(df_videos[df_videos['sponsor'] == 'XTB'],
-                                                             input.date_range())
-
-                            fig = go.Figure()
-
-                            fig.add_trace(
-                                go.Box(y=filtered_no_sponsor_df['views'], name='No sponsor', marker_color='#006E90'))
-                            fig.add_trace(
-                                go.Box(y=filtered_xtb_df['views'], name='XTB', marker_color='#B80C09'))
-
-                            fig.update_layout(
-                                title=dict(text='Views for No sponsor and XTB Videos', font=dict(color='#1A1B41')),
-                                yaxis_title='Views',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                filtered_no_sponsor_df = filtered_no_sponsor()
+                                filtered_xtb_df = filtered_xtb()
+
+                                fig = go.Figure()
+
+                                fig.add_trace(
+                                    go.Box(y=filtered_no_sponsor_df['views'], name='No sponsor',
+                                           marker_color='#006E90'))
+                                fig.add_trace(
+                                    go.Box(y=filtered_xtb_df['views'], name='XTB', marker_color='#B80C09'))
+
+                                fig.update_layout(
+                                    title=dict(text='Views for No sponsor and XTB Videos', font=dict(color='#1A1B41')),
+                                    yaxis_title='Views',
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_boxplot_views', None, build)
 
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_boxplot_comments')
                         def plot_boxplot_comments():
                             """
                             Generate a boxplot for comments for No sponsor and XTB videos.
                             """
-                            filtered_no_sponsor_df = filter_by_date(df_videos[df_videos['sponsor'] == 'No sponsor'],
-                                                                    input.date_range())
-                            filtered_xtb_df = filter_by_date(df_videos[df_videos['sponsor'] == 'XTB'],
-                                                             input.date_range())
-
-                            fig = go.Figure()
-
-                            fig.add_trace(
-                                go.Box(y=filtered_no_sponsor_df['comments'], name='No sponsor', marker_color='#006E90'))
-                            fig.add_trace(
-                                go.Box(y=filtered_xtb_df['comments'], name='XTB', marker_color='#B80C09'))
-
-                            fig.update_layout(
-                                title=dict(text='Comments for No sponsor and XTB Videos', font=dict(color='#1A1B41')),
-                                yaxis_title='Comments',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                filtered_no_sponsor_df = filtered_no_sponsor()
+                                filtered_xtb_df = filtered_xtb()
+
+                                fig = go.Figure()
+
+                                fig.add_trace(
+                                    go.Box(y=filtered_no_sponsor_df['comments'], name='No sponsor',
+                                           marker_color='#006E90'))
+                                fig.add_trace(
+                                    go.Box(y=filtered_xtb_df['comments'], name='XTB', marker_color='#B80C09'))
+
+                                fig.update_layout(
+                                    title=dict(text='Comments for No sponsor and XTB Videos',
+                                              font=dict(color='#1A1B41')),
+                                    yaxis_title='Comments',
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_boxplot_comments', None, build)
 
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_boxplot_likes')
                         def plot_boxplot_likes():
                             """
                             Generate a boxplot for likes for No sponsor and XTB videos.
                             """
-                            filtered_no_sponsor_df = filter_by_date(df_videos[df_videos['sponsor'] == 'No sponsor'],
-                                                                    input.date_range())
-                            filtered_xtb_df = filter_by_date(df_videos[df_videos['sponsor'] == 'XTB'],
-                                                             input.date_range())
-
-                            fig = go.Figure()
-
-                            fig.add_trace(
-                                go.Box(y=filtered_no_sponsor_df['likes'], name='No sponsor', marker_color='#006E90'))
-                            fig.add_trace(
-                                go.Box(y=filtered_xtb_df['likes'], name='XTB', marker_color='#B80C09'))
-
-                            fig.update_layout(
-                                title=dict(text='Likes for No sponsor and XTB Videos', font=dict(color='#1A1B41')),
-                                yaxis_title='Likes',
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                filtered_no_sponsor_df = filtered_no_sponsor()
+                                filtered_xtb_df = filtered_xtb()
+
+                                fig = go.Figure()
+
+                                fig.add_trace(
+                                    go.Box(y=filtered_no_sponsor_df['likes'], name='No sponsor',
+                                           marker_color='#006E90'))
+                                fig.add_trace(
+                                    go.Box(y=filtered_xtb_df['likes'], name='XTB', marker_color='#B80C09'))
+
+                                fig.update_layout(
+                                    title=dict(text='Likes for No sponsor and XTB Videos', font=dict(color='#1A1B41')),
+                                    yaxis_title='Likes',
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_boxplot_likes', None, build)
 
 
                 @render.text
+                @metrics.timed('render.text_boxplot')
                 def text_boxplot():
                     return """
                     Engagement metrics show non-sponsored videos have higher variability, while XTB-sponsored content 
@@ -360,53 +571,63 @@ with ui.nav_panel("Analysis"):
                 with ui.layout_column_wrap(width=1 / 2):
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_duration_distribution_no_sponsor')
                         def plot_duration_distribution_no_sponsor():
                             """
                             Generate a histogram showing the distribution of video durations for No sponsor data.
                             """
-                            filtered_df = filter_by_date(df_videos[df_videos['sponsor'] == 'No sponsor'],
-                                                         input.date_range())
-                            filtered_df['duration'] = pd.to_numeric(filtered_df['duration'], errors='coerce')
-                            fig = px.histogram(filtered_df, x='duration', nbins=50,
-                                               title='No Sponsor',
-                                               labels={'duration': 'Duration (seconds)'},
-                                               color_discrete_sequence=['#006E90'])
-                            fig.update_layout(
-                                xaxis_title='Duration (seconds)',
-                                yaxis_title='Number of Videos',
-                                bargap=0.2,
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                title_font=dict(color='#006E90'),
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                cube = dashboard_data().cube
+                                histogram = cube.duration_histogram(input.date_range(), sponsor='No sponsor')
+                                fig = go.Figure(
+                                    go.Bar(x=histogram['duration'] + cube.bin_seconds / 2, y=histogram['videos'],
+                                           width=cube.bin_seconds * 0.8, name='Number of Videos',
+                                           marker=dict(color='#006E90')))
+                                fig.update_layout(
+                                    title=dict(text='No Sponsor'),
+                                    xaxis_title='Duration (seconds)',
+                                    yaxis_title='Number of Videos',
+                                    bargap=0.2,
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    title_font=dict(color='#006E90'),
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_duration_distribution_no_sponsor', 'No sponsor', build)
 
                     with ui.card():
                         @render_plotly
+                        @metrics.timed('render.plot_duration_distribution_xtb')
                         def plot_duration_distribution_xtb():
                             """
                             Generate a histogram showing the distribution of video durations for XTB data.
                             """
-                            filtered_df = filter_by_date(df_videos[df_videos['sponsor'] == 'XTB'], input.date_range())
-                            filtered_df['duration'] = pd.to_numeric(filtered_df['duration'], errors='coerce')
-                            fig = px.histogram(filtered_df, x='duration', nbins=50,
-                                               title='XTB',
-                                               labels={'duration': 'Duration (seconds)'},
-                                               color_discrete_sequence=['#B80C09'])
-                            fig.update_layout(
-                                xaxis_title='Duration (seconds)',
-                                yaxis_title='Number of Videos',
-                                bargap=0.2,
-                                plot_bgcolor='rgba(0,0,0,0)',
-                                title_font=dict(color='#B80C09'),
-                                xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                                yaxis=dict(showgrid=True, gridcolor='lightgrey')
-                            )
-                            return fig
+                            def build():
+                                cube = dashboard_data().cube
+                                histogram = cube.duration_histogram(input.date_range(), sponsor='XTB')
+                                fig = go.Figure(
+                                    go.Bar(x=histogram['duration'] + cube.bin_seconds / 2, y=histogram['videos'],
+                                           width=cube.bin_seconds * 0.8, name='Number of Videos',
+                                           marker=dict(color='#B80C09')))
+                                fig.update_layout(
+                                    title=dict(text='XTB'),
+                                    xaxis_title='Duration (seconds)',
+                                    yaxis_title='Number of Videos',
+                                    bargap=0.2,
+                                    plot_bgcolor='rgba(0,0,0,0)',
+                                    title_font=dict(color='#B80C09'),
+                                    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                                    yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                                )
+                                return fig
+
+                            return cached_figure('plot_duration_distribution_xtb', 'XTB', build)
 
 
                 @render.text
+                @metrics.timed('render.text_dist')
                 def text_dist():
                     return """
                     XTB-sponsored videos are generally shorter and more concise, aligning with audience attention spans 
@@ -414,11 +635,76 @@ with ui.nav_panel("Analysis"):
                     maximizes sponsorship effectiveness.
                     """
 
+        with ui.layout_column_wrap(fill=False):
+            with ui.card():
+                "Views After Publication"
+
+                @render_plotly
+                @metrics.timed('render.plot_views_after_publish')
+                def plot_views_after_publish():
+                    """
+                    Generate a line chart of the median views of No sponsor and XTB videos at each age after
+                    publication, from the statistics history of the collection runs.
+                    """
+                    def build():
+                        growth = dashboard_data().growth
+                        fig = go.Figure()
+                        for sponsor, color in (('No sponsor', '#006E90'), ('XTB', '#B80C09')):
+                            if growth is None:
+                                break
+                            videos = growth.between(input.date_range(), sponsor=sponsor)
+                            # videos younger than an age have no views at it and are left out of its median
+                            medians = videos[[f'views_{days}d' for days in config.HISTORY_AGES_DAYS]].median()
+                            fig.add_trace(go.Scatter(x=config.HISTORY_AGES_DAYS, y=medians.to_numpy(),
+                                                     mode='lines+markers', name=sponsor, line=dict(color=color)))
+                        if growth is None:
+                            fig.add_annotation(text='No statistics history collected yet', showarrow=False,
+                                               xref='paper', yref='paper', x=0.5, y=0.5)
+                        fig.update_layout(
+                            title=dict(text='Median Views by Days Since Publication', font=dict(color='#1A1B41')),
+                            xaxis_title='Days since publication',
+                            yaxis_title='Median Views',
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            xaxis=dict(showgrid=True, gridcolor='lightgrey', type='log',
+                                       tickvals=config.HISTORY_AGES_DAYS),
+                            yaxis=dict(showgrid=True, gridcolor='lightgrey')
+                        )
+                        return fig
+
+                    return cached_figure('plot_views_after_publish', None, build)
+
 with ui.nav_panel("Data"):
     "Data Grid"
+    # searched, sorted and paged on the server: only the rows of one page are sent to the browser
+    with ui.layout_columns(fill=False):
+        ui.input_text("data_search", "Search titles")
+        ui.input_select("data_sort", "Sort by", choices=DATA_SORT_COLUMNS, selected='date')
+        ui.input_checkbox("data_descending", "Descending", False)
+        ui.input_numeric("data_page", "Page", 1, min=1)
+
+
+    @render.text
+    @metrics.timed('render.data_page_info')
+    def data_page_info():
+        rows = len(data_view())
+        page = min(max(int(input.data_page() or 1), 1), page_count(rows, config.DATA_PAGE_ROWS))
+        first = (page - 1) * config.DATA_PAGE_ROWS
+        return (f"Page {page} of {page_count(rows, config.DATA_PAGE_ROWS)}: "
+                f"videos {min(first + 1, rows)}-{min(first + config.DATA_PAGE_ROWS, rows)} of {rows}")
 
 
     @render.data_frame
+    @metrics.timed('render.videos_df')
     def videos_df():
-        filtered_df = filter_by_date(df_videos, input.date_range())
-        return render.DataGrid(filtered_df)
+        return render.DataGrid(data_rows(page_of(data_view(), input.data_page(), config.DATA_PAGE_ROWS)))
+
+
+    with ui.layout_columns(fill=False):
+        @render.download(label="Export CSV", filename="videos.csv")
+        def export_csv():
+            yield from iter_csv_chunks(data_view(), config.EXPORT_CHUNK_ROWS, data_rows)
+
+
+        @render.download(label="Export Parquet", filename="videos.parquet")
+        def export_parquet():
+            yield from iter_parquet_chunks(data_view(), config.EXPORT_CHUNK_ROWS, data_rows)
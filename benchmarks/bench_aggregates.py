@@ -0,0 +1,75 @@
+# benchmarks/bench_aggregates.py
+"""
+Latency per date range of the dashboard's KPIs and duration histogram computed from the video rows and answered
+from the prefix sums of the aggregate cube, and the time to build the cube.
+
+    python benchmarks/bench_aggregates.py --rows 1000 100000 1000000
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+import config
+from data_processing import process_data
+from synthetic import make_raw_videos
+from utils.aggregates import AggregateCube, build_aggregate_cube
+from utils.date_index import DateIndexedTable
+from utils.helpers import compact_videos
+
+
+def from_rows(videos: DateIndexedTable, date_range: tuple, sponsor: str) -> tuple:
+    """KPIs and 50-bin duration histogram of the rows in the range, as the dashboard computed them."""
+    rows = videos.between(date_range)
+    kpis = (rows['views'].sum(), len(rows), rows['views'].mean(), rows['likes'].sum() + rows['comments'].sum())
+    durations = videos.between(date_range, sponsor)['duration'].dropna()
+    return kpis, np.histogram(durations, bins=50) if len(durations) else None
+
+
+def from_cube(cube: AggregateCube, date_range: tuple, sponsor: str) -> tuple:
+    return cube.totals(date_range), cube.duration_histogram(date_range, sponsor)
+
+
+def per_query_ms(query, ranges) -> float:
+    start = time.perf_counter()
+    for date_range in ranges:
+        query(date_range)
+    return (time.perf_counter() - start) / len(ranges) * 1000
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'build s':>8} {'cube rows':>10} {'rows ms':>8} {'cube ms':>8} {'speedup':>8}")
+    for n_rows in args.rows:
+        processed = process_data(make_raw_videos(n_rows, seed=n_rows))
+        start = time.perf_counter()
+        aggregates = build_aggregate_cube(processed, separator=config.SPONSOR_SEPARATOR,
+                                          bin_seconds=config.DURATION_BIN_SECONDS, max_bins=config.DURATION_MAX_BINS)
+        build = time.perf_counter() - start
+        cube = AggregateCube(aggregates)
+        videos = DateIndexedTable(compact_videos(processed.assign(sponsor=processed['sponsor'].astype(str))),
+                                  separator=config.SPONSOR_SEPARATOR)
+
+        rng = np.random.default_rng(0)
+        days = pd.to_datetime(processed['date']).dt.date.unique()
+        ranges = [tuple(rng.choice(days, 2)) for _ in range(args.queries)]
+        totals = cube.totals(ranges[0])
+        rows = videos.between(ranges[0])
+        assert totals['views'] == rows['views'].sum() and totals['videos'] == len(rows)
+
+        rows_ms = per_query_ms(lambda r: from_rows(videos, r, 'XTB'), ranges)
+        cube_ms = per_query_ms(lambda r: from_cube(cube, r, 'XTB'), ranges)
+        print(f"{n_rows:>9} {build:>8.2f} {len(aggregates):>10} {rows_ms:>8.3f} {cube_ms:>8.3f} "
+              f"{rows_ms / cube_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_chunked_processing.py
+"""
+Wall-clock time and peak memory of process_chunked for increasing numbers of worker processes, against the
+in-memory process_data, on a synthetic raw video_stats table. The table is generated and every run is made in
+a separate process, so the peak resident memory of each run and of its largest worker is measured on its own.
+
+    python benchmarks/bench_chunked_processing.py --rows 1000000 --workers 1 2 4 8 --max-memory 256
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# first: makes the repository importable
+from common import argument_parser
+
+from synthetic import make_raw_videos
+from utils import storage
+
+
+def run(path: str, workers: int, max_memory_mb: float) -> None:
+    """Process the table once and print the elapsed time and peak memory as JSON."""
+    import data_processing
+
+    start = time.perf_counter()
+    if workers:
+        df = data_processing.process_chunked(path, workers, max_memory_mb)
+    else:
+        df = data_processing.process_data(data_processing.load_data(path, schema=storage.RAW_VIDEO_SCHEMA))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'rows': len(df),
+                      'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                      'worker_peak_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024}))
+
+
+def generate(path: str, n_rows: int) -> None:
+    storage.write_table(make_raw_videos(n_rows, seed=n_rows), path, storage.RAW_VIDEO_SCHEMA)
+
+
+def run_in_process(*args: str) -> str:
+    return subprocess.run([sys.executable, __file__, *args], capture_output=True, text=True, check=True).stdout
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--max-memory', type=float, default=256, help='memory budget of the raw chunks in MB')
+    parser.add_argument('--run', nargs=2, metavar=('PATH', 'WORKERS'), help=argparse.SUPPRESS)
+    parser.add_argument('--generate', metavar='PATH', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(args.run[0], int(args.run[1]), args.max_memory)
+        return
+    if args.generate:
+        generate(args.generate, args.rows)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = storage.data_path(tmp, 'video_stats', 'parquet')
+        # generated in another process, as the peak memory of a process is inherited by the processes it starts
+        run_in_process('--generate', path, '--rows', str(args.rows))
+        print(f"{args.rows} rows, {os.cpu_count()} cores, {args.max_memory:.0f} MB budget for raw chunks")
+        print(f"{'workers':>10} {'seconds':>9} {'speedup':>8} {'peak MB':>8} {'worker MB':>10}")
+        baseline = None
+        for workers in [0] + args.workers:
+            output = run_in_process('--run', path, str(workers), '--max-memory', str(args.max_memory))
+            result = json.loads(output.strip().splitlines()[-1])
+            baseline = baseline or result['seconds']
+            label = workers or 'in-memory'
+            print(f"{label:>10} {result['seconds']:>9.2f} {baseline / result['seconds']:>7.1f}x "
+                  f"{result['peak_mb']:>8.0f} {result['worker_peak_mb'] if workers else 0:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# benchmarks/bench_dashboard_memory.py
+"""
+Memory of the dashboard's video table per column, with the types it is stored with and with the compact
+in-memory types of compact_videos, for synthetic processed tables.
+
+    python benchmarks/bench_dashboard_memory.py --rows 100000 1000000
+"""
+
+import tempfile
+
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+from data_processing import process_data
+from synthetic import make_raw_videos
+from utils import storage
+from utils.helpers import compact_videos, memory_usage_mb
+
+DASHBOARD_COLUMNS = ['title', 'date', 'likes', 'comments', 'views', 'duration', 'sponsor', 'cumulative_views',
+                     'cumulative_views_XTB', 'cumulative_views_No_sponsor', 'ID']
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = storage.data_path(tmp, 'processed_video_stats', 'parquet')
+            storage.write_table(process_data(make_raw_videos(n_rows, seed=n_rows)), path,
+                                storage.PROCESSED_VIDEO_SCHEMA)
+            stored = storage.read_table(path, columns=DASHBOARD_COLUMNS, schema=storage.PROCESSED_VIDEO_SCHEMA)
+        compact = compact_videos(stored)
+        per_column = pd.DataFrame({
+            'stored dtype': stored.dtypes.astype(str),
+            'stored MB': stored.memory_usage(deep=True, index=False) / 2 ** 20,
+            'compact dtype': compact.dtypes.astype(str),
+            'compact MB': compact.memory_usage(deep=True, index=False) / 2 ** 20,
+        })
+        print(f"\n{n_rows} rows: {memory_usage_mb(stored):.1f} MB stored types, {memory_usage_mb(compact):.1f} MB "
+              f"compact ({memory_usage_mb(stored) / memory_usage_mb(compact):.1f}x smaller)")
+        print(per_column.round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
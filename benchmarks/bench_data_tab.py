@@ -0,0 +1,53 @@
+# benchmarks/bench_data_tab.py
+"""
+Payload size and server time per interaction of the dashboard's Data tab sending the whole filtered table and
+sending one page of it, searched and sorted on the server, for synthetic tables.
+
+    python benchmarks/bench_data_tab.py --rows 1000 100000 1000000
+
+The payload is the JSON of the rows, as the data grid sends them.
+"""
+
+import time
+
+# first: makes the repository importable
+from common import argument_parser
+
+import config
+from data_processing import process_data
+from synthetic import make_raw_videos
+from utils.date_index import DateIndexedTable
+from utils.helpers import compact_videos, titles_with_id
+from utils.table_view import page_of, search_rows, sort_rows
+
+
+def shown(df):
+    return df.assign(title=titles_with_id(df), date=df['date'].dt.strftime('%Y-%m-%d'))
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'full KB':>9} {'full ms':>8} {'page KB':>8} {'page ms':>8} {'search+sort ms':>15}")
+    for n_rows in args.rows:
+        processed = process_data(make_raw_videos(n_rows, seed=n_rows))
+        videos = DateIndexedTable(compact_videos(processed.assign(sponsor=processed['sponsor'].astype(str))))
+        rows = videos.between((videos.df['date'].iloc[0].date(), videos.df['date'].iloc[-1].date()))
+
+        full, full_ms = timed(lambda: shown(rows).to_json(orient='split'))
+        view, view_ms = timed(lambda: sort_rows(search_rows(rows, 'Rosj'), 'views', descending=True))
+        page, page_ms = timed(lambda: shown(page_of(rows, 2, config.DATA_PAGE_ROWS)).to_json(orient='split'))
+        print(f"{n_rows:>9} {len(full) / 1024:>9.0f} {full_ms:>8.0f} {len(page) / 1024:>8.1f} {page_ms:>8.1f} "
+              f"{view_ms:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
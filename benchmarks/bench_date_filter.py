@@ -0,0 +1,70 @@
+# benchmarks/bench_date_filter.py
+"""
+Latency per date range query of DateIndexedTable.between against filter_by_date as it was (re-parsing every
+date) and as it is (comparing datetime64 dates), over all videos and over the videos of one sponsor.
+
+    python benchmarks/bench_date_filter.py --rows 1000 100000 1000000
+"""
+
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+from data_processing import process_data
+from synthetic import make_raw_videos
+from utils.date_index import DateIndexedTable
+from utils.helpers import compact_videos, filter_by_date
+
+
+def filter_by_date_parsing(df: pd.DataFrame, date_range: tuple) -> pd.DataFrame:
+    """filter_by_date before the compact date column, kept as the reference."""
+    start_date, end_date = sorted(date_range)
+    end_date += timedelta(days=2)
+    dates = pd.to_datetime(df["date"], format="%Y-%m-%d").dt.date
+    return df[(dates >= start_date) & (dates < end_date)]
+
+
+def per_query_ms(query, ranges) -> float:
+    start = time.perf_counter()
+    for date_range in ranges:
+        query(date_range)
+    return (time.perf_counter() - start) / len(ranges) * 1000
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'sponsor':>10} {'parsing ms':>11} {'datetime64 ms':>14} {'index ms':>9} {'speedup':>8}")
+    for n_rows in args.rows:
+        processed = process_data(make_raw_videos(n_rows, seed=n_rows))
+        stored = processed.assign(date=processed['date'].astype(str), sponsor=processed['sponsor'].astype(str))
+        compact = compact_videos(stored)
+        videos = DateIndexedTable(compact)
+
+        rng = np.random.default_rng(0)
+        days = pd.to_datetime(compact['date']).dt.date.unique()
+        ranges = [tuple(rng.choice(days, 2)) for _ in range(args.queries)]
+        for sponsor in [None, 'XTB']:
+            # the sponsor is selected on every query, as the dashboard did before the index
+            def rows_of(df):
+                return df if sponsor is None else df[df['sponsor'] == sponsor]
+
+            parsing = per_query_ms(lambda r: filter_by_date_parsing(rows_of(stored), r), ranges[:10])
+            datetime64 = per_query_ms(lambda r: filter_by_date(rows_of(compact), r), ranges)
+            indexed = per_query_ms(lambda r: videos.between(r, sponsor), ranges)
+            pd.testing.assert_frame_equal(videos.between(ranges[0], sponsor),
+                                          filter_by_date(rows_of(compact), ranges[0]))
+            print(f"{n_rows:>9} {sponsor or 'all':>10} {parsing:>11.3f} {datetime64:>14.3f} {indexed:>9.3f} "
+                  f"{parsing / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_downsampling.py
+"""
+Payload size and server render time of the cumulative views chart with one point per video and downsampled to
+config.PLOT_MAX_POINTS points, for synthetic tables.
+
+    python benchmarks/bench_downsampling.py --rows 10000 100000 1000000
+
+The payload is the figure JSON sent to the browser, whose plotting time grows with it; the render time is the
+time to downsample, build the figure and serialize it.
+"""
+
+import time
+
+import numpy as np
+
+# first: makes the repository importable
+from common import argument_parser
+
+import config
+from bench_figure_cache import cumulative_views_figure
+from data_processing import process_data
+from synthetic import make_raw_videos
+from utils.downsample import downsample
+from utils.helpers import compact_videos
+
+
+def render(df, max_points=None):
+    start = time.perf_counter()
+    if max_points:
+        df = downsample(df, 'date', 'cumulative_views', max_points)
+    payload = cumulative_views_figure(df).to_json()
+    return len(payload), (time.perf_counter() - start) * 1000, df
+
+
+def max_error(full, kept) -> float:
+    """Largest gap between the full line and the downsampled one, relative to the last cumulative value."""
+    # videos published the same day share an x value; the lines are compared at the end of each day
+    full, kept = full.drop_duplicates('date', keep='last'), kept.drop_duplicates('date', keep='last')
+    x = full['date'].to_numpy().astype('int64')
+    line = np.interp(x, kept['date'].to_numpy().astype('int64'), kept['cumulative_views'].to_numpy())
+    return float(np.abs(line - full['cumulative_views'].to_numpy()).max() / full['cumulative_views'].iloc[-1])
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--max-points', type=int, default=config.PLOT_MAX_POINTS)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'points':>7} {'full KB':>9} {'full ms':>8} {'down KB':>8} {'down ms':>8} {'max error':>10}")
+    for n_rows in args.rows:
+        processed = process_data(make_raw_videos(n_rows, seed=n_rows))
+        df = compact_videos(processed.assign(sponsor=processed['sponsor'].astype(str)))
+        full_bytes, full_ms, _ = render(df)
+        down_bytes, down_ms, kept = render(df, args.max_points)
+        print(f"{n_rows:>9} {len(kept):>7} {full_bytes / 1024:>9.0f} {full_ms:>8.0f} {down_bytes / 1024:>8.0f} "
+              f"{down_ms:>8.0f} {max_error(df, kept):>9.3%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_durations.py
+"""
+Time of durations.parse_durations, with a cold and a warm cache, against isodate applied row by row, on
+duration columns drawn from a realistic mix of video lengths.
+
+    python benchmarks/bench_durations.py --rows 10000 100000 1000000
+"""
+
+import time
+
+import isodate
+import numpy as np
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+import durations
+
+
+def make_durations(n_rows: int, seed: int = 0) -> pd.Series:
+    """ISO 8601 durations as returned by the API: mostly 5-40 minute videos, some shorts and long streams."""
+    rng = np.random.default_rng(seed)
+    seconds = np.concatenate([
+        rng.integers(5, 60, n_rows // 10),
+        rng.lognormal(np.log(15 * 60), 0.6, n_rows - n_rows // 10 - n_rows // 50).astype(int),
+        rng.integers(3600, 3 * 86400, n_rows // 50),
+    ])
+    rng.shuffle(seconds)
+
+    def iso(total: int) -> str:
+        days, rest = divmod(int(total), 86400)
+        hours, rest = divmod(rest, 3600)
+        minutes, secs = divmod(rest, 60)
+        time_part = ''.join(f'{v}{u}' for v, u in ((hours, 'H'), (minutes, 'M'), (secs, 'S')) if v)
+        return (f'P{days}D' if days else 'P') + (f'T{time_part}' if time_part else '')
+
+    return pd.Series([iso(total) for total in seconds], name='duration')
+
+
+def timed(function, series: pd.Series) -> tuple:
+    start = time.perf_counter()
+    result = function(series)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'distinct':>9} {'isodate s':>10} {'cold s':>8} {'warm s':>8} {'speedup':>8}")
+    for n_rows in args.rows:
+        series = make_durations(n_rows, seed=n_rows)
+        isodate_time, expected = timed(lambda s: s.apply(lambda x: isodate.parse_duration(x).total_seconds()),
+                                       series)
+        durations._cache.clear()
+        cold_time, result = timed(durations.parse_durations, series)
+        warm_time, _ = timed(durations.parse_durations, series)
+        pd.testing.assert_series_equal(result, expected)
+        print(f"{n_rows:>9} {series.nunique():>9} {isodate_time:>10.3f} {cold_time:>8.3f} {warm_time:>8.3f} "
+              f"{isodate_time / cold_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_figure_cache.py
+"""
+Time to produce the widget of the dashboard's cumulative views chart as render_plotly did (building and
+validating the figure, then the widget) and through FigureCache on a miss and on a hit, for synthetic tables.
+
+    python benchmarks/bench_figure_cache.py --rows 1000 10000 100000
+"""
+
+import time
+
+import plotly.graph_objects as go
+
+# first: makes the repository importable
+from common import argument_parser
+
+from data_processing import process_data
+from synthetic import make_raw_videos
+from utils.figure_cache import FigureCache
+from utils.helpers import compact_videos
+
+
+def cumulative_views_figure(df) -> go.Figure:
+    """The figure of plot_cumulative_views_all."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df['date'], y=df['cumulative_views'], mode='lines', name='Cumulative Views',
+                             line=dict(color='#1A1B41')))
+    fig.update_layout(title=dict(text='All data', font=dict(color='#1A1B41')), xaxis_title='Date',
+                      yaxis_title='Cumulative Views', plot_bgcolor='rgba(0,0,0,0)',
+                      xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+                      yaxis=dict(showgrid=True, gridcolor='lightgrey'))
+    return fig
+
+
+def per_call_ms(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        function(i)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'uncached ms':>12} {'miss ms':>8} {'hit ms':>7} {'JSON KB':>8}")
+    for n_rows in args.rows:
+        processed = process_data(make_raw_videos(n_rows, seed=n_rows))
+        df = compact_videos(processed.assign(sponsor=processed['sponsor'].astype(str)))
+
+        def uncached(_):
+            fig = cumulative_views_figure(df)
+            return go.FigureWidget(fig.data, fig.layout)
+
+        cache = FigureCache()
+        miss = per_call_ms(lambda i: cache.figure(('miss', i), lambda: cumulative_views_figure(df)), args.repeat)
+        hit = per_call_ms(lambda i: cache.figure(('miss', 0), lambda: cumulative_views_figure(df)), args.repeat)
+        assert cache.hits == args.repeat and cache.misses == args.repeat
+        print(f"{n_rows:>8} {per_call_ms(uncached, args.repeat):>12.1f} {miss:>8.1f} {hit:>7.1f} "
+              f"{len(cache.get(('miss', 0))) / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
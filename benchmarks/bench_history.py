@@ -0,0 +1,94 @@
+# benchmarks/bench_history.py
+"""
+Size of the statistics history against one full snapshot per collection run, time to append a run, and latency
+of "views N days after publication" for every video from the history index and from a scan of the snapshots.
+
+    python benchmarks/bench_history.py --videos 1000 100000 --runs 30
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+from synthetic import make_raw_videos
+from utils import storage
+from utils.history import HistoryStore
+
+# share of the videos whose statistics change between two runs: recent uploads keep growing, old ones rarely do
+CHANGED_SHARE = 0.2
+
+
+def directory_bytes(directory: str) -> int:
+    return sum(path.stat().st_size for path in Path(directory).iterdir())
+
+
+def scan_at_age(snapshots_dir: str, published: pd.Series, days: int) -> pd.Series:
+    """Views at the last run before each video's age, reading every snapshot."""
+    runs = pd.concat([pd.read_parquet(path, columns=['video_id', 'views', 'fetched_at'])
+                      for path in sorted(Path(snapshots_dir).iterdir())])
+    runs['fetched_at'] = runs['fetched_at'].astype('datetime64[ns, UTC]')
+    targets = pd.DataFrame({'video_id': published.index, 'target': published.to_numpy() + pd.Timedelta(days=days)})
+    found = pd.merge_asof(targets.sort_values('target'), runs.sort_values('fetched_at'), left_on='target',
+                          right_on='fetched_at', by='video_id')
+    return found.set_index('video_id')['views'].reindex(published.index)
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--videos', type=int, nargs='+', default=[1000, 100_000])
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'videos':>8} {'runs':>5} {'history MB':>11} {'snapshots MB':>13} {'append ms':>10} "
+          f"{'index s':>8} {'query ms':>9} {'scan ms':>9}")
+    for n_videos in args.videos:
+        rng = np.random.default_rng(n_videos)
+        videos = make_raw_videos(n_videos, seed=n_videos)[['video_id', 'views', 'likes', 'comments']]
+        videos['video_id'] = videos['video_id'].astype(object)
+        first_run = pd.Timestamp('2024-01-01', tz='UTC')
+        # every video is published in the month before the first run
+        published = pd.Series(first_run - pd.to_timedelta(rng.integers(0, 30 * 86400, n_videos), unit='s'),
+                              index=videos['video_id'])
+        directory = tempfile.mkdtemp()
+        try:
+            store = HistoryStore(os.path.join(directory, 'history'))
+            snapshots_dir = os.path.join(directory, 'snapshots')
+            os.makedirs(snapshots_dir)
+            append_seconds = 0.0
+            for run in range(args.runs):
+                fetched_at = first_run + pd.Timedelta(days=run)
+                changed = rng.random(n_videos) < CHANGED_SHARE
+                videos.loc[changed, 'views'] += rng.integers(1, 1000, changed.sum())
+                start = time.perf_counter()
+                store.append(videos, fetched_at)
+                append_seconds += time.perf_counter() - start
+                storage.write_table(videos.assign(fetched_at=fetched_at),
+                                    os.path.join(snapshots_dir, f'run-{run:04d}.parquet'), storage.HISTORY_SCHEMA)
+
+            start = time.perf_counter()
+            index = store.index()
+            index_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            index.at_age(published, args.days)
+            query_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            scan_at_age(snapshots_dir, published, args.days)
+            scan_ms = (time.perf_counter() - start) * 1000
+            print(f"{n_videos:>8} {args.runs:>5} {directory_bytes(store.directory) / 2 ** 20:>11.2f} "
+                  f"{directory_bytes(snapshots_dir) / 2 ** 20:>13.2f} {append_seconds / args.runs * 1000:>10.1f} "
+                  f"{index_seconds:>8.2f} {query_ms:>9.1f} {scan_ms:>9.1f}")
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
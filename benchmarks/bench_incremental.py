@@ -0,0 +1,65 @@
+# benchmarks/bench_incremental.py
+"""
+Time of process_incremental against a full process_data run when a delta of the newest videos is added to
+synthetic channels, checking first that both produce the same processed table, IDs and titles included.
+
+    python benchmarks/bench_incremental.py --rows 10000 100000 1000000 --delta 10 100 1000
+"""
+
+import time
+
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+from data_processing import process_data, process_incremental
+from synthetic import make_raw_videos
+
+
+def newest_first(raw: pd.DataFrame) -> pd.DataFrame:
+    """Order raw rows as the uploads playlist and the collector's delta are, newest first."""
+    return raw.sort_values(by='date', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def check_newer_videos(n_delta: int) -> None:
+    """
+    Check that adding the n_delta newest videos incrementally gives the table of a full run.
+
+    The channel has at most one video per day: process_data orders the videos of the same day as its sort
+    happens to, so on such days neither run can be expected to number them as the other does.
+    """
+    raw = make_raw_videos(5000, seed=n_delta)
+    raw = newest_first(raw[~raw['date'].str[:10].duplicated()])
+    expected = process_data(raw.copy()).reset_index(drop=True)
+    result = process_incremental(process_data(raw.iloc[n_delta:].copy()), raw.iloc[:n_delta])
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def timed(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--delta', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    for n_delta in args.delta:
+        check_newer_videos(n_delta)
+    print(f"{'rows':>9} {'delta':>6} {'full s':>8} {'incremental s':>14} {'speedup':>8}  equivalent")
+    for n_rows in args.rows:
+        raw = newest_first(make_raw_videos(n_rows, seed=n_rows))
+        full_time, _ = timed(process_data, raw.copy())
+        for n_delta in args.delta:
+            processed = process_data(raw.iloc[n_delta:].copy())
+            incremental_time, _ = timed(process_incremental, processed, raw.iloc[:n_delta])
+            print(f"{n_rows:>9} {n_delta:>6} {full_time:>8.2f} {incremental_time:>14.3f} "
+                  f"{full_time / incremental_time:>7.1f}x  yes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_process_data.py
+"""
+Time of the vectorized process_data against the previous row-wise implementation on synthetic video_stats
+tables, checking first that both produce the same processed table. Videos mentioning XTB only by a lowercase
+link are tagged by the sponsor rule of config.SPONSORS and not by the row-wise one: they are left out of the
+comparison and their tag is checked on its own.
+
+    python benchmarks/bench_process_data.py --rows 10000 100000 1000000
+"""
+
+import time
+import warnings
+
+import isodate
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+from data_processing import process_data
+from synthetic import make_raw_videos
+
+
+def process_data_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    """process_data as it was before vectorization, kept as the reference for the equivalence check."""
+    df = df.drop(columns=['dislikes'])
+    df['description'] = df['description'].fillna('')
+    df['sponsor'] = df['description'].apply(lambda x: 'XTB' if 'XTB' in x else 'No sponsor')
+    df = df.drop(columns=['description'])
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    df['duration'] = df['duration'].apply(lambda x: isodate.parse_duration(x).total_seconds())
+    df = df.sort_values(by='date')
+    df['cumulative_views'] = df['views'].cumsum()
+    df['cumulative_views_XTB'] = df.apply(lambda row: row['views'] if row['sponsor'] == 'XTB' else 0, axis=1).cumsum()
+    df['cumulative_views_No_sponsor'] = df.apply(lambda row: row['views'] if row['sponsor'] == 'No sponsor' else 0,
+                                                 axis=1).cumsum()
+    df['cumulative_views_XTB'] = df['cumulative_views_XTB'].replace(0, pd.NA).ffill().fillna(0).infer_objects(
+        copy=False)
+    df['cumulative_views_No_sponsor'] = df['cumulative_views_No_sponsor'].replace(0, pd.NA).ffill().fillna(
+        0).infer_objects(copy=False)
+    df['ID'] = range(1, len(df) + 1)
+    df['title'] = df['ID'].astype(str) + '. ' + df['title']
+    return df
+
+
+def link_only(df: pd.DataFrame) -> pd.Series:
+    """Rows whose description links to xtb.com without naming XTB as written."""
+    description = df['description'].fillna('')
+    return description.str.contains('xtb.com', case=False, regex=False) & \
+        ~description.str.contains('XTB', regex=False)
+
+
+def timed(function, df: pd.DataFrame) -> tuple:
+    start = time.perf_counter()
+    result = function(df.copy())
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    print(f"{'rows':>9} {'row-wise s':>11} {'vectorized s':>13} {'speedup':>8}  equivalent")
+    for n_rows in args.rows:
+        df = make_raw_videos(n_rows, seed=n_rows)
+        links = link_only(df)
+        linked_sponsors = process_data(df[links].copy())['sponsor']
+        assert (linked_sponsors == 'XTB').all(), "videos linking to xtb.com are not tagged as XTB"
+        df = df[~links].reset_index(drop=True)
+        rowwise_time, expected = timed(process_data_rowwise, df)
+        vectorized_time, result = timed(process_data, df)
+        # the sponsor column is categorical since the sponsor classifier
+        pd.testing.assert_frame_equal(result.astype({'sponsor': object}), expected)
+        print(f"{len(df):>9} {rowwise_time:>11.2f} {vectorized_time:>13.2f} {rowwise_time / vectorized_time:>7.1f}x  yes")
+
+
+if __name__ == "__main__":
+    main()
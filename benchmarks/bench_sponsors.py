@@ -0,0 +1,92 @@
+# benchmarks/bench_sponsors.py
+"""
+Throughput of the single-pass SponsorMatcher against one str.contains scan per sponsor, for sponsor dictionaries
+of growing size, on the descriptions of data/video_stats.csv replicated to the requested number of rows.
+
+    python benchmarks/bench_sponsors.py --rows 1000000 --sponsors 1 10 100 500
+"""
+
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# first: makes the repository importable
+from common import argument_parser
+
+import config
+from sponsors import SponsorMatcher
+from synthetic import make_raw_videos
+
+
+def make_sponsors(n_sponsors: int) -> Dict[str, Dict]:
+    """XTB as configured plus n_sponsors - 1 made-up brands, with aliases, URLs and mixed case rules."""
+    sponsors = dict(config.SPONSORS)
+    for i in range(1, n_sponsors):
+        sponsors[f'Brand{i}'] = {
+            'keywords': [f'Brand{i}'],
+            'aliases': [f'BRD{i}', f'Brand {i} Polska'],
+            'case_sensitive': i % 3 == 0,
+            'whole_word': i % 2 == 0,
+            'urls': [f'brand{i}.pl'],
+        }
+    return sponsors
+
+
+def make_descriptions(n_rows: int, n_brands: int, seed: int = 0) -> pd.Series:
+    """Collected descriptions replicated to n_rows, with a made-up brand mentioned in every tenth one."""
+    rng = np.random.default_rng(seed)
+    descriptions = make_raw_videos(n_rows, seed=seed)['description']
+    mentioned = np.flatnonzero(rng.random(n_rows) < 0.1)
+    brands = rng.integers(1, max(n_brands, 2), len(mentioned))
+    descriptions.iloc[mentioned] = [f'Partnerem odcinka jest Brand{b}: brand{b}.pl\n' + descriptions.iloc[i]
+                                    for i, b in zip(mentioned, brands)]
+    return descriptions
+
+
+def per_sponsor_scans(descriptions: pd.Series, sponsors: Dict[str, Dict]) -> pd.Series:
+    """The previous approach, extended naively: one case-insensitive scan of every description per sponsor."""
+    texts = descriptions.fillna('')
+    found = pd.Series('', index=descriptions.index)
+    for name, rules in sponsors.items():
+        terms = list(rules.get('keywords', [name])) + list(rules.get('aliases', [])) + list(rules.get('urls', []))
+        hit = np.zeros(len(texts), dtype=bool)
+        for term in terms:
+            hit |= texts.str.contains(term, case=False, regex=False).to_numpy()
+        found[hit] += name + config.SPONSOR_SEPARATOR
+    return found
+
+
+def timed(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--sponsors', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--scan-limit', type=int, default=10,
+                        help='largest dictionary also timed with one scan per sponsor, which grows linearly')
+    args = parser.parse_args()
+
+    descriptions = make_descriptions(args.rows, max(args.sponsors))
+    megabytes = descriptions.str.len().sum() / 2 ** 20
+    print(f"{args.rows} descriptions, {megabytes:.0f} MB of text")
+    print(f"{'sponsors':>9} {'terms':>6} {'matcher s':>10} {'rows/s':>10} {'per-sponsor s':>14}  sponsored")
+    for n_sponsors in args.sponsors:
+        sponsors = make_sponsors(n_sponsors)
+        matcher = SponsorMatcher(sponsors)
+        matcher_time, labels = timed(matcher.classify, descriptions)
+        scan_time = '-'
+        if n_sponsors <= args.scan_limit:
+            scan_time = f"{timed(per_sponsor_scans, descriptions, sponsors)[0]:.2f}"
+        sponsored = (labels != config.NO_SPONSOR).mean() * 100
+        print(f"{n_sponsors:>9} {len(matcher._terms):>6} {matcher_time:>10.2f} {args.rows / matcher_time:>10.0f} "
+              f"{scan_time:>14}  {sponsored:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
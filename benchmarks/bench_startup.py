@@ -0,0 +1,103 @@
+# benchmarks/bench_startup.py
+"""
+Cold start of the dashboard: time from launching `shiny run` to the first byte of the page, and from opening a
+session to its first output, with the video table mapped from the dashboard snapshot and parsed from the
+processed table, for synthetic channel partitions.
+
+    python benchmarks/bench_startup.py --rows 1000 100000 1000000
+
+The app module runs once when the server starts and again for every session, so both load the video table.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import pandas as pd
+
+# first: makes the repository importable
+from common import ROOT, argument_parser
+
+import config
+from data_processing import process_channel
+from synthetic import make_raw_videos
+from utils import storage
+from utils.helpers import channel_data_dir
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_byte(url: str, start: float, timeout: float = 300) -> float:
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url) as response:
+                response.read(1)
+            return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.02)
+    raise TimeoutError(f"{url} did not answer within {timeout} s")
+
+
+async def time_to_first_output(port: int) -> float:
+    import websockets
+
+    start = time.perf_counter()
+    async with websockets.connect(f'ws://127.0.0.1:{port}/websocket/', max_size=None) as ws:
+        await ws.send(json.dumps({'method': 'init', 'data': {
+            'date_range:shiny.date': ['2017-01-01', '2025-01-01'], '.clientdata_output_total_views_hidden': False}}))
+        while 'total_views' not in json.loads(await ws.recv()).get('values', {}):
+            pass
+    return time.perf_counter() - start
+
+
+def cold_start(data_dir: str) -> tuple:
+    port = free_port()
+    env = dict(os.environ, DASHBOARD_DATA_DIR=data_dir, DASHBOARD_CHANNEL_ID=config.CHANNEL_ID)
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'shiny', 'run', '--port', str(port), 'app.py'], cwd=ROOT,
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first_byte = time_to_first_byte(f'http://127.0.0.1:{port}/', start)
+        first_output = asyncio.run(time_to_first_output(port))
+    finally:
+        server.terminate()
+        server.wait()
+    return first_byte, first_output
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'snapshot: first byte s':>23} {'session s':>10} {'parsed: first byte s':>21} "
+          f"{'session s':>10}")
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            channel_dir = channel_data_dir(tmp, config.CHANNEL_ID)
+            os.makedirs(channel_dir)
+            storage.write_table(make_raw_videos(n_rows, seed=n_rows),
+                                storage.data_path(channel_dir, 'video_stats', 'parquet'), storage.RAW_VIDEO_SCHEMA)
+            storage.write_table(pd.DataFrame({'title': ['Synthetic'], 'subscriberCount': [1], 'viewCount': [1],
+                                              'videoCount': [n_rows]}),
+                                storage.data_path(channel_dir, 'channel_stats', 'parquet'), storage.CHANNEL_SCHEMA)
+            process_channel(channel_dir, 'parquet')
+
+            snapshot = cold_start(tmp)
+            os.remove(os.path.join(channel_dir, config.DASHBOARD_SNAPSHOT_FILE))
+            parsed = cold_start(tmp)
+        print(f"{n_rows:>9} {snapshot[0]:>23.2f} {snapshot[1]:>10.2f} {parsed[0]:>21.2f} {parsed[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
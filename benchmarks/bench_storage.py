@@ -0,0 +1,47 @@
+# benchmarks/bench_storage.py
+"""
+Write time, read time and file size of the CSV and Parquet storage formats on synthetic video_stats tables,
+for a full read and for the dashboard's projection without descriptions.
+
+    python benchmarks/bench_storage.py --rows 10000 100000 1000000
+"""
+
+import os
+import tempfile
+import time
+
+# first: makes the repository importable
+from common import argument_parser
+
+from synthetic import make_raw_videos
+from utils import storage
+
+PROJECTION = ['video_id', 'title', 'date', 'likes', 'comments', 'views', 'duration']
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'format':>8} {'size MB':>8} {'write s':>8} {'read s':>8} {'projected read s':>17}")
+    for n_rows in args.rows:
+        df = make_raw_videos(n_rows)
+        with tempfile.TemporaryDirectory() as directory:
+            for fmt in storage.EXTENSIONS:
+                path = storage.data_path(directory, 'video_stats', fmt)
+                write = timed(storage.write_table, df, path, storage.RAW_VIDEO_SCHEMA)
+                read = timed(storage.read_table, path, schema=storage.RAW_VIDEO_SCHEMA)
+                projected = timed(storage.read_table, path, columns=PROJECTION, schema=storage.RAW_VIDEO_SCHEMA)
+                size = os.path.getsize(path) / 2 ** 20
+                print(f"{n_rows:>9} {fmt:>8} {size:>8.1f} {write:>8.2f} {read:>8.2f} {projected:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_streaming_memory.py
+"""
+Peak Python memory of collecting a channel with the buffered path (all raw responses in lists, then one
+DataFrame) against the streaming path (pages -> detail batches -> rows -> appending writer).
+
+    python benchmarks/bench_streaming_memory.py --videos 1000 5000 20000 --description-size 2000
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+from googleapiclient.discovery import build
+
+# first: makes the repository importable
+from common import argument_parser
+
+import data_collection
+from quota_scheduler import QuotaScheduler
+from fake_youtube_api import FakeYouTubeAPI
+
+
+def buffered(youtube, channel_dir: str) -> None:
+    video_details = data_collection.get_all_videos_and_details(youtube, 'UC-fake-channel')
+    data_collection.save_data_to_csv({}, video_details, channel_dir)
+
+
+def streaming(youtube, channel_dir: str) -> None:
+    writer = data_collection.PartialCsvWriter(os.path.join(channel_dir, 'video_stats.csv'))
+    data_collection.stream_all_videos(youtube, 'UC-fake-channel', writer, {})
+    writer.commit()
+
+
+def measure(collect, youtube) -> tuple:
+    data_collection.scheduler = QuotaScheduler(rate=1e6, burst=1e6, daily_budget=10 ** 9)
+    with tempfile.TemporaryDirectory() as channel_dir:
+        tracemalloc.start()
+        start = time.perf_counter()
+        collect(youtube, channel_dir)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--videos', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--description-size', type=int, default=2000, help='description length in characters')
+    args = parser.parse_args()
+
+    print(f"{'videos':>8} {'buffered MB':>12} {'streaming MB':>13} {'buffered s':>11} {'streaming s':>12}")
+    for n_videos in args.videos:
+        with FakeYouTubeAPI(n_videos=n_videos, latency=0.0, description_size=args.description_size) as api:
+            youtube = build('youtube', 'v3', developerKey='fake', client_options={'api_endpoint': api.url})
+            buffered_time, buffered_peak = measure(buffered, youtube)
+            streaming_time, streaming_peak = measure(streaming, youtube)
+        print(f"{n_videos:>8} {buffered_peak / 2 ** 20:>12.1f} {streaming_peak / 2 ** 20:>13.1f} "
+              f"{buffered_time:>11.2f} {streaming_time:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# benchmarks/bench_suite.py
+"""
+Benchmark suite: time the collection flattening, each processing stage, the date filtering and each dashboard
+render callback on synthetic data, and store the timings as JSON to compare them between commits.
+
+    python benchmarks/bench_suite.py --rows 1000 100000 10000000
+    python benchmarks/bench_suite.py --rows 1000 100000 --compare benchmarks/results/<commit>.json
+
+The data comes from synthetic.make_raw_videos: skewed views, Polish and English descriptions with and without
+sponsor mentions, durations from shorts to multi-day streams, and make_channels splits it between many channels.
+
+The stages that hold every row as Python objects (the API resources flattened by save_data_to_csv, the raw
+tables read back by process_channel) and the dashboard, whose figures carry every filtered row, run on at most
+--limit rows; each timing is stored with the rows it measured. The per-row processing stages run on chunks of
+--chunk-rows rows, as data_processing --workers does with tables larger than memory: the sponsor classifier
+copies the descriptions to Arrow, about 15 GB for 10M videos. Filtering stages are timed per query, as the
+mean over random date ranges. Render callbacks are timed in a `shiny run` server, from opening a session that
+shows only that output to receiving its value.
+"""
+
+import ast
+import asyncio
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# first: makes the repository importable
+from common import ROOT, argument_parser
+
+import config
+from bench_startup import free_port, time_to_first_byte
+from data_collection import VIDEO_COLUMNS, flatten_video, save_data_to_csv
+from data_processing import add_running_columns, process_channel, process_rows, sponsor_matcher
+from durations import parse_durations
+from synthetic import make_channels, make_raw_videos, make_video_items
+from utils import storage
+from utils.aggregates import AggregateCube, build_aggregate_cube
+from utils.date_index import DateIndexedTable
+from utils.helpers import channel_data_dir, compact_videos, filter_by_date
+
+# progress logs of data_processing would be mixed with the table
+logging.getLogger().setLevel(logging.WARNING)
+
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+CHANNEL_STATS = {'title': 'Synthetic', 'subscriberCount': 1000, 'viewCount': 1000, 'videoCount': 1000}
+# the initial values of the dashboard inputs, as the browser sends them when a session starts
+DASHBOARD_INPUTS = {'date_range:shiny.date': ['2017-03-04', '2024-07-25'], 'data_search': '', 'data_sort': 'date',
+                    'data_descending': False, 'data_page': 1}
+
+
+class Timings:
+    """Timings of one run of the suite, as rows of (size, stage, rows, seconds)."""
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results: List[Dict] = []
+
+    def time(self, size: int, stage: str, rows: int, function: Callable, setup: Optional[Callable] = None,
+             repeat: Optional[int] = None):
+        """
+        Run a function repeat times, record its best time and return its last result.
+
+        When given, setup runs untimed before each run and its result is the function's argument.
+        """
+        best = float('inf')
+        for _ in range(repeat or self.repeat):
+            args = (setup(),) if setup else ()
+            start = time.perf_counter()
+            result = function(*args)
+            best = min(best, time.perf_counter() - start)
+        self.record(size, stage, rows, best)
+        return result
+
+    def record(self, size: int, stage: str, rows: int, seconds: float) -> None:
+        self.results.append({'size': size, 'stage': stage, 'rows': rows, 'seconds': seconds})
+        print(f"{size:>10} {stage:<45} {rows:>10} {seconds * 1000:>12.2f}", flush=True)
+
+
+def bench_collection(timings: Timings, size: int, raw: pd.DataFrame, tmp: str) -> None:
+    items = make_video_items(raw)
+    timings.time(size, 'collection.flatten_video', len(items),
+                 lambda: pd.DataFrame([flatten_video(video) for video in items], columns=VIDEO_COLUMNS))
+    channel_dir = channel_data_dir(tmp, 'UC-collection')
+    timings.time(size, 'collection.save_data_to_csv', len(items),
+                 lambda: save_data_to_csv(CHANNEL_STATS, items, channel_dir, 'parquet'))
+
+
+def bench_row_stages(timings: Timings, size: int, chunk: int) -> pd.DataFrame:
+    """Time the per-row stages of size raw rows, in chunks of chunk rows, and return their combined result."""
+    raw = make_raw_videos(size, seed=size)
+    n = len(raw)
+    chunks = [raw.iloc[start:start + chunk] for start in range(0, n, chunk)]
+    timings.time(size, 'process.sponsors', n,
+                 lambda: [sponsor_matcher.classify(rows['description']) for rows in chunks])
+    timings.time(size, 'process.dates', n, lambda: [pd.to_datetime(rows['date']).dt.date for rows in chunks])
+    timings.time(size, 'process.durations', n, lambda: [parse_durations(rows['duration']) for rows in chunks])
+    # combined as process_chunked does
+    return timings.time(size, 'process.process_rows', n, lambda: pd.concat(
+        [process_rows(rows) for rows in chunks], ignore_index=True).astype({'sponsor': 'category'}))
+
+
+def bench_processing(timings: Timings, size: int, chunk: int) -> tuple:
+    """Time the processing stages of size raw rows and return the dashboard's video table and aggregates."""
+    # the raw rows and their chunks are freed once the per-row stages are timed
+    rows = bench_row_stages(timings, size, chunk)
+    n = len(rows)
+    ordered = timings.time(size, 'process.sort', n, partial(rows.sort_values, by='date'))
+    del rows
+    # add_running_columns adds its columns in place
+    processed = timings.time(size, 'process.add_running_columns', n, add_running_columns, setup=ordered.copy)
+    del ordered
+    aggregates = timings.time(size, 'process.aggregates', n,
+                              lambda: build_aggregate_cube(processed, separator=config.SPONSOR_SEPARATOR,
+                                                           bin_seconds=config.DURATION_BIN_SECONDS,
+                                                           max_bins=config.DURATION_MAX_BINS))
+    videos = timings.time(size, 'process.compact_videos', n,
+                          lambda: compact_videos(processed[config.DASHBOARD_COLUMNS]))
+    return videos, aggregates
+
+
+def write_channel(channel_dir: str, raw: pd.DataFrame) -> None:
+    os.makedirs(channel_dir, exist_ok=True)
+    storage.write_table(raw, storage.data_path(channel_dir, 'video_stats', 'parquet'), storage.RAW_VIDEO_SCHEMA)
+    storage.write_table(pd.DataFrame([CHANNEL_STATS]), storage.data_path(channel_dir, 'channel_stats', 'parquet'),
+                        storage.CHANNEL_SCHEMA)
+
+
+def bench_channels(timings: Timings, size: int, n_rows: int, n_channels: int, tmp: str) -> None:
+    channel_dirs = []
+    for channel_id, raw in make_channels(n_rows, n_channels, seed=size).items():
+        channel_dirs.append(channel_data_dir(os.path.join(tmp, 'channels'), channel_id))
+        write_channel(channel_dirs[-1], raw)
+    timings.time(size, f'process.process_channel x{n_channels}', n_rows,
+                 lambda: [process_channel(channel_dir, 'parquet') for channel_dir in channel_dirs], repeat=1)
+
+
+def bench_filtering(timings: Timings, size: int, videos: pd.DataFrame, aggregates: pd.DataFrame,
+                    queries: int = 20) -> None:
+    table = DateIndexedTable(videos, separator=config.SPONSOR_SEPARATOR)
+    cube = AggregateCube(aggregates)
+    rng = np.random.default_rng(size)
+    first = datetime.date(2017, 1, 1)
+    ranges = [tuple(sorted(first + datetime.timedelta(days=int(day)) for day in rng.integers(0, 8 * 365, 2)))
+              for _ in range(queries)]
+    n = len(videos)
+    # per query: the slider's range over every video and over one sponsor, and the KPIs of that range
+    for stage, query in [('filter.filter_by_date', lambda r: filter_by_date(videos, r)),
+                         ('filter.between', lambda r: table.between(r)),
+                         ('filter.between_sponsor', lambda r: table.between(r, sponsor='XTB')),
+                         ('filter.aggregate_totals', lambda r: cube.totals(r))]:
+        timings.record(size, stage, n, min(_time_queries(query, ranges) for _ in range(timings.repeat)))
+
+
+def _time_queries(query: Callable, ranges: List[tuple]) -> float:
+    """Return the mean time of a query over date ranges."""
+    start = time.perf_counter()
+    for date_range in ranges:
+        query(date_range)
+    return (time.perf_counter() - start) / len(ranges)
+
+
+def render_outputs(app_path: Path = ROOT / 'app.py') -> List[str]:
+    """Return the names of the outputs rendered when a session starts: the render functions of the app."""
+    outputs = []
+    for node in ast.walk(ast.parse(app_path.read_text(encoding='utf-8'))):
+        if isinstance(node, ast.FunctionDef):
+            for decorator in node.decorator_list:
+                # render.text, render.data_frame and render_plotly; render.download(...) renders on a click
+                name = ast.unparse(decorator)
+                if not isinstance(decorator, ast.Call) and (name.startswith('render.') or name.startswith('render_')):
+                    outputs.append(node.name)
+    return outputs
+
+
+async def time_outputs(port: int, outputs: List[str], inputs: Dict = DASHBOARD_INPUTS,
+                       timeout: float = 600) -> float:
+    """Return the time from opening a session showing only the given outputs to receiving all their values."""
+    import websockets
+
+    start = time.perf_counter()
+    async with websockets.connect(f'ws://127.0.0.1:{port}/websocket/', max_size=None) as ws:
+        await ws.send(json.dumps({'method': 'init', 'data': dict(
+            inputs, **{f'.clientdata_output_{output}_hidden': False for output in outputs})}))
+        waiting = set(outputs)
+        while waiting:
+            message = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+            errors = waiting & set(message.get('errors', {}))
+            if errors:
+                raise RuntimeError(f"{', '.join(sorted(errors))}: {message['errors']}")
+            waiting -= set(message.get('values', {}))
+        return time.perf_counter() - start
+
+
+def bench_render(timings: Timings, size: int, raw: pd.DataFrame, tmp: str) -> None:
+    data_dir = os.path.join(tmp, 'dashboard')
+    channel_dir = channel_data_dir(data_dir, config.CHANNEL_ID)
+    write_channel(channel_dir, raw)
+    timings.time(size, 'process.process_channel', len(raw), lambda: process_channel(channel_dir, 'parquet'),
+                 repeat=1)
+
+    port = free_port()
+    env = dict(os.environ, DASHBOARD_DATA_DIR=data_dir, DASHBOARD_CHANNEL_ID=config.CHANNEL_ID)
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'shiny', 'run', '--port', str(port), 'app.py'], cwd=ROOT,
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        timings.record(size, 'render.server_start', len(raw), time_to_first_byte(f'http://127.0.0.1:{port}/', start))
+        outputs = render_outputs()
+        # figures are shared by the sessions of the server and cached by date range, so every session asks for
+        # another range; the first one renders everything, so that the timings do not include the first figure
+        # and widget of the process
+        ranges = [dict(DASHBOARD_INPUTS, **{'date_range:shiny.date': ['2017-03-04', f'2024-07-{25 - k}']})
+                  for k in range(timings.repeat + 1)]
+        asyncio.run(time_outputs(port, outputs, ranges[-1]))
+        # every session builds the page and runs its calcs again: each output is rendered by sessions of its own
+        for output in outputs:
+            seconds = min(asyncio.run(time_outputs(port, [output], inputs)) for inputs in ranges[:-1])
+            timings.record(size, f'render.{output}', len(raw), seconds)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def git_commit() -> Dict:
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {'commit': git('rev-parse', '--short', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '-uno'))}
+
+
+def compare(results: List[Dict], baseline_path: str, threshold: float) -> int:
+    """Print the timings next to those of a previous run and return the number of regressions."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(row['size'], row['stage']): row for row in baseline['results']}
+    print(f"\nCompared with {baseline['commit']}{' (dirty)' if baseline['dirty'] else ''} "
+          f"from {baseline['created']}:")
+    print(f"{'size':>10} {'stage':<45} {'before ms':>12} {'after ms':>12} {'ratio':>7}")
+    regressions = 0
+    for row in results:
+        old = before.get((row['size'], row['stage']))
+        if old is None or old['rows'] != row['rows']:
+            continue
+        ratio = row['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        regressed = ratio > 1 + threshold
+        regressions += regressed
+        print(f"{row['size']:>10} {row['stage']:<45} {old['seconds'] * 1000:>12.2f} {row['seconds'] * 1000:>12.2f} "
+              f"{ratio:>7.2f}{'  slower' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100_000, 10_000_000])
+    parser.add_argument('--limit', type=int, default=1_000_000,
+                        help="rows of the collection, per-channel processing and dashboard stages")
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000,
+                        help="rows per chunk of the per-row processing stages, as in data_processing --workers")
+    parser.add_argument('--channels', type=int, default=20, help="channels the per-channel processing splits into")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs of each stage up to 100k rows, the best one is kept (1 run above)")
+    parser.add_argument('--stages', nargs='+', default=['collection', 'processing', 'filtering', 'render'],
+                        choices=['collection', 'processing', 'filtering', 'render'])
+    parser.add_argument('--output', help="JSON file of the results (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', metavar='JSON', help="results of a previous run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="slowdown reported as a regression when comparing, as a share of the previous time")
+    args = parser.parse_args()
+
+    run = dict(git_commit(), created=datetime.datetime.now().isoformat(timespec='seconds'),
+               python=platform.python_version(), pandas=pd.__version__, machine=platform.platform(),
+               cpus=os.cpu_count(), rows=args.rows, limit=args.limit)
+    print(f"{'size':>10} {'stage':<45} {'rows':>10} {'ms':>12}")
+    timings = Timings(args.repeat)
+    for size in args.rows:
+        timings.repeat = args.repeat if size <= 100_000 else 1
+        limited = make_raw_videos(min(size, args.limit), seed=size)
+        with tempfile.TemporaryDirectory() as tmp:
+            if 'collection' in args.stages:
+                bench_collection(timings, size, limited, tmp)
+            if 'processing' in args.stages or 'filtering' in args.stages:
+                videos, aggregates = bench_processing(timings, size, args.chunk_rows)
+                if 'processing' in args.stages:
+                    bench_channels(timings, size, len(limited), args.channels, tmp)
+                if 'filtering' in args.stages:
+                    bench_filtering(timings, size, videos, aggregates)
+                del videos, aggregates
+            if 'render' in args.stages:
+                bench_render(timings, size, limited, tmp)
+        del limited
+
+    output = Path(args.output or RESULTS_DIR / f"{run['commit']}{'-dirty' if run['dirty'] else ''}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(dict(run, results=timings.results), indent=2), encoding='utf-8')
+    print(f"\nResults written to {output}")
+    if args.compare and compare(timings.results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
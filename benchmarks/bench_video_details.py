@@ -0,0 +1,50 @@
+# benchmarks/bench_video_details.py
+"""
+Wall-clock time of get_video_details against a local fake YouTube API with artificial latency,
+for increasing concurrency limits.
+
+    python benchmarks/bench_video_details.py --videos 2000 --latency 0.1
+"""
+
+import time
+
+from googleapiclient.discovery import build
+
+# first: makes the repository importable
+from common import argument_parser
+
+import data_collection
+from quota_scheduler import QuotaScheduler
+from fake_youtube_api import FakeYouTubeAPI
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument('--videos', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.1, help='artificial latency per request in seconds')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--rate', type=float, default=1000.0, help='scheduler rate limit in requests per second')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with a 429')
+    args = parser.parse_args()
+
+    with FakeYouTubeAPI(n_videos=args.videos, latency=args.latency, error_rate=args.error_rate) as api:
+        youtube = build('youtube', 'v3', developerKey='fake', client_options={'api_endpoint': api.url})
+        video_ids = [api.video_id(i) for i in range(args.videos)]
+
+        print(f"{args.videos} videos, {args.latency * 1000:.0f} ms latency per request")
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            # a fresh scheduler per run, so responses merged from the previous run are not reused
+            data_collection.scheduler = QuotaScheduler(rate=args.rate, burst=args.rate, backoff=0.05)
+            start = time.perf_counter()
+            details = data_collection.get_video_details(youtube, video_ids, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            if not args.error_rate:
+                assert [video['id'] for video in details] == video_ids, "output order differs from input order"
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.3f} {baseline / elapsed:>7.1f}x   {data_collection.scheduler.summary()}")
+
+
+if __name__ == "__main__":
+    main()
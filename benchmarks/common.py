@@ -0,0 +1,23 @@
+# benchmarks/common.py
+"""
+Setup shared by the benchmark scripts, imported before anything of the repository: it makes the utils package
+and the modules of scripts/ importable, and creates the logs directory the scripts log to.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT / 'scripts', ROOT):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+# data_processing and data_collection log to logs/ of the working directory
+os.makedirs('logs', exist_ok=True)
+
+
+def argument_parser(doc: str) -> argparse.ArgumentParser:
+    """Return the argument parser of a benchmark, described by the first line of its docstring."""
+    return argparse.ArgumentParser(description=doc.splitlines()[1])
@@ -0,0 +1,137 @@
+# benchmarks/fake_youtube_api.py
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+PLAYLIST_ID = 'UU-fake-uploads'
+
+
+class FakeYouTubeAPI:
+    """
+    Local stand-in for the YouTube Data API v3 that answers with synthetic data after an artificial latency,
+    and with a 429 error for a random error_rate share of the requests.
+
+    Usage:
+        with FakeYouTubeAPI(n_videos=2000, latency=0.1) as api:
+            youtube = build('youtube', 'v3', developerKey='fake', client_options={'api_endpoint': api.url})
+    """
+
+    def __init__(self, n_videos: int = 1000, latency: float = 0.1, channel_id: str = 'UC-fake-channel',
+                 error_rate: float = 0.0, description_size: int = 0):
+        self.n_videos = n_videos
+        self.description_size = description_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.channel_id = channel_id
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def video_id(self, index: int) -> str:
+        return f'vid{index:08d}'
+
+    def video_resource(self, video_id: str) -> Dict:
+        index = int(video_id[3:])
+        return {
+            'kind': 'youtube#video',
+            'etag': f'etag-{video_id}',
+            'id': video_id,
+            'snippet': {
+                'title': f'Video {index}',
+                'publishedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(1_500_000_000 + index * 86_400)),
+                'description': (f'Description of video {index}' + (' sponsored by XTB' if index % 5 == 0 else '')
+                                + ' lorem ipsum' * (self.description_size // 12)),
+            },
+            'contentDetails': {'duration': f'PT{index % 60}M{index % 59}S'},
+            'statistics': {
+                'viewCount': str(1000 + index * 7),
+                'likeCount': str(10 + index % 100),
+                'commentCount': str(index % 30),
+            },
+        }
+
+    def playlist_page(self, page_token: str, max_results: int) -> Dict:
+        # the uploads playlist is ordered newest first
+        start = int(page_token or 0)
+        stop = min(start + max_results, self.n_videos)
+        items = [
+            {'snippet': {'publishedAt': self.video_resource(self.video_id(i))['snippet']['publishedAt'],
+                         'resourceId': {'kind': 'youtube#video', 'videoId': self.video_id(i)}}}
+            for i in range(self.n_videos - 1 - start, self.n_videos - 1 - stop, -1)
+        ]
+        page = {'kind': 'youtube#playlistItemListResponse', 'items': items,
+                'pageInfo': {'totalResults': self.n_videos, 'resultsPerPage': max_results}}
+        if stop < self.n_videos:
+            page['nextPageToken'] = str(stop)
+        return page
+
+    def channel_resource(self) -> Dict:
+        return {
+            'id': self.channel_id,
+            'snippet': {'title': 'Fake channel'},
+            'statistics': {'subscriberCount': '1000', 'viewCount': '1000000', 'videoCount': str(self.n_videos)},
+            'contentDetails': {'relatedPlaylists': {'uploads': PLAYLIST_ID}},
+        }
+
+    def respond(self, path: str, params: Dict[str, List[str]]) -> Dict:
+        endpoint = path.rstrip('/').rsplit('/', 1)[-1]
+        if endpoint == 'videos':
+            ids = params.get('id', [''])[0].split(',')
+            return {'kind': 'youtube#videoListResponse', 'items': [self.video_resource(i) for i in ids if i]}
+        if endpoint == 'playlistItems':
+            return self.playlist_page(params.get('pageToken', [''])[0], int(params.get('maxResults', ['5'])[0]))
+        if endpoint == 'channels':
+            return {'kind': 'youtube#channelListResponse', 'items': [self.channel_resource()]}
+        raise KeyError(endpoint)
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with api._lock:
+                    api.request_count += 1
+                time.sleep(api.latency)
+                url = urlparse(self.path)
+                try:
+                    if random.random() < api.error_rate:
+                        raise RuntimeError('rate limited')
+                    body = json.dumps(api.respond(url.path, parse_qs(url.query))).encode()
+                    status = 200
+                except RuntimeError:
+                    body = json.dumps({'error': {'code': 429, 'message': 'Too many requests',
+                                                 'errors': [{'reason': 'rateLimitExceeded'}]}}).encode()
+                    status = 429
+                except KeyError:
+                    body = json.dumps({'error': {'code': 404, 'message': 'Not found'}}).encode()
+                    status = 404
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> 'FakeYouTubeAPI':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,172 @@
+# benchmarks/synthetic.py
+
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+TOPICS = {
+    'pl': ['relacje polsko-niemieckie', 'wojnę w Ukrainie', 'wybory w USA', 'politykę Chin na Tajwanie',
+           'reformę Unii Europejskiej', 'bezpieczeństwo energetyczne', 'sytuację na Bliskim Wschodzie',
+           'rosyjską propagandę', 'przyszłość NATO', 'gospodarkę Turcji', 'kryzys migracyjny',
+           'inflację w strefie euro'],
+    'en': ['Polish-German relations', 'the war in Ukraine', 'the US elections', "China's policy on Taiwan",
+           'the reform of the European Union', 'energy security', 'the Middle East', 'Russian propaganda',
+           'the future of NATO', "Turkey's economy", 'the migration crisis', 'inflation in the eurozone'],
+}
+TITLES = {
+    'pl': ['Co dalej z {topic}?', '{topic} - analiza', 'Dlaczego {topic} ma znaczenie', 'Wszystko o: {topic}',
+           '5 faktów: {topic}'],
+    'en': ['What next for {topic}?', '{topic}, explained', 'Why {topic} matters', 'Everything about {topic}',
+           '5 facts about {topic}'],
+}
+DESCRIPTIONS = {
+    'pl': ['W dzisiejszym odcinku omawiamy {topic}. Sprawdzamy, co mówią eksperci i jakie mogą być skutki '
+           'dla Polski.',
+           'Jak {topic} wpływa na Europę? Przyglądamy się faktom, liczbom i najważniejszym decyzjom ostatnich '
+           'miesięcy.',
+           'Tym razem bierzemy na warsztat {topic}. Zapraszamy do dyskusji w komentarzach!'],
+    'en': ["In today's episode we look at {topic}: what the experts say and what it means for Europe.",
+           'How does {topic} affect the rest of the world? We go through the facts, the numbers and the key decisions.',
+           'This time we take a closer look at {topic}. Let us know what you think in the comments!'],
+}
+# mentions of the configured sponsor, as a keyword or only as a link, and of sponsors that are not configured
+SPONSOR_MENTIONS = {
+    'pl': ['Partnerem odcinka jest XTB. Załóż konto na https://www.xtb.com/pl i inwestuj bez prowizji.',
+           'Materiał powstał we współpracy z XTB - sprawdź ofertę: https://link.xtb.com/polityka',
+           'Sprawdź platformę inwestycyjną: https://www.XTB.com/pl/promo',
+           'Odcinek sponsoruje {brand}. Skorzystaj z kodu POLITYKA, aby otrzymać zniżkę.'],
+    'en': ['This video is sponsored by XTB. Open an account at https://www.xtb.com/en and invest commission-free.',
+           'Thanks to XTB for supporting the channel: https://link.xtb.com/foreign-policy',
+           'Check out the investment platform at xtb.com/int',
+           'Thanks to {brand} for sponsoring this video! Use the code POLICY for a discount.'],
+}
+OTHER_SPONSORS = ['NordVPN', 'Revolut', 'Surfshark', 'Audible', 'Squarespace', 'Ground News']
+FOOTER = {
+    'pl': '\n\n🛑 Polityka Zagraniczna w mediach społecznościowych'
+          '\n⦾ Patronite: https://patronite.pl/politykazagraniczna'
+          '\n⦾ Twitter: https://twitter.com/polzagraniczna\n\n#polityka #geopolityka #{tag}',
+    'en': '\n\nFollow us on social media\n⦾ Patreon: https://patreon.com/foreignpolicy'
+          '\n⦾ Twitter: https://twitter.com/foreignpolicy\n\n#politics #geopolitics #{tag}',
+}
+
+# shares of the videos: Polish titles and descriptions, mentioning XTB, mentioning another sponsor
+POLISH_SHARE = 0.7
+XTB_SHARE = 0.2
+OTHER_SPONSOR_SHARE = 0.1
+# distinct titles, descriptions and durations; rows share these strings, which keeps 10M rows in memory
+POOL_SIZE = 20_000
+
+
+def _text_pools(rng: np.random.Generator) -> tuple:
+    """Return pools of titles and descriptions in Polish and English, with and without sponsor mentions."""
+    sample = pd.read_csv(DATA_DIR / 'video_stats.csv', usecols=['title', 'description']).fillna('')
+    titles, descriptions = list(sample['title']), list(sample['description'])
+    while len(titles) < POOL_SIZE:
+        language = 'pl' if rng.random() < POLISH_SHARE else 'en'
+        topics = TOPICS[language]
+        topic = topics[rng.integers(len(topics))]
+        titles.append(TITLES[language][rng.integers(len(TITLES[language]))].format(topic=topic))
+        parts = [DESCRIPTIONS[language][rng.integers(len(DESCRIPTIONS[language]))].format(topic=topic)]
+        share = rng.random()
+        if share < XTB_SHARE:
+            parts.append(SPONSOR_MENTIONS[language][rng.integers(3)])
+        elif share < XTB_SHARE + OTHER_SPONSOR_SHARE:
+            parts.append(SPONSOR_MENTIONS[language][3].format(brand=OTHER_SPONSORS[rng.integers(len(OTHER_SPONSORS))]))
+        rng.shuffle(parts)
+        descriptions.append(' '.join(parts) + FOOTER[language].format(tag=len(descriptions)))
+    return np.array(titles, dtype=object), np.array(descriptions, dtype=object)
+
+
+def _duration_pool(rng: np.random.Generator) -> np.ndarray:
+    """Return ISO 8601 durations of shorts, regular videos, long streams, premieres (P0D) and multi-day streams."""
+    kinds = rng.choice(['short', 'minutes', 'round', 'hours', 'days', 'empty'], POOL_SIZE,
+                       p=[0.15, 0.6, 0.03, 0.19, 0.01, 0.02])
+    durations = []
+    for kind in kinds:
+        if kind == 'short':
+            durations.append(f'PT{rng.integers(5, 60)}S')
+        elif kind == 'minutes':
+            durations.append(f'PT{rng.integers(1, 60)}M{rng.integers(0, 60)}S')
+        elif kind == 'round':
+            durations.append(f'PT{rng.integers(1, 60)}M')
+        elif kind == 'hours':
+            durations.append(f'PT{rng.integers(1, 12)}H{rng.integers(0, 60)}M{rng.integers(0, 60)}S')
+        elif kind == 'days':
+            durations.append(f'P{rng.integers(1, 3)}DT{rng.integers(0, 24)}H{rng.integers(0, 60)}M')
+        else:
+            durations.append('P0D')
+    return np.array(durations, dtype=object)
+
+
+def _arrow_strings(array) -> pd.Series:
+    import pyarrow as pa
+
+    return pd.Series(pd.arrays.ArrowStringArray(array.cast(pa.string())))
+
+
+def make_raw_videos(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a synthetic video_stats table of n_rows videos.
+
+    Titles and descriptions mix the collected data/video_stats.csv with generated Polish and English texts,
+    about a fifth of which mention XTB (by name or only by link) and a tenth another sponsor. Views follow a
+    heavy-tailed (Pareto) distribution with likes and comments proportional to them, and durations range from
+    shorts to multi-day streams. Video ids and publish dates are Arrow strings and the texts are shared objects,
+    so that 10M rows fit in a few GB.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    rng = np.random.default_rng(seed)
+    titles, descriptions = _text_pools(rng)
+    durations = _duration_pool(rng)
+    # a few texts are reused much more often than others, like series and recurring sponsor reads
+    weights = 1 / np.arange(1, len(titles) + 1) ** 0.8
+    picks = rng.permutation(len(titles))[rng.choice(len(titles), n_rows, p=weights / weights.sum())]
+    published = pa.array(rng.integers(0, 8 * 365 * 86400, n_rows).astype('timedelta64[s]')
+                         + np.datetime64('2017-01-01', 's'))
+    views = np.minimum((rng.pareto(1.1, n_rows) + 1) * 500, 5e8).astype('int64')
+    likes = (views * rng.beta(2, 60, n_rows)).astype('int64')
+    return pd.DataFrame({
+        'video_id': _arrow_strings(pc.binary_join_element_wise(
+            'vid', pc.utf8_lpad(pa.array(np.arange(n_rows)).cast(pa.string()), 8, '0'), '')),
+        'title': titles[picks],
+        'date': _arrow_strings(pc.strftime(published, '%Y-%m-%dT%H:%M:%SZ')),
+        'likes': likes,
+        'dislikes': np.zeros(n_rows, dtype='int64'),
+        'comments': (likes * rng.beta(2, 30, n_rows)).astype('int64'),
+        'views': views,
+        'duration': durations[rng.integers(0, len(durations), n_rows)],
+        'description': descriptions[picks],
+    })
+
+
+def make_channels(n_rows: int, n_channels: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Split a synthetic video_stats table of n_rows videos between n_channels channels of Zipf-distributed sizes,
+    from one large channel to many small ones, keyed by channel id.
+    """
+    videos = make_raw_videos(n_rows, seed)
+    weights = 1 / np.arange(1, n_channels + 1)
+    channels = np.random.default_rng(seed).choice(n_channels, n_rows, p=weights / weights.sum())
+    return {f'UC-synthetic-{k:04d}': videos[channels == k].reset_index(drop=True) for k in range(n_channels)}
+
+
+def make_video_items(videos: pd.DataFrame) -> List[Dict]:
+    """Turn the rows of a synthetic video_stats table into the video resources returned by the YouTube API."""
+    return [
+        {
+            'kind': 'youtube#video',
+            'id': video_id,
+            'snippet': {'title': title, 'publishedAt': date, 'description': description},
+            'contentDetails': {'duration': duration},
+            'statistics': {'viewCount': str(views), 'likeCount': str(likes), 'commentCount': str(comments)},
+        }
+        for video_id, title, date, description, duration, views, likes, comments in zip(
+            videos['video_id'], videos['title'], videos['date'], videos['description'], videos['duration'],
+            videos['views'], videos['likes'], videos['comments'])
+    ]
@@ -2,5 +2,95 @@
 
 YOUTUBE_API_KEY_ENV = 'YouTubeAPI'
 CHANNEL_ID = 'UCHD-eeo8AnqR--UUn52FUTg'
+CHANNEL_IDS = [CHANNEL_ID]
 MAX_RESULTS_PER_PAGE = 50
-CSV_ENCODING = 'utf-8'
\ No newline at end of file
+CSV_ENCODING = 'utf-8'
+STORAGE_FORMAT = 'parquet'  # 'parquet' or 'csv'
+
+# concurrent fetching of video details and channels
+MAX_CONCURRENT_REQUESTS = 8
+MAX_CONCURRENT_CHANNELS = 4
+
+# API request scheduling: quota budget, rate limiting and retries
+DAILY_QUOTA_UNITS = 10000
+QUOTA_USAGE_FILE = 'quota_usage.json'
+DEFAULT_QUOTA_COST = 1
+QUOTA_COSTS = {
+    'youtube.search.list': 100,
+}
+RATE_LIMIT_PER_SECOND = 10
+RATE_LIMIT_BURST = 20
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
+DEDUPE_CACHE_SIZE = 64
+# responses kept for reuse by identical later requests; large video and playlist pages are not kept
+REUSABLE_RESPONSE_METHODS = ('youtube.channels.list',)
+
+# incremental sync
+MANIFEST_FILE = 'video_manifest.json'
+REFRESH_RECENT_DAYS = 30
+
+# on-disk API response cache (--cache); time to live in seconds per endpoint
+RESPONSE_CACHE_FILE = 'response_cache.sqlite'
+RESPONSE_CACHE_MAX_BYTES = 256 * 2 ** 20
+RESPONSE_CACHE_TTLS = {
+    'channels': 6 * 3600,
+    'playlistItems:first': 3600,  # the first page holds the newest uploads
+    # later pages are addressed by their offset, which every new upload shifts: never cached
+    'playlistItems': 0,
+    'videos': 3600,  # statistics keep changing
+}
+
+# chunked processing (data_processing.py --workers): processes and memory budget for the raw chunks in flight
+PROCESSING_WORKERS = None  # None uses every core
+PROCESSING_MAX_MEMORY_MB = 1024
+
+# statistics history appended by every collection run, and the ages in days at which data_processing.py writes
+# each video's views to the video_growth table charted by the dashboard
+HISTORY_DIR = 'video_history'
+HISTORY_AGES_DAYS = [1, 3, 7, 14, 30, 90, 180, 365]
+# longest gap between two observations of a video (or its publication and first observation) over which its views
+# are interpolated; over longer ones, e.g. before the first run that saw an old video, they are unknown
+HISTORY_MAX_GAP_DAYS = 2
+
+# parsed ISO 8601 durations kept in memory; the same values repeat across videos and channels
+DURATION_CACHE_SIZE = 100_000
+
+# duration histograms of the aggregate cube written next to the processed table; longer videos share the last bin
+DURATION_BIN_SECONDS = 60
+DURATION_MAX_BINS = 240
+
+# points per cumulative views line in the dashboard; date ranges with fewer videos are plotted whole
+PLOT_MAX_POINTS = 2000
+
+# columns of the processed table the dashboard reads, and its snapshot of them written by data_processing.py
+DASHBOARD_COLUMNS = ['title', 'date', 'likes', 'comments', 'views', 'duration', 'sponsor', 'cumulative_views',
+                     'cumulative_views_XTB', 'cumulative_views_No_sponsor', 'ID']
+DASHBOARD_SNAPSHOT_FILE = 'dashboard_snapshot.arrow'
+# seconds between two checks of the dashboard's data files; changed files are reloaded without a restart
+DATA_RELOAD_SECONDS = 5
+
+# rows per page of the dashboard's Data tab, and per chunk of its CSV and Parquet exports
+DATA_PAGE_ROWS = 100
+EXPORT_CHUNK_ROWS = 50_000
+
+# sponsors detected in video descriptions: keywords and aliases are matched as written when case_sensitive is set,
+# whole_word keeps short names from matching inside longer words, and URLs (domains) are matched in any case
+SPONSORS = {
+    'XTB': {
+        'keywords': ['XTB'],
+        'aliases': [],
+        'case_sensitive': True,
+        'whole_word': False,
+        'urls': ['xtb.com'],
+    },
+}
+NO_SPONSOR = 'No sponsor'
+SPONSOR_SEPARATOR = ', '  # between the names of videos with several sponsors, e.g. 'XTB, Revolut'
+
+# instrumentation: stage metrics written by the scripts as Prometheus text files, served by the dashboard when its
+# port variable is set, and a sampling profiler writing folded stacks to the path in PROFILE_ENV at exit
+METRICS_DIR = 'logs'
+METRICS_PORT_ENV = 'DASHBOARD_METRICS_PORT'
+PROFILE_ENV = 'PROFILE_SAMPLES'
+PROFILE_INTERVAL_ENV = 'PROFILE_INTERVAL_MS'
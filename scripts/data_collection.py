@@ -1,12 +1,30 @@
+import argparse
+import json
 import logging
 import os
-from typing import List, Dict
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
 
+import httplib2
 import pandas as pd
 from googleapiclient.discovery import build, Resource
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
 
 import config
+from durations import try_parse_duration
+from quota_scheduler import QuotaScheduler, QuotaExceededError
+from response_cache import ResponseCache
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import storage  # noqa: E402
+from utils.helpers import channel_data_dir  # noqa: E402
+from utils.history import HistoryStore, STATISTICS  # noqa: E402
+from utils.instrumentation import metrics, start_profiler_from_env  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,12 +47,59 @@ def build_youtube_service(api_key: str) -> Resource:
     return build('youtube', 'v3', developerKey=api_key)
 
 
+VIDEO_COLUMNS = ['video_id', 'title', 'date', 'likes', 'dislikes', 'comments', 'views', 'duration', 'duration_seconds',
+                 'description']
+
+_thread_local = threading.local()
+scheduler = QuotaScheduler()
+response_cache: Optional[ResponseCache] = None  # set by main() with --cache
+
+
+def _thread_http() -> httplib2.Http:
+    """Return an HTTP client owned by the calling thread, as httplib2 objects are not thread-safe."""
+    if not hasattr(_thread_local, 'http'):
+        _thread_local.http = httplib2.Http()
+    return _thread_local.http
+
+
+def _execute(request: HttpRequest) -> Dict:
+    """
+    Send a request through the scheduler on the calling thread's HTTP client.
+
+    When the response cache is enabled, a fresh cached response is returned without spending any quota.
+    """
+    if response_cache is not None:
+        response = response_cache.get(request.method, request.uri)
+        if response is not None:
+            return response
+    response = scheduler.execute(request, http=_thread_http())
+    if response_cache is not None:
+        response_cache.put(request.method, request.uri, response)
+    return response
+
+
+class ChannelNotFoundError(Exception):
+    """Raised when the API returns no channel for a channel ID, e.g. an unknown or deleted channel."""
+
+
+def get_channel_info(youtube: Resource, channel_id: str) -> Dict:
+    """
+    Retrieve the snippet, statistics and content details of a specified YouTube channel.
+
+    The stats and the uploads playlist ID come from this one request, which the scheduler sends only once.
+    An unknown channel raises ChannelNotFoundError, as the API answers it with no items instead of an error.
+    """
+    request = youtube.channels().list(part='snippet,statistics,contentDetails', id=channel_id)
+    items = _execute(request).get('items')
+    if not items:
+        raise ChannelNotFoundError(f"No channel found with ID {channel_id}.")
+    return items[0]
+
+
 def get_channel_stats(youtube: Resource, channel_id: str) -> Dict[str, any]:
     """Retrieve the title and statistics of a specified YouTube channel."""
     try:
-        request = youtube.channels().list(part='snippet,statistics', id=channel_id)
-        response = request.execute()
-        channel_info = response['items'][0]
+        channel_info = get_channel_info(youtube, channel_id)
         return {
             'title': channel_info['snippet']['title'],
             'subscriberCount': channel_info['statistics']['subscriberCount'],
@@ -49,45 +114,121 @@ def get_channel_stats(youtube: Resource, channel_id: str) -> Dict[str, any]:
 def get_uploads_playlist_id(youtube: Resource, channel_id: str) -> str:
     """Retrieve the uploads playlist ID for a specified YouTube channel."""
     try:
-        request = youtube.channels().list(part='contentDetails', id=channel_id)
-        response = request.execute()
-        uploads_playlist_id = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        channel_info = get_channel_info(youtube, channel_id)
+        uploads_playlist_id = channel_info['contentDetails']['relatedPlaylists']['uploads']
         return uploads_playlist_id
     except HttpError as e:
         logging.error(f"An error occurred while fetching uploads playlist ID: {e}")
         return ""
 
 
-def get_videos_in_playlist(youtube: Resource, playlist_id: str) -> List[Dict]:
-    """Retrieve all videos in a specified YouTube playlist."""
-    videos = []
+def _playlist_video_id(item: Dict) -> str:
+    return item['snippet']['resourceId']['videoId']
+
+
+def iter_playlist_pages(youtube: Resource, playlist_id: str, known_ids: Set[str] = frozenset(),
+                        page_token: Optional[str] = None,
+                        raise_errors: bool = False) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+    """
+    Yield the items of a specified YouTube playlist page by page, with the token of the page that follows.
+
+    Each page is only fetched when it is needed, starting from page_token if given. Paging stops at the first
+    page containing one of known_ids: the uploads playlist is ordered newest first, so passing the IDs collected
+    by earlier runs yields only the videos uploaded since then. A failed page ends the paging, or is raised
+    with raise_errors=True. Videos already yielded are skipped: a first page served from the response cache
+    predates the uploads that pushed some of its videos onto the next page.
+    """
     request = youtube.playlistItems().list(part='snippet', playlistId=playlist_id,
-                                           maxResults=config.MAX_RESULTS_PER_PAGE)
+                                           maxResults=config.MAX_RESULTS_PER_PAGE, pageToken=page_token)
+    yielded = set()
     while request is not None:
         try:
-            response = request.execute()
-            videos += response['items']
-            request = youtube.playlistItems().list_next(request, response)
+            response = _execute(request)
         except HttpError as e:
             logging.error(f"An error occurred while fetching videos in playlist: {e}")
-            break
-    return videos
+            if raise_errors:
+                raise
+            return
+        new_items = [item for item in response['items'] if _playlist_video_id(item) not in known_ids]
+        known = len(new_items) < len(response['items'])
+        new_items = [item for item in new_items if _playlist_video_id(item) not in yielded]
+        yielded.update(map(_playlist_video_id, new_items))
+        if known:
+            yield new_items, None
+            return
+        yield new_items, response.get('nextPageToken')
+        request = youtube.playlistItems().list_next(request, response)
+
+
+@metrics.timed('collection.get_videos_in_playlist', rows=len)
+def get_videos_in_playlist(youtube: Resource, playlist_id: str, known_ids: Set[str] = frozenset()) -> List[Dict]:
+    """Retrieve all videos in a specified YouTube playlist, stopping at the first page with one of known_ids."""
+    return [item for page, _ in iter_playlist_pages(youtube, playlist_id, known_ids) for item in page]
+
+
+def _fetch_video_batch(youtube: Resource, batch_ids: List[str], raise_errors: bool = False) -> List[Dict]:
+    """Retrieve details for one batch of video IDs; the scheduler retries transient errors."""
+    if not batch_ids:
+        return []
+    try:
+        request = youtube.videos().list(part='snippet,contentDetails,statistics', id=','.join(batch_ids))
+        return _execute(request)['items']
+    except (HttpError, OSError) as e:
+        logging.error(f"An error occurred while fetching video details for {len(batch_ids)} videos "
+                      f"({batch_ids[0]}..{batch_ids[-1]}): {e}")
+        if raise_errors:
+            raise
+        return []
+
 
+def _batched(video_ids: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for video_id in video_ids:
+        batch.append(video_id)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
+
+def iter_video_details(youtube: Resource, id_batches: Iterable[List[str]],
+                       max_workers: int = config.MAX_CONCURRENT_REQUESTS,
+                       raise_errors: bool = False) -> Iterator[List[Dict]]:
+    """
+    Yield the details of each batch of video IDs, in the order of id_batches.
+
+    Up to max_workers batches are fetched ahead by a thread pool, so id_batches is consumed lazily and only
+    that many batches of raw responses are held in memory at a time. A batch that fails after its retries
+    yields no details, or is raised with raise_errors=True.
+    """
+    if max_workers <= 1:
+        for batch in id_batches:
+            yield _fetch_video_batch(youtube, batch, raise_errors)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for batch in id_batches:
+            pending.append(executor.submit(_fetch_video_batch, youtube, batch, raise_errors))
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+@metrics.timed('collection.get_video_details', rows=len)
 def get_video_details(youtube: Resource, video_ids: List[str],
-                      max_results_per_page: int = config.MAX_RESULTS_PER_PAGE) -> List[Dict]:
-    """Retrieve details for a list of YouTube video IDs."""
-    details = []
-    for i in range(0, len(video_ids), max_results_per_page):
-        try:
-            request = youtube.videos().list(part='snippet,contentDetails,statistics',
-                                            id=','.join(video_ids[i:i + max_results_per_page]))
-            response = request.execute()
-            details += response['items']
-        except HttpError as e:
-            logging.error(f"An error occurred while fetching video details: {e}")
-            break
-    return details
+                      max_results_per_page: int = config.MAX_RESULTS_PER_PAGE,
+                      max_workers: int = config.MAX_CONCURRENT_REQUESTS) -> List[Dict]:
+    """
+    Retrieve details for a list of YouTube video IDs.
+
+    Batches are fetched by up to max_workers threads; the result keeps the order of video_ids.
+    A batch that still fails after its retries is logged and skipped, the remaining batches are still fetched;
+    running out of quota stops the collection with QuotaExceededError.
+    """
+    batches = _batched(video_ids, max_results_per_page)
+    return [video for details in iter_video_details(youtube, batches, max_workers) for video in details]
 
 
 def get_all_videos_and_details(youtube: Resource, channel_id: str) -> List[Dict]:
@@ -96,52 +237,400 @@ def get_all_videos_and_details(youtube: Resource, channel_id: str) -> List[Dict]
     if not upload_playlist:
         return []
     all_videos = get_videos_in_playlist(youtube, upload_playlist)
-    video_ids = [video['snippet']['resourceId']['videoId'] for video in all_videos]
+    video_ids = [_playlist_video_id(video) for video in all_videos]
     video_details = get_video_details(youtube, video_ids)
     return video_details
 
 
-def save_data_to_csv(channel_stats: Dict[str, any], video_details: List[Dict], base_dir: str,
-                     encoding: str = config.CSV_ENCODING) -> None:
-    """Save channel statistics and video details to CSV files."""
-    channel_info = pd.DataFrame([channel_stats], columns=['title', 'subscriberCount', 'viewCount', 'videoCount'])
-    video_data = [
+def get_changed_videos_and_details(youtube: Resource, channel_id: str, manifest: Dict[str, Dict],
+                                   recent_days: int = config.REFRESH_RECENT_DAYS) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Retrieve details of the videos uploaded since the last run and of the recent videos whose details changed.
+
+    Videos published within the last recent_days are re-fetched, as their statistics still move; a re-fetched
+    video is only part of the changed ones when its ETag differs from the one recorded in the manifest.
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: The new and changed videos, and every fetched video, changed or not.
+    """
+    upload_playlist = get_uploads_playlist_id(youtube, channel_id)
+    if not upload_playlist:
+        return [], []
+    new_videos = get_videos_in_playlist(youtube, upload_playlist, known_ids=set(manifest))
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=recent_days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    recent_ids = [video_id for video_id, entry in manifest.items() if entry['publishedAt'] >= cutoff]
+    video_details = get_video_details(youtube, [_playlist_video_id(video) for video in new_videos] + recent_ids)
+    logging.info(f"Incremental sync: {len(new_videos)} new videos, {len(recent_ids)} recent videos refreshed")
+    changed = [video for video in video_details if manifest.get(video['id'], {}).get('etag') != video['etag']]
+    return changed, video_details
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Dict]:
+    """Load the manifest of known videos (video ID -> publishedAt, etag, fetchedAt); empty if there is none yet."""
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, encoding=config.CSV_ENCODING) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict[str, Dict], manifest_path: str) -> None:
+    """Write the manifest atomically, so an interrupted run never leaves a truncated file behind."""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding=config.CSV_ENCODING) as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def update_manifest(manifest: Dict[str, Dict], video_details: List[Dict]) -> Dict[str, Dict]:
+    """Record the publish date and ETag of freshly fetched videos in the manifest."""
+    fetched_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    for video in video_details:
+        manifest[video['id']] = {
+            'publishedAt': video['snippet']['publishedAt'],
+            'etag': video['etag'],
+            'fetchedAt': fetched_at
+        }
+    return manifest
+
+
+def video_statistics(video_details: List[Dict]) -> pd.DataFrame:
+    """Return the video_id, views, likes and comments of video resources."""
+    return pd.DataFrame([
         {
-            'title': video['snippet']['title'],
-            'date': video['snippet']['publishedAt'],
+            'video_id': video['id'],
+            'views': int(video['statistics'].get('viewCount', 0)),
             'likes': int(video['statistics'].get('likeCount', 0)),
-            'dislikes': int(video['statistics'].get('dislikeCount', 0)),  # Dislikes may not be available
             'comments': int(video['statistics'].get('commentCount', 0)),
-            'views': int(video['statistics'].get('viewCount', 0)),
-            'duration': video['contentDetails']['duration'],
-            'description': video['snippet']['description']
         }
         for video in video_details
-    ]
-    video_df = pd.DataFrame(video_data)
+    ], columns=['video_id', *STATISTICS])
+
+
+def flatten_video(video: Dict) -> Dict:
+    """Flatten a video resource into a row of video_stats.csv."""
+    return {
+        'video_id': video['id'],
+        'title': video['snippet']['title'],
+        'date': video['snippet']['publishedAt'],
+        'likes': int(video['statistics'].get('likeCount', 0)),
+        'dislikes': int(video['statistics'].get('dislikeCount', 0)),  # Dislikes may not be available
+        'comments': int(video['statistics'].get('commentCount', 0)),
+        'views': int(video['statistics'].get('viewCount', 0)),
+        'duration': video['contentDetails']['duration'],
+        'duration_seconds': try_parse_duration(video['contentDetails'].get('duration')),
+        'description': video['snippet']['description']
+    }
+
+
+class PartialCsvWriter:
+    """
+    Append rows batch by batch to <path>.partial and publish it as <path> once the collection is complete.
+
+    After every batch a line is appended to the checkpoint journal <path>.partial.checkpoint with the batch's
+    video IDs, the rows and bytes written so far and the token of the next playlist page. A run that is
+    interrupted therefore leaves a valid partial file, which a resumed run cuts back to its last complete
+    batch and continues from the recorded page.
+    """
+
+    def __init__(self, path: str, columns: List[str] = VIDEO_COLUMNS, encoding: str = config.CSV_ENCODING):
+        self.path = path
+        self.partial_path = path + '.partial'
+        self.checkpoint_path = self.partial_path + '.checkpoint'
+        self.columns = columns
+        self.encoding = encoding
+        self.rows_written = 0
+
+    def _read_checkpoints(self) -> List[Dict]:
+        checkpoints = []
+        with open(self.checkpoint_path, encoding=self.encoding) as f:
+            for line in f:
+                try:
+                    checkpoints.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # the run was interrupted while writing this line
+        return checkpoints
+
+    def resume(self, playlist_id: str) -> Optional[Dict]:
+        """
+        Cut the partial file back to its last complete batch and return the last checkpoint of playlist_id,
+        extended with the publish dates of the videos already written ('written'); None without a checkpoint.
+        """
+        if not (os.path.exists(self.partial_path) and os.path.exists(self.checkpoint_path)):
+            self.discard()
+            return None
+        checkpoints = self._read_checkpoints()
+        if not checkpoints or checkpoints[-1]['playlist_id'] != playlist_id:
+            self.discard()
+            return None
+        last = checkpoints[-1]
+        with open(self.partial_path, 'r+b') as f:
+            f.truncate(last['size'])
+        with open(self.checkpoint_path, 'w', encoding=self.encoding) as f:
+            f.writelines(json.dumps(checkpoint) + '\n' for checkpoint in checkpoints)
+        written = pd.read_csv(self.partial_path, usecols=['video_id', 'date'], encoding=self.encoding)
+        self.rows_written = last['rows']
+        logging.info(f"Resuming {self.partial_path} after {len(checkpoints)} batches and {self.rows_written} videos")
+        return dict(last, written=dict(zip(written['video_id'], written['date'])))
+
+    def discard(self) -> None:
+        """Remove the partial file and checkpoints of an earlier run."""
+        for path in (self.partial_path, self.checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.rows_written = 0
+
+    def append(self, rows: List[Dict], playlist_id: Optional[str] = None, batch_ids: Iterable[str] = (),
+               next_page_token: Optional[str] = None) -> None:
+        """Append one batch of rows, flush it to disk and record the checkpoint reached after it."""
+        is_new = not os.path.exists(self.partial_path) or os.path.getsize(self.partial_path) == 0
+        data = pd.DataFrame(rows, columns=self.columns).to_csv(index=False, header=is_new)
+        with open(self.partial_path, 'ab') as f:
+            f.write(data.encode(self.encoding))
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        self.rows_written += len(rows)
+        checkpoint = {'playlist_id': playlist_id, 'batch': list(batch_ids), 'rows': self.rows_written,
+                      'size': size, 'next_page_token': next_page_token}
+        with open(self.checkpoint_path, 'a', encoding=self.encoding) as f:
+            f.write(json.dumps(checkpoint) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def commit(self) -> None:
+        """Publish the complete partial file under its final path."""
+        if not os.path.exists(self.partial_path):
+            self.append([])
+        os.replace(self.partial_path, self.path)
+        os.remove(self.checkpoint_path)
+
+
+@metrics.timed('collection.stream_all_videos', rows=lambda fetched: fetched)
+def stream_all_videos(youtube: Resource, channel_id: str, writer: PartialCsvWriter,
+                      manifest: Dict[str, Dict], resume: bool = False) -> int:
+    """
+    Stream every video of a channel from playlist pages through detail batches into the writer.
+
+    Each playlist page is one batch of video details, and only a bounded number of them is in memory at a
+    time, whatever the size of the channel. With resume=True a crawl interrupted by an error, exhausted quota
+    or a killed process continues from the writer's last checkpoint; otherwise any earlier partial file is
+    discarded. A batch that fails after its retries stops the crawl, so that resuming fetches it again.
+    Returns the number of videos fetched.
+    """
+    upload_playlist = get_uploads_playlist_id(youtube, channel_id)
+    if not upload_playlist:
+        return 0
+    checkpoint = writer.resume(upload_playlist) if resume else None
+    if checkpoint is None:
+        writer.discard()
+        checkpoint = {'written': {}, 'next_page_token': None, 'batch': None}
+    written = checkpoint['written']
+    for video_id, published_at in written.items():
+        manifest[video_id] = {'publishedAt': published_at, 'etag': None, 'fetchedAt': None}
+    if checkpoint['batch'] is not None and checkpoint['next_page_token'] is None:
+        return 0  # every page was written before the interruption
+
+    pending_pages = deque()
+
+    def id_batches() -> Iterator[List[str]]:
+        pages = iter_playlist_pages(youtube, upload_playlist, page_token=checkpoint['next_page_token'],
+                                    raise_errors=True)
+        for items, next_page_token in pages:
+            batch_ids = [video_id for video_id in map(_playlist_video_id, items) if video_id not in written]
+            pending_pages.append((batch_ids, next_page_token))
+            yield batch_ids
+
+    fetched = 0
+    for details in iter_video_details(youtube, id_batches(), raise_errors=True):
+        batch_ids, next_page_token = pending_pages.popleft()
+        writer.append([flatten_video(video) for video in details], upload_playlist, batch_ids, next_page_token)
+        update_manifest(manifest, details)
+        fetched += len(details)
+    return fetched
+
+
+def has_video_ids(video_stats_path: str) -> bool:
+    """Tell whether an existing video_stats table can be merged into, i.e. it has a video_id column."""
+    if not os.path.exists(video_stats_path):
+        return False
+    return 'video_id' in storage.read_columns(video_stats_path)
+
+
+def save_channel_stats(channel_stats: Dict[str, any], channel_dir: str,
+                       storage_format: str = config.STORAGE_FORMAT) -> None:
+    """Save channel statistics to the channel_stats table of the channel's data partition."""
+    channel_info = pd.DataFrame([channel_stats], columns=['title', 'subscriberCount', 'viewCount', 'videoCount'])
+    os.makedirs(channel_dir, exist_ok=True)
+    storage.write_table(channel_info, storage.data_path(channel_dir, 'channel_stats', storage_format),
+                        storage.CHANNEL_SCHEMA, encoding=config.CSV_ENCODING)
+
+
+def save_delta(video_df: pd.DataFrame, channel_dir: str, storage_format: str = config.STORAGE_FORMAT) -> None:
+    """
+    Add new and updated video rows to the channel's video_stats_delta table, which data_processing.py merges
+    into video_stats; rows of videos already waiting there are replaced.
+    """
+    video_df = video_df.assign(date=pd.to_datetime(video_df['date'], utc=True))
+    delta_path = storage.find_data_path(channel_dir, 'video_stats_delta', storage_format)
+    if os.path.exists(delta_path):
+        pending_df = storage.read_table(delta_path, schema=storage.RAW_VIDEO_SCHEMA, encoding=config.CSV_ENCODING)
+        pending_df = pending_df[~pending_df['video_id'].isin(video_df['video_id'])]
+        video_df = pd.concat([pending_df.assign(date=pd.to_datetime(pending_df['date'], utc=True)), video_df])
+        os.remove(delta_path)
+    storage.write_table(video_df, storage.data_path(channel_dir, 'video_stats_delta', storage_format),
+                        storage.RAW_VIDEO_SCHEMA, encoding=config.CSV_ENCODING)
+
+
+def discard_delta(channel_dir: str) -> None:
+    """Remove the channel's video_stats_delta table, which a full collection makes obsolete."""
+    for fmt in storage.EXTENSIONS:
+        delta_path = storage.data_path(channel_dir, 'video_stats_delta', fmt)
+        if os.path.exists(delta_path):
+            os.remove(delta_path)
+
+
+@metrics.timed('collection.save_data_to_csv', rows='video_details')
+def save_data_to_csv(channel_stats: Dict[str, any], video_details: List[Dict], channel_dir: str,
+                     storage_format: str = config.STORAGE_FORMAT, merge: bool = False) -> None:
+    """
+    Save channel statistics and video details to the channel's data partition, as CSV or Parquet files.
+
+    With merge=True the video rows are only added to the video_stats_delta table, and data_processing.py merges
+    them by video_id into the video_stats table; a nightly refresh thus writes a few rows instead of the whole
+    table with its descriptions.
+    """
+    save_channel_stats(channel_stats, channel_dir, storage_format)
+    with metrics.stage('collection.flatten_videos', rows=len(video_details)):
+        video_df = pd.DataFrame([flatten_video(video) for video in video_details], columns=VIDEO_COLUMNS)
+    video_stats_path = storage.data_path(channel_dir, 'video_stats', storage_format)
+
+    if merge:
+        if not video_df.empty:
+            save_delta(video_df, channel_dir, storage_format)
+        return
+    storage.write_table(video_df, video_stats_path, storage.RAW_VIDEO_SCHEMA, encoding=config.CSV_ENCODING)
+
+
+@metrics.timed('collection.record_history', rows=lambda written: written)
+def record_history(video_df: pd.DataFrame, channel_dir: str, fetched_at: datetime) -> int:
+    """
+    Append the statistics of the fetched videos to the channel's history, which keeps what video_stats overwrites.
+
+    Args:
+        video_df (pd.DataFrame): video_id, views, likes and comments of the videos fetched by this run.
+        channel_dir (str): Data partition of the channel.
+        fetched_at (datetime): Start of the run.
 
-    channel_info_path = os.path.join(base_dir, 'data', 'channel_stats.csv')
-    video_stats_path = os.path.join(base_dir, 'data', 'video_stats.csv')
+    Returns:
+        int: Number of videos that are new or whose statistics changed since the last run.
+    """
+    return HistoryStore(os.path.join(channel_dir, config.HISTORY_DIR)).append(video_df, fetched_at)
 
-    channel_info.to_csv(channel_info_path, index=False, encoding=encoding)
-    video_df.to_csv(video_stats_path, index=False, encoding=encoding)
+
+@metrics.timed('collection.collect_channel')
+def collect_channel(youtube: Resource, channel_id: str, data_dir: str, incremental: bool = False,
+                    resume: bool = False, storage_format: str = config.STORAGE_FORMAT) -> Dict[str, any]:
+    """
+    Collect one channel into its own data partition and return its channel statistics.
+
+    With resume=True a full collection that was interrupted continues from its last checkpoint. Videos are
+    staged in an appendable CSV file and converted to Parquet at the end if that is the storage format.
+    """
+    channel_dir = channel_data_dir(data_dir, channel_id)
+    manifest_path = os.path.join(channel_dir, config.MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+    merge = incremental and bool(manifest) and has_video_ids(
+        storage.find_data_path(channel_dir, 'video_stats', storage_format))
+    if incremental and not merge:
+        logging.info(f"No manifest or mergeable video_stats table found for {channel_id}, running a full collection.")
+
+    fetched_at = datetime.now(timezone.utc)
+    channel_stats = get_channel_stats(youtube, channel_id)
+    if merge:
+        video_details, fetched_videos = get_changed_videos_and_details(youtube, channel_id, manifest)
+        save_data_to_csv(channel_stats, video_details, channel_dir, storage_format, merge=True)
+        # unchanged videos were seen as well, which keeps their values valid up to this run
+        record_history(video_statistics(fetched_videos), channel_dir, fetched_at)
+        save_manifest(update_manifest(manifest, video_details), manifest_path)
+        fetched = len(video_details)
+    else:
+        save_channel_stats(channel_stats, channel_dir, storage_format)
+        discard_delta(channel_dir)
+        csv_path = storage.data_path(channel_dir, 'video_stats', 'csv')
+        writer = PartialCsvWriter(csv_path)
+        manifest = {}
+        fetched = stream_all_videos(youtube, channel_id, writer, manifest, resume)
+        writer.commit()
+        if storage_format != 'csv':
+            storage.convert_csv_to_parquet(csv_path, storage.data_path(channel_dir, 'video_stats', storage_format),
+                                           storage.RAW_VIDEO_SCHEMA)
+            os.remove(csv_path)
+        record_history(storage.read_table(storage.data_path(channel_dir, 'video_stats', storage_format),
+                                          columns=['video_id', *STATISTICS], schema=storage.RAW_VIDEO_SCHEMA,
+                                          encoding=config.CSV_ENCODING),
+                       channel_dir, fetched_at)
+        save_manifest(manifest, manifest_path)
+    logging.info(f"Collected {fetched} videos of channel {channel_id}")
+    return channel_stats
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Collect channel and video statistics from the YouTube Data API.")
+    parser.add_argument('--channels', nargs='+', default=config.CHANNEL_IDS, metavar='CHANNEL_ID',
+                        help="channel IDs to collect, each into data/channel=<id>/")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only fetch videos that are new or changed since the last run")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue interrupted collections from their checkpoints instead of starting over")
+    parser.add_argument('--cache', action='store_true',
+                        help="reuse API responses from the on-disk response cache while they are fresh")
+    parser.add_argument('--clear-cache', nargs='?', const='all', metavar='ENDPOINT',
+                        help="invalidate the cached responses of one endpoint (channels, playlistItems, videos) "
+                             "or of all of them before collecting")
+    args = parser.parse_args()
+    start_profiler_from_env(config.PROFILE_ENV, config.PROFILE_INTERVAL_ENV)
+
     api_key = load_api_key()
     youtube = build_youtube_service(api_key)
-    channel_id = config.CHANNEL_ID
-
-    channel_stats = get_channel_stats(youtube, channel_id)
-    video_details = get_all_videos_and_details(youtube, channel_id)
 
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    save_data_to_csv(channel_stats, video_details, base_dir)
+    data_dir = os.path.join(base_dir, 'data')
+    scheduler.load_usage(os.path.join(data_dir, config.QUOTA_USAGE_FILE))
+
+    global response_cache
+    if args.cache or args.clear_cache:
+        response_cache = ResponseCache(os.path.join(data_dir, config.RESPONSE_CACHE_FILE))
+        if args.clear_cache:
+            removed = response_cache.invalidate(None if args.clear_cache == 'all' else args.clear_cache)
+            logging.info(f"Removed {removed} cached responses")
+        if not args.cache:
+            response_cache.close()
+            response_cache = None
+
+    def collect(channel_id: str) -> Optional[Dict[str, any]]:
+        try:
+            return collect_channel(youtube, channel_id, data_dir, args.incremental, args.resume)
+        except ChannelNotFoundError as e:
+            logging.error(f"Collection of channel {channel_id} skipped: {e}")
+            return None
+        except (QuotaExceededError, HttpError, OSError) as e:
+            logging.error(f"Collection of channel {channel_id} stopped, rerun with --resume to continue: {e}")
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(config.MAX_CONCURRENT_CHANNELS, len(args.channels))) as executor:
+            channel_stats = list(executor.map(collect, args.channels))
+    finally:
+        scheduler.save_usage()
+        logging.info(scheduler.summary())
+        if response_cache is not None:
+            logging.info(response_cache.summary())
+            response_cache.close()
+        metrics.write_prometheus(os.path.join(config.METRICS_DIR, 'data_collection.prom'))
 
     print("Channel Stats DataFrame")
-    print(pd.read_csv(os.path.join(base_dir, 'data', 'channel_stats.csv'), encoding=config.CSV_ENCODING))
-    print("Video Details DataFrame")
-    print(pd.read_csv(os.path.join(base_dir, 'data', 'video_stats.csv'), encoding=config.CSV_ENCODING))
+    print(pd.DataFrame([dict(stats, channel_id=channel_id) for channel_id, stats in zip(args.channels, channel_stats)
+                        if stats]))
 
 
 if __name__ == "__main__":
@@ -1,10 +1,23 @@
+import argparse
 import logging
 import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
 
-import isodate
 import pandas as pd
 
 import config
+from durations import parse_durations
+from sponsors import SponsorMatcher, has_sponsor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import storage  # noqa: E402
+from utils.aggregates import build_aggregate_cube  # noqa: E402
+from utils.helpers import TITLE_ID_PREFIX, channel_data_dir, compact_videos, list_channel_partitions  # noqa: E402
+from utils.history import HistoryStore, growth_table  # noqa: E402
+from utils.instrumentation import metrics, start_profiler_from_env  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +28,9 @@ logging.basicConfig(
     ]
 )
 
+# compiled once from config.SPONSORS and shared by every processed channel
+sponsor_matcher = SponsorMatcher()
+
 
 def check_read_permissions(file_path: str) -> None:
     if not os.access(file_path, os.R_OK):
@@ -27,15 +43,18 @@ def check_write_permissions(file_path: str) -> None:
         raise PermissionError(f"Write permission denied for directory {dir_name}")
 
 
-def load_data(file_path: str, encoding: str = config.CSV_ENCODING) -> pd.DataFrame:
+def load_data(file_path: str, encoding: str = config.CSV_ENCODING, columns: Optional[List[str]] = None,
+              schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
     """
-    Load data from a CSV file into a DataFrame.
+    Load data from a CSV or Parquet file into a DataFrame.
 
     Args:
-        file_path (str): Path to the CSV file (can be a file name or an absolute path).
+        file_path (str): Path to the .csv or .parquet file (can be a file name or an absolute path).
+        columns (Optional[List[str]]): Columns to load (default: all of them).
+        schema (Optional[Dict[str, str]]): Column types of the table, see utils.storage.
 
     Returns:
-        pd.DataFrame: DataFrame containing the data from the CSV file.
+        pd.DataFrame: DataFrame containing the data from the file.
     """
     if not os.path.exists(file_path):
         logging.error(f"The file {file_path} does not exist.")
@@ -44,19 +63,21 @@ def load_data(file_path: str, encoding: str = config.CSV_ENCODING) -> pd.DataFra
     check_read_permissions(file_path)
 
     try:
-        return pd.read_csv(file_path, encoding=encoding)
-    except pd.errors.ParserError as e:
+        return storage.read_table(file_path, columns=columns, schema=schema, encoding=encoding)
+    except (pd.errors.ParserError, ValueError) as e:
         logging.error(f"Error parsing the file {file_path}: {e}")
         raise ValueError(f"Error parsing the file {file_path}: {e}")
 
 
-def save_data(df: pd.DataFrame, file_path: str, encoding: str = config.CSV_ENCODING) -> None:
+def save_data(df: pd.DataFrame, file_path: str, encoding: str = config.CSV_ENCODING,
+              schema: Optional[Dict[str, str]] = None) -> None:
     """
-    Save DataFrame to a CSV file.
+    Save DataFrame to a CSV or Parquet file.
 
     Args:
         df (pd.DataFrame): DataFrame to be saved.
-        file_path (str): Path to the CSV file (can be a file name or an absolute path).
+        file_path (str): Path to the .csv or .parquet file (can be a file name or an absolute path).
+        schema (Optional[Dict[str, str]]): Column types of the table, see utils.storage.
     """
     dir_name = os.path.dirname(file_path)
     if not os.path.exists(dir_name):
@@ -64,68 +85,388 @@ def save_data(df: pd.DataFrame, file_path: str, encoding: str = config.CSV_ENCOD
     check_write_permissions(file_path)
 
     try:
-        df.to_csv(file_path, index=False, encoding=encoding)
+        storage.write_table(df, file_path, schema=schema, encoding=encoding)
     except IOError as e:
         logging.error(f"Error writing the file {file_path}: {e}")
         raise IOError(f"Error writing the file {file_path}: {e}")
 
 
-def process_data(df: pd.DataFrame) -> pd.DataFrame:
+RUNNING_COLUMNS = ['cumulative_views', 'cumulative_views_XTB', 'cumulative_views_No_sponsor', 'ID']
+
+
+@metrics.timed('process.process_rows', rows=len)
+def process_rows(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Process data to clean and add necessary columns.
+    Clean raw video rows and derive the columns that depend on each row only (sponsor, date, duration).
 
     Args:
-        df (pd.DataFrame): DataFrame containing statistics.
+        df (pd.DataFrame): Raw video statistics.
 
     Returns:
-        pd.DataFrame: Processed DataFrame with additional columns and cleaned data.
+        pd.DataFrame: Cleaned rows, in their original order.
     """
     # drop unnecessary columns
     df = df.drop(columns=['dislikes'])
-    # fill missing values in description to add sponsor column
-    df['description'] = df['description'].fillna('')
-    df['sponsor'] = df['description'].apply(lambda x: 'XTB' if 'XTB' in x else 'No sponsor')
+    # detect the sponsors of each video from its description
+    with metrics.stage('process.sponsors', rows=len(df)):
+        df['sponsor'] = sponsor_matcher.classify(df['description'])
     # drop description column after processing
     df = df.drop(columns=['description'])
     # convert date to datetime and extract date only
-    df['date'] = pd.to_datetime(df['date']).dt.date
-    # convert duration from ISO8601 to seconds
-    df['duration'] = df['duration'].apply(lambda x: isodate.parse_duration(x).total_seconds())
-    # create cumulative views column
-    df = df.sort_values(by='date')
-    df['cumulative_views'] = df['views'].cumsum()
-    df['cumulative_views_XTB'] = df.apply(lambda row: row['views'] if row['sponsor'] == 'XTB' else 0, axis=1).cumsum()
-    df['cumulative_views_No_sponsor'] = df.apply(lambda row: row['views'] if row['sponsor'] == 'No sponsor' else 0,
-                                                 axis=1).cumsum()
-
-    # fill the cumulative columns to ensure they do not reset to zero
-    df['cumulative_views_XTB'] = df['cumulative_views_XTB'].replace(0, pd.NA).ffill().fillna(0).infer_objects(
-        copy=False)
-    df['cumulative_views_No_sponsor'] = df['cumulative_views_No_sponsor'].replace(0, pd.NA).ffill().fillna(
-        0).infer_objects(copy=False)
+    with metrics.stage('process.dates', rows=len(df)):
+        df['date'] = pd.to_datetime(df['date']).dt.date
+    # convert duration from ISO8601 to seconds, unless the collector already stored the seconds
+    with metrics.stage('process.durations') as stage:
+        if 'duration_seconds' in df.columns:
+            seconds = df.pop('duration_seconds').astype('float64')
+            missing = seconds.isna()
+            if missing.any():
+                seconds[missing] = parse_durations(df.loc[missing, 'duration'])
+            df['duration'] = seconds
+            stage.rows = int(missing.sum())
+        else:
+            df['duration'] = parse_durations(df['duration'])
+            stage.rows = len(df)
+    return df
+
+
+def add_cumulative_views(df: pd.DataFrame, totals: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """
+    Add the cumulative views columns, overall and per sponsor, to rows sorted by date.
+
+    Args:
+        df (pd.DataFrame): Cleaned rows sorted by date.
+        totals (Optional[Dict[str, int]]): Running totals of the rows preceding df, see running_totals.
+
+    Returns:
+        pd.DataFrame: Rows with the cumulative views columns.
+    """
+    totals = totals or {}
+    # views are never negative, so the sponsor totals never fall back to zero
+    df['cumulative_views'] = totals.get('cumulative_views', 0) + df['views'].cumsum()
+    df['cumulative_views_XTB'] = totals.get('cumulative_views_XTB', 0) + df['views'].where(
+        has_sponsor(df['sponsor'], 'XTB'), 0).cumsum()
+    df['cumulative_views_No_sponsor'] = totals.get('cumulative_views_No_sponsor', 0) + df['views'].where(
+        has_sponsor(df['sponsor'], config.NO_SPONSOR), 0).cumsum()
+    return df
+
+
+@metrics.timed('process.add_running_columns', rows=len)
+def add_running_columns(df: pd.DataFrame, totals: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """
+    Add the cumulative views columns, the ID column and the ID prefix of titles to rows sorted by date.
+
+    Args:
+        df (pd.DataFrame): Cleaned rows sorted by date.
+        totals (Optional[Dict[str, int]]): Running totals of the rows preceding df, see running_totals.
+
+    Returns:
+        pd.DataFrame: Rows with the running columns.
+    """
+    totals = totals or {}
+    df = add_cumulative_views(df, totals)
 
     # add and ID column
-    df['ID'] = range(1, len(df) + 1)
+    first_id = totals.get('ID', 0) + 1
+    df['ID'] = range(first_id, first_id + len(df))
     # add ID to title
     df['title'] = df['ID'].astype(str) + '. ' + df['title']
     return df
 
 
-if __name__ == "__main__":
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    video_stats_path = os.path.join(base_dir, 'data', 'video_stats.csv')
+def running_totals(processed: pd.DataFrame) -> Dict[str, int]:
+    """
+    Return the running totals (cumulative views overall and per sponsor, last ID) at the end of a processed table.
 
-    try:
-        video_info = load_data(video_stats_path)
-        video_info = process_data(video_info)
-    except Exception as e:
-        logging.error(f"An error occurred while loading or processing data: {e}")
-        exit(1)
+    Args:
+        processed (pd.DataFrame): Processed rows sorted by date.
 
-    processed_video_stats_path = os.path.join(base_dir, 'data', 'processed_video_stats.csv')
+    Returns:
+        Dict[str, int]: Last value of each running column, 0 for an empty table.
+    """
+    if processed.empty:
+        return {name: 0 for name in RUNNING_COLUMNS}
+    return {name: int(processed[name].iloc[-1]) for name in RUNNING_COLUMNS}
 
-    try:
-        save_data(video_info, processed_video_stats_path)
-    except Exception as e:
-        logging.error(f"An error occurred while saving data: {e}")
+
+def process_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Process data to clean and add necessary columns.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing statistics.
+
+    Returns:
+        pd.DataFrame: Processed DataFrame with additional columns and cleaned data.
+    """
+    df = process_rows(df)
+    with metrics.stage('process.sort', rows=len(df)):
+        df = df.sort_values(by='date')
+    return add_running_columns(df)
+
+
+def chunk_rows(file_path: str, workers: int, max_memory_mb: float, sample_rows: int = 1000) -> int:
+    """
+    Return the number of rows per chunk that keeps the raw chunks in flight within a memory budget.
+
+    Up to 2 * workers + 1 chunks are alive at once: one being read, and a pickled copy of each submitted
+    chunk in the parent and in its worker process. Their size is estimated from the first rows of the table.
+
+    Args:
+        file_path (str): Path of the raw table.
+        workers (int): Number of worker processes.
+        max_memory_mb (float): Memory budget of the raw chunks in MB.
+
+    Returns:
+        int: Rows per chunk, at least 1000.
+    """
+    sample = next(storage.iter_table_batches(file_path, sample_rows, schema=storage.RAW_VIDEO_SCHEMA,
+                                             encoding=config.CSV_ENCODING), None)
+    if sample is None or sample.empty:
+        return sample_rows
+    row_bytes = sample.memory_usage(deep=True).sum() / len(sample)
+    return max(int(max_memory_mb * 2 ** 20 / ((2 * workers + 1) * row_bytes)), 1000)
+
+
+def process_chunked(file_path: str, workers: Optional[int] = config.PROCESSING_WORKERS,
+                    max_memory_mb: float = config.PROCESSING_MAX_MEMORY_MB) -> pd.DataFrame:
+    """
+    Process a raw table in bounded chunks: the per-row stages run on a pool of processes, then the sorting,
+    cumulative sums and IDs are computed once on the combined rows, as in process_data.
+
+    Only the processed rows are kept, without descriptions, so the raw table never has to fit in memory.
+
+    Args:
+        file_path (str): Path of the raw .csv or .parquet table.
+        workers (Optional[int]): Number of worker processes (default: config.PROCESSING_WORKERS).
+        max_memory_mb (float): Memory budget of the raw chunks being read and processed, in MB.
+
+    Returns:
+        pd.DataFrame: Processed DataFrame, equal to the one process_data returns for the whole table.
+    """
+    workers = workers or config.PROCESSING_WORKERS or os.cpu_count() or 1
+    rows = chunk_rows(file_path, workers, max_memory_mb)
+    logging.info(f"Processing {file_path} in chunks of {rows} rows on {workers} processes.")
+    chunks = storage.iter_table_batches(file_path, rows, schema=storage.RAW_VIDEO_SCHEMA, encoding=config.CSV_ENCODING)
+    processed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # bounded look-ahead: a chunk is only read once one of the workers' chunks is done
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(process_rows, chunk))
+            if len(pending) >= workers:
+                processed.append(pending.popleft().result())
+        while pending:
+            processed.append(pending.popleft().result())
+    if not processed:
+        return process_data(load_data(file_path, schema=storage.RAW_VIDEO_SCHEMA))
+
+    df = pd.concat(processed, ignore_index=True)
+    df['sponsor'] = df['sponsor'].astype('category')
+    with metrics.stage('process.sort', rows=len(df)):
+        df = df.sort_values(by='date')
+    return add_running_columns(df)
+
+
+def process_incremental(processed: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """
+    Update a processed table with new and updated videos, recomputing only the rows from the earliest changed date.
+
+    Known videos keep their position and ID: updated ones are replaced where they are, unless their publication
+    date changed. New videos are placed after the known ones of their day and get the next free IDs, so IDs stay
+    stable across runs even when a new video is dated before known ones. Rows before the earliest changed date
+    keep their values; the running totals at the end of them carry the cumulative views on into the recomputed rows.
+
+    Args:
+        processed (pd.DataFrame): Processed table sorted by date, as written by process_data.
+        delta (pd.DataFrame): Raw statistics of the new and updated videos.
+
+    Returns:
+        pd.DataFrame: Updated processed table.
+    """
+    changed = process_rows(delta.drop_duplicates(subset='video_id', keep='last'))
+    if changed.empty:
+        return processed
+    if not processed.empty and isinstance(processed['date'].iloc[0], str):
+        processed = processed.assign(date=pd.to_datetime(processed['date']).dt.date)
+
+    changed = changed.set_index('video_id', drop=False)
+    known = processed['video_id'].isin(changed.index)
+    old_dates = processed.loc[known, 'date']
+    start_date = min(changed['date'].min(), old_dates.min()) if known.any() else changed['date'].min()
+    head = processed[processed['date'] < start_date]
+    tail = processed[processed['date'] >= start_date].drop(columns=RUNNING_COLUMNS[:-1])
+    # drop the ID prefix added by add_running_columns, it is added again below
+    tail['title'] = tail['title'].str.replace(TITLE_ID_PREFIX, '', n=1, regex=True)
+
+    # updated videos are replaced in place; those whose date changed move, with their ID, like new videos
+    updated = tail['video_id'].isin(changed.index).to_numpy()
+    updates = changed.loc[tail.loc[updated, 'video_id'], tail.columns.drop('ID')]
+    moved = updated.copy()
+    moved[updated] = (updates['date'].to_numpy() != tail.loc[updated, 'date'].to_numpy())
+    in_place = updated & ~moved
+    tail['sponsor'] = tail['sponsor'].astype(object)
+    for name in updates.columns:
+        tail.loc[in_place, name] = updates.loc[~moved[updated], name].to_numpy()
+    added = changed[~changed.index.isin(processed.loc[known, 'video_id'])][tail.columns.drop('ID')]
+    # the delta follows the uploads playlist, newest first; IDs are given in date order, as process_data does
+    added = added.sort_values(by='date', kind='stable')
+    next_id = int(processed['ID'].max()) + 1 if not processed.empty else 1
+    added = added.assign(ID=range(next_id, next_id + len(added)))
+    moved_rows = updates[moved[updated]].assign(ID=tail.loc[moved, 'ID'].to_numpy())
+
+    tail = pd.concat([frame for frame in (tail[~moved], moved_rows, added) if not frame.empty], ignore_index=True)
+    tail = tail.sort_values(by='date', kind='stable')
+    with metrics.stage('process.add_running_columns', rows=len(tail)):
+        tail = add_cumulative_views(tail, running_totals(head))
+        tail['title'] = tail['ID'].astype(str) + '. ' + tail['title']
+    df = pd.concat([head, tail[processed.columns]], ignore_index=True)
+    df['sponsor'] = df['sponsor'].astype('category')
+    return df
+
+
+def merge_delta(raw_path: str, delta: pd.DataFrame, storage_format: str = config.STORAGE_FORMAT) -> str:
+    """
+    Merge the rows of the collector's video_stats_delta table by video_id into the raw video_stats table.
+
+    Args:
+        raw_path (str): Raw video_stats table.
+        delta (pd.DataFrame): New and updated raw rows.
+        storage_format (str): Format of the merged table, 'parquet' or 'csv'.
+
+    Returns:
+        str: Path of the merged video_stats table.
+    """
+    raw = load_data(raw_path, schema=storage.RAW_VIDEO_SCHEMA)
+    raw = raw[~raw['video_id'].isin(delta['video_id'])]
+    # one date format in the table, whatever the format each part was stored in
+    merged = pd.concat([delta.assign(date=pd.to_datetime(delta['date'], utc=True)),
+                        raw.assign(date=pd.to_datetime(raw['date'], utc=True))])
+    # keep the newest-first order of the uploads playlist
+    merged = merged.sort_values(by='date', ascending=False, kind='stable')
+    merged_path = storage.data_path(os.path.dirname(raw_path), 'video_stats', storage_format)
+    tmp_path = merged_path + '.tmp' + os.path.splitext(merged_path)[1]
+    save_data(merged, tmp_path, schema=storage.RAW_VIDEO_SCHEMA)
+    os.replace(tmp_path, merged_path)
+    return merged_path
+
+
+def build_growth(video_info: pd.DataFrame, raw_path: str, history: HistoryStore) -> pd.DataFrame:
+    """
+    Build the views of each processed video at the ages of HISTORY_AGES_DAYS from the channel's history.
+
+    Ages are counted from the exact publication time of the raw table, as the processed one only keeps the day.
+
+    Args:
+        video_info (pd.DataFrame): Processed videos, with their video_id, date and sponsor.
+        raw_path (str): Raw video_stats table of the videos.
+        history (HistoryStore): Statistics history of the channel.
+
+    Returns:
+        pd.DataFrame: video_id, date, sponsor and one views_<days>d column per age, NaN where unknown: ages
+            not reached yet, or separated from the nearest observations by more than HISTORY_MAX_GAP_DAYS.
+    """
+    published = load_data(raw_path, columns=['video_id', 'date'], schema=storage.RAW_VIDEO_SCHEMA)
+    published = published.rename(columns={'date': 'published'}).drop_duplicates('video_id')
+    videos = video_info[['video_id', 'date', 'sponsor']].merge(published, on='video_id', how='inner')
+    return growth_table(history.index(), videos, config.HISTORY_AGES_DAYS,
+                        max_gap_days=config.HISTORY_MAX_GAP_DAYS)
+
+
+@metrics.timed('process.process_channel')
+def process_channel(channel_dir: str, storage_format: str = config.STORAGE_FORMAT, incremental: bool = False,
+                    workers: Optional[int] = None, max_memory_mb: float = config.PROCESSING_MAX_MEMORY_MB) -> None:
+    """
+    Process the raw video statistics of one data partition into the processed_video_stats table next to them.
+
+    The videos the collector added to the video_stats_delta table are first merged into the raw video_stats
+    table. With incremental=True they are also merged into the existing processed table; a full run happens when
+    there is no processed table yet. The delta is removed once it is part of both tables.
+
+    The video_aggregates table, the per-day and per-sponsor prefix sums the dashboard answers its KPIs and
+    duration histograms from, is rebuilt from the processed table on every run, as is the dashboard snapshot:
+    the dashboard's columns with their in-memory types, in a file the dashboard maps instead of parsing. When
+    the collector recorded a statistics history, the video_growth table of views after publication is too.
+
+    Args:
+        channel_dir (str): Directory containing the video_stats table.
+        storage_format (str): Format of the processed table, 'parquet' or 'csv'.
+        incremental (bool): Update the processed table from the delta instead of recomputing it.
+        workers (Optional[int]): Process the raw table in chunks on this many processes (0: the default number),
+            see process_chunked.
+        max_memory_mb (float): Memory budget of the raw chunks in chunked mode, in MB.
+    """
+    raw_path = storage.find_data_path(channel_dir, 'video_stats', storage_format)
+    delta_path = storage.find_data_path(channel_dir, 'video_stats_delta', storage_format)
+    processed_path = storage.find_data_path(channel_dir, 'processed_video_stats', storage_format)
+    has_delta = os.path.exists(delta_path)
+
+    if incremental and os.path.exists(processed_path) and not has_delta and \
+            os.path.getmtime(processed_path) >= os.path.getmtime(raw_path):
+        logging.info(f"{processed_path} is up to date.")
+        return
+    delta = load_data(delta_path, schema=storage.RAW_VIDEO_SCHEMA) if has_delta else None
+    if has_delta:
+        with metrics.stage('process.merge_delta', rows=len(delta)):
+            raw_path = merge_delta(raw_path, delta, storage_format)
+    if incremental and has_delta and os.path.exists(processed_path) and \
+            'video_id' in storage.read_columns(processed_path):
+        processed = load_data(processed_path, schema=storage.PROCESSED_VIDEO_SCHEMA)
+        video_info = process_incremental(processed, delta)
+        logging.info(f"Merged {len(delta)} new or updated videos into {len(processed)} processed ones.")
+    elif workers is not None:
+        check_read_permissions(raw_path)
+        video_info = process_chunked(raw_path, workers, max_memory_mb)
+    else:
+        video_info = process_data(load_data(raw_path, schema=storage.RAW_VIDEO_SCHEMA))
+    with metrics.stage('process.save', rows=len(video_info)):
+        save_data(video_info, storage.data_path(channel_dir, 'processed_video_stats', storage_format),
+                  schema=storage.PROCESSED_VIDEO_SCHEMA)
+    with metrics.stage('process.aggregates', rows=len(video_info)):
+        aggregates = build_aggregate_cube(video_info, separator=config.SPONSOR_SEPARATOR,
+                                          bin_seconds=config.DURATION_BIN_SECONDS, max_bins=config.DURATION_MAX_BINS)
+        save_data(aggregates, storage.data_path(channel_dir, 'video_aggregates', storage_format),
+                  schema=storage.AGGREGATE_SCHEMA)
+    logging.info(f"Aggregated {len(video_info)} videos into {len(aggregates)} daily prefix sums.")
+    with metrics.stage('process.snapshot', rows=len(video_info)):
+        storage.write_snapshot(compact_videos(video_info[config.DASHBOARD_COLUMNS]),
+                               os.path.join(channel_dir, config.DASHBOARD_SNAPSHOT_FILE))
+    history = HistoryStore(os.path.join(channel_dir, config.HISTORY_DIR))
+    if history.segment_paths() and 'video_id' in video_info.columns:
+        with metrics.stage('process.growth', rows=len(video_info)):
+            save_data(build_growth(video_info, raw_path, history),
+                      storage.data_path(channel_dir, 'video_growth', storage_format), schema=storage.GROWTH_SCHEMA)
+    if has_delta:
+        os.remove(delta_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process collected video statistics for the dashboard.")
+    parser.add_argument('--channels', nargs='+', metavar='CHANNEL_ID',
+                        help="channel partitions to process (default: every data/channel=<id>/ partition)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only process the videos collected since the last run")
+    parser.add_argument('--workers', type=int, nargs='?', const=0, metavar='N',
+                        help="read the raw table in chunks and process them on N processes (default: one per core)")
+    parser.add_argument('--max-memory', type=float, default=config.PROCESSING_MAX_MEMORY_MB, metavar='MB',
+                        help="memory budget of the raw chunks in flight with --workers")
+    args = parser.parse_args()
+    start_profiler_from_env(config.PROFILE_ENV, config.PROFILE_INTERVAL_ENV)
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = os.path.join(base_dir, 'data')
+    channel_ids = args.channels or list_channel_partitions(data_dir)
+    # data collected before partitioning by channel lives directly in data/
+    channel_dirs = [channel_data_dir(data_dir, channel_id) for channel_id in channel_ids] or [data_dir]
+
+    failed = False
+    for channel_dir in channel_dirs:
+        try:
+            process_channel(channel_dir, incremental=args.incremental, workers=args.workers,
+                            max_memory_mb=args.max_memory)
+        except Exception as e:
+            logging.error(f"An error occurred while processing {channel_dir}: {e}")
+            failed = True
+    metrics.write_prometheus(os.path.join(config.METRICS_DIR, 'data_processing.prom'))
+    if failed:
         exit(1)
@@ -0,0 +1,99 @@
+# durations.py
+
+import re
+from typing import Dict, Optional
+
+import isodate
+import numpy as np
+import pandas as pd
+
+import config
+
+# the forms YouTube uses; anything else (weeks, fractional seconds, ...) is parsed by isodate
+DURATION_PATTERN = r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$'
+_DURATION_RE = re.compile(DURATION_PATTERN)
+
+_cache: Dict[str, float] = {}
+
+
+def _remember(parsed: Dict[str, float]) -> None:
+    if len(_cache) + len(parsed) > config.DURATION_CACHE_SIZE:
+        _cache.clear()
+    _cache.update(parsed)
+
+
+def _parse_unique(values: np.ndarray) -> Dict[str, float]:
+    """Parse distinct duration strings: one regex pass for the common form, isodate for the others."""
+    parts = pd.Series(values, dtype=object).str.extract(DURATION_PATTERN).astype('float64')
+    seconds = (parts[0].fillna(0) * 86400 + parts[1].fillna(0) * 3600 + parts[2].fillna(0) * 60
+               + parts[3].fillna(0)).to_numpy()
+    unmatched = parts.isna().all(axis=1).to_numpy()
+    for i in np.flatnonzero(unmatched):
+        seconds[i] = isodate.parse_duration(values[i]).total_seconds()
+    return dict(zip(values, seconds))
+
+
+def _parse_one(duration: str) -> float:
+    """Parse one duration string with the compiled pattern, or isodate for the other forms."""
+    match = _DURATION_RE.match(duration)
+    if match is None or not any(match.groups()):
+        return isodate.parse_duration(duration).total_seconds()
+    days, hours, minutes, seconds = (float(part) if part else 0.0 for part in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + seconds
+
+
+def parse_duration(duration: str) -> float:
+    """
+    Convert one ISO 8601 duration (e.g. 'PT1H2M3S') to seconds, reusing earlier results.
+
+    Unlike parse_durations it does not go through pandas, whose per-call overhead dominates for a single value.
+
+    Args:
+        duration (str): ISO 8601 duration.
+
+    Returns:
+        float: Duration in seconds.
+    """
+    seconds = _cache.get(duration)
+    if seconds is None:
+        seconds = _parse_one(duration)
+        _remember({duration: seconds})
+    return seconds
+
+
+def try_parse_duration(duration: Optional[str]) -> Optional[float]:
+    """
+    Convert one ISO 8601 duration to seconds, or return None if it is missing or malformed.
+
+    Args:
+        duration (Optional[str]): ISO 8601 duration.
+
+    Returns:
+        Optional[float]: Duration in seconds, or None.
+    """
+    try:
+        return parse_duration(duration)
+    except (isodate.ISO8601Error, TypeError, ValueError, AttributeError):
+        return None
+
+
+def parse_durations(durations: pd.Series) -> pd.Series:
+    """
+    Convert a column of ISO 8601 durations to seconds.
+
+    Each distinct value is parsed once, in a single vectorized pass over the values not seen before, and
+    the results are cached, as the same few thousand durations repeat across videos and channels.
+
+    Args:
+        durations (pd.Series): ISO 8601 duration strings.
+
+    Returns:
+        pd.Series: Durations in seconds as floats, with the index of durations.
+    """
+    codes, uniques = pd.factorize(durations, use_na_sentinel=False)
+    uniques = np.asarray(uniques, dtype=object)
+    unknown = np.array([value not in _cache for value in uniques], dtype=bool)
+    parsed = _parse_unique(uniques[unknown]) if unknown.any() else {}
+    _remember(parsed)
+    lookup = np.array([parsed[value] if value in parsed else _cache[value] for value in uniques], dtype='float64')
+    return pd.Series(lookup[codes], index=durations.index, name=durations.name)
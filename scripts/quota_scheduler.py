@@ -0,0 +1,219 @@
+# quota_scheduler.py
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+import config
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')  # the daily quota resets at midnight Pacific Time
+except Exception:
+    QUOTA_TIMEZONE = None
+
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+
+class QuotaExceededError(Exception):
+    """Raised when a request would exceed the daily quota budget, or the API reports the quota as spent."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available and return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def _error_reason(error: HttpError) -> str:
+    details = getattr(error, 'error_details', None)
+    if isinstance(details, list) and details and isinstance(details[0], dict):
+        return details[0].get('reason', '')
+    return ''
+
+
+class QuotaScheduler:
+    """
+    Single entry point for YouTube Data API requests.
+
+    Every request is charged against a daily quota budget, rate limited by a token bucket and retried with
+    exponential backoff on rate-limit (403/429) and server errors. Identical GET requests are merged: a request
+    already in flight is awaited instead of being sent again, and recent channel responses are reused.
+    """
+
+    def __init__(self, daily_budget: int = config.DAILY_QUOTA_UNITS,
+                 rate: float = config.RATE_LIMIT_PER_SECOND, burst: float = config.RATE_LIMIT_BURST,
+                 max_retries: int = config.MAX_RETRIES, backoff: float = config.RETRY_BACKOFF_SECONDS,
+                 dedupe_size: int = config.DEDUPE_CACHE_SIZE):
+        self.daily_budget = daily_budget
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.usage_path = None
+        self.dedupe_size = dedupe_size
+        self._lock = threading.Lock()
+        self._in_flight: Dict[tuple, Future] = {}
+        self._recent: OrderedDict = OrderedDict()
+        self._usage: Dict[str, int] = {}
+        self.counters = defaultdict(float)
+        self.calls_by_method = defaultdict(int)
+
+    @staticmethod
+    def quota_day() -> str:
+        return datetime.now(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+    @property
+    def units_today(self) -> int:
+        return self._usage.get(self.quota_day(), 0)
+
+    def load_usage(self, usage_path: str) -> None:
+        """Track the units spent per quota day in usage_path, continuing from what earlier runs recorded."""
+        self.usage_path = usage_path
+        if os.path.exists(usage_path):
+            with open(usage_path, encoding=config.CSV_ENCODING) as f:
+                with self._lock:
+                    for day, units in json.load(f).items():
+                        self._usage[day] = self._usage.get(day, 0) + units
+
+    def save_usage(self) -> None:
+        """Persist the units spent per quota day, so later runs on the same day share the budget."""
+        if not self.usage_path:
+            return
+        with self._lock:
+            usage = dict(self._usage)
+        tmp_path = self.usage_path + '.tmp'
+        with open(tmp_path, 'w', encoding=config.CSV_ENCODING) as f:
+            json.dump(usage, f, indent=1)
+        os.replace(tmp_path, self.usage_path)
+
+    def _charge(self, method_id: str) -> None:
+        cost = config.QUOTA_COSTS.get(method_id, config.DEFAULT_QUOTA_COST)
+        day = self.quota_day()
+        with self._lock:
+            spent = self._usage.get(day, 0)
+            if spent + cost > self.daily_budget:
+                raise QuotaExceededError(f"Daily quota budget of {self.daily_budget} units would be exceeded "
+                                         f"by {method_id} ({spent} units spent today).")
+            self._usage[day] = spent + cost
+            self.counters['units'] += cost
+
+    def _should_retry(self, error: Exception) -> bool:
+        if isinstance(error, HttpError):
+            status, reason = error.resp.status, _error_reason(error)
+            if status == 403 and reason in QUOTA_REASONS:
+                raise QuotaExceededError(f"The API reports the daily quota as exhausted: {error}") from error
+            return status == 429 or status >= 500 or (status == 403 and reason in RATE_LIMIT_REASONS)
+        return isinstance(error, OSError)
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def _record_call(self, method_id: str, latency: float) -> None:
+        with self._lock:
+            self.counters['calls'] += 1
+            self.counters['latency'] += latency
+            self.counters['max_latency'] = max(self.counters['max_latency'], latency)
+            self.calls_by_method[method_id] += 1
+
+    def _send(self, request: HttpRequest, http: Optional[httplib2.Http]) -> Dict:
+        for attempt in range(self.max_retries + 1):
+            self._count('throttle_wait', self.bucket.acquire())
+            self._charge(request.methodId)
+            start = time.perf_counter()
+            try:
+                return request.execute(http=http)
+            except (HttpError, OSError) as e:
+                if attempt == self.max_retries or not self._should_retry(e):
+                    self._count('errors')
+                    raise
+                delay = self.backoff * 2 ** attempt * (1 + random.random() / 10)
+                logging.warning(f"Retrying {request.methodId} in {delay:.1f}s after error: {e}")
+            finally:
+                self._record_call(request.methodId, time.perf_counter() - start)
+            self._count('retries')
+            time.sleep(delay)
+
+    def execute(self, request: HttpRequest, http: Optional[httplib2.Http] = None) -> Dict:
+        """Execute a request built on the googleapiclient Resource through the scheduler."""
+        if request.method != 'GET':
+            return self._send(request, http)
+        key = (request.method, request.uri)
+        with self._lock:
+            if key in self._recent:
+                self._recent.move_to_end(key)
+                self.counters['deduplicated'] += 1
+                return self._recent[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+            else:
+                self.counters['deduplicated'] += 1
+        if not owner:
+            return future.result()
+        try:
+            response = self._send(request, http)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if request.methodId in config.REUSABLE_RESPONSE_METHODS:
+                self._recent[key] = response
+                while len(self._recent) > self.dedupe_size:
+                    self._recent.popitem(last=False)
+        future.set_result(response)
+        return response
+
+    def stats(self) -> Dict[str, float]:
+        """Return the counters: calls, units, retries, errors, deduplicated requests and latency in seconds."""
+        with self._lock:
+            stats = {name: self.counters[name] for name in
+                     ('calls', 'units', 'retries', 'errors', 'deduplicated', 'latency', 'max_latency',
+                      'throttle_wait')}
+            stats['avg_latency'] = stats['latency'] / stats['calls'] if stats['calls'] else 0.0
+            stats['units_today'] = self._usage.get(self.quota_day(), 0)
+            stats['calls_by_method'] = dict(self.calls_by_method)
+        return stats
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"API calls: {stats['calls']:.0f} ({stats['deduplicated']:.0f} merged), "
+                f"quota units: {stats['units']:.0f} this run / {stats['units_today']} today "
+                f"of {self.daily_budget}, retries: {stats['retries']:.0f}, errors: {stats['errors']:.0f}, "
+                f"avg latency: {stats['avg_latency'] * 1000:.0f} ms, max latency: {stats['max_latency'] * 1000:.0f} ms")
@@ -0,0 +1,115 @@
+# response_cache.py
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import config
+
+
+class ResponseCache:
+    """
+    Persistent cache of YouTube Data API responses in an SQLite file.
+
+    Responses are keyed by request method, path and parameters (without the API key). Each endpoint has its
+    own time to live, and the least recently used responses are evicted once the cache outgrows max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = config.RESPONSE_CACHE_MAX_BYTES,
+                 ttls: Dict[str, float] = config.RESPONSE_CACHE_TTLS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, endpoint TEXT, stored_at REAL, accessed_at REAL, size INTEGER, body BLOB);
+            CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+        """)
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def cache_key(method: str, uri: str) -> Tuple[str, str]:
+        """Return the cache key and the endpoint of a request, e.g. ('GET /youtube/v3/videos?id=..', 'videos')."""
+        url = urlsplit(uri)
+        params = sorted((name, value) for name, value in parse_qsl(url.query) if name != 'key')
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        if endpoint == 'playlistItems' and 'pageToken' not in dict(params):
+            endpoint = 'playlistItems:first'  # the first page holds the newest uploads
+        return f"{method} {url.path}?{urlencode(params)}", endpoint
+
+    def ttl(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.ttls.get(endpoint.split(':')[0], 0))
+
+    def get(self, method: str, uri: str) -> Optional[Dict]:
+        """Return the cached response of a request, or None when it is missing or expired."""
+        if method != 'GET':
+            return None
+        key, endpoint = self.cache_key(method, uri)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT stored_at, body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[0] > self.ttl(endpoint):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[1]))
+
+    def put(self, method: str, uri: str, response: Dict) -> None:
+        """Store the response of a request, evicting the least recently used responses if needed."""
+        key, endpoint = self.cache_key(method, uri)
+        if method != 'GET' or self.ttl(endpoint) <= 0:
+            return
+        body = zlib.compress(json.dumps(response).encode())
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                               (key, endpoint, now, now, len(body), body))
+            self._size += len(body) - (old[0] if old else 0)
+            self.stores += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                self.evictions += 1
+                if self._size <= self.max_bytes:
+                    break
+
+    def invalidate(self, endpoint: Optional[str] = None) -> int:
+        """Remove every cached response, or only those of one endpoint; returns the number removed."""
+        with self._lock:
+            if endpoint is None:
+                cursor = self._conn.execute("DELETE FROM responses")
+            else:
+                cursor = self._conn.execute("DELETE FROM responses WHERE endpoint = ? OR endpoint LIKE ?",
+                                            (endpoint, endpoint + ':%'))
+            self._conn.commit()
+            self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return cursor.rowcount
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return (f"Response cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate), "
+                f"{self.stores} stored, {self.evictions} evicted, {self._size / 2 ** 20:.1f} MB on disk")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
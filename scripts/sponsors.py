@@ -0,0 +1,157 @@
+# sponsors.py
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+def _char_pattern(char: str) -> str:
+    if char.lower() == char.upper():
+        return re.escape(char)
+    return f'[{char.lower()}{char.upper()}]'
+
+
+def _trie(terms: Iterable[str]) -> Dict:
+    """Build a trie of the terms: nested dicts keyed by character, where the key '' marks the end of a term."""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return trie
+
+
+def _trie_pattern(trie: Dict) -> str:
+    """
+    Build a case-insensitive regex matching any of the lowercase terms of a trie, factored like it ('xtb|xtb polska|
+    xiaomi' becomes '[xX](?:[tT][bB](?: [pP]olska)?|[iI]aomi)'), so the work at each position of a description
+    does not grow with the number of terms.
+    """
+    def build(node: Dict) -> str:
+        branches = [_char_pattern(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+def _is_word(text: str, start: int, end: int) -> bool:
+    def word_char(i: int) -> bool:
+        return 0 <= i < len(text) and (text[i].isalnum() or text[i] == '_')
+    return not word_char(start - 1) and not word_char(end)
+
+
+class SponsorMatcher:
+    """
+    Detect the sponsors of videos from their descriptions in a single regex pass per description.
+
+    Every keyword, alias and URL of every sponsor is compiled into one case-insensitive trie pattern. Each search
+    resumes one character after the start of the previous match, so overlapping terms are found too, and each
+    match is walked down the trie to every term it begins with, e.g. 'XTB' within 'XTB Polska'. These are then
+    mapped back to the sponsors they belong to, checking their case and whole word rules.
+    Descriptions without any match are set aside first by a single RE2 pass when pyarrow is installed.
+
+    Usage:
+        matcher = SponsorMatcher(config.SPONSORS)
+        df['sponsor'] = matcher.classify(df['description'])
+    """
+
+    def __init__(self, sponsors: Dict[str, Dict] = config.SPONSORS, no_sponsor: str = config.NO_SPONSOR,
+                 separator: str = config.SPONSOR_SEPARATOR):
+        self.names = list(sponsors)
+        self.no_sponsor = no_sponsor
+        self.separator = separator
+        # lowercase term -> (sponsor, term, case_sensitive, whole_word) of every sponsor using it
+        self._terms: Dict[str, List[Tuple[str, str, bool, bool]]] = {}
+        for name, rules in sponsors.items():
+            case_sensitive = rules.get('case_sensitive', False)
+            whole_word = rules.get('whole_word', False)
+            for term in list(rules.get('keywords', [name])) + list(rules.get('aliases', [])):
+                self._terms.setdefault(term.lower(), []).append((name, term, case_sensitive, whole_word))
+            for url in rules.get('urls', []):
+                self._terms.setdefault(url.lower(), []).append((name, url, False, False))
+        self._trie = _trie(self._terms)
+        # a pattern that never matches when no sponsor is configured
+        self.pattern = re.compile(_trie_pattern(self._trie) or r'(?!)')
+        self._labels: Dict[Tuple[str, ...], str] = {(): no_sponsor}
+
+    def sponsors_in(self, description: str) -> Tuple[str, ...]:
+        """Return the names of the sponsors found in a description, in order of appearance, with repeats."""
+        found = []
+        match = self.pattern.search(description)
+        while match:
+            start, longest = match.start(), match.group()
+            node = self._trie
+            # the terms starting here, shortest first: a longer one failing its rules does not hide the others
+            for length, char in enumerate(longest, start=1):
+                node = node[char.lower()]
+                if '' not in node:
+                    continue
+                text = longest[:length]
+                for name, term, case_sensitive, whole_word in self._terms[text.lower()]:
+                    if case_sensitive and text != term:
+                        continue
+                    if whole_word and not _is_word(description, start, start + length):
+                        continue
+                    found.append(name)
+            match = self.pattern.search(description, start + 1)
+        return tuple(found)
+
+    def _label(self, found: Tuple[str, ...]) -> str:
+        label = self._labels.get(found)
+        if label is None:
+            label = self.separator.join(name for name in self.names if name in found) or self.no_sponsor
+            self._labels[found] = label
+        return label
+
+    def classify(self, descriptions: pd.Series) -> pd.Series:
+        """
+        Label each description with its sponsors, e.g. 'XTB', 'XTB, Revolut' or 'No sponsor'.
+
+        Args:
+            descriptions (pd.Series): Video descriptions; missing ones have no sponsor.
+
+        Returns:
+            pd.Series: Categorical sponsor labels, with the index of descriptions.
+        """
+        candidates = self._candidates(descriptions)
+        labels = [self._label(self.sponsors_in(text)) if candidate else self.no_sponsor
+                  for text, candidate in zip(descriptions, candidates)]
+        return pd.Series(pd.Categorical(labels), index=descriptions.index, name='sponsor')
+
+    def _candidates(self, descriptions: pd.Series) -> np.ndarray:
+        """
+        Return which descriptions contain any sponsor term, ignoring case and word rules. With pyarrow the
+        pattern is run by RE2, an automaton several times faster than re, so only these rows are scanned again.
+        """
+        if not self._terms:
+            return np.zeros(len(descriptions), dtype=bool)
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+        except ImportError:
+            return descriptions.notna().to_numpy()
+        texts = pa.array(descriptions, type=pa.string(), from_pandas=True)
+        return pc.match_substring_regex(texts, self.pattern.pattern).fill_null(False).to_numpy(zero_copy_only=False)
+
+
+def has_sponsor(sponsor: pd.Series, name: str, separator: str = config.SPONSOR_SEPARATOR) -> pd.Series:
+    """
+    Return whether each video is sponsored by a given sponsor, alone or together with others.
+
+    Args:
+        sponsor (pd.Series): Sponsor labels made by SponsorMatcher.classify.
+        name (str): Sponsor name, or config.NO_SPONSOR.
+
+    Returns:
+        pd.Series: Boolean mask.
+    """
+    labels = sponsor.cat.categories if isinstance(sponsor.dtype, pd.CategoricalDtype) else sponsor.unique()
+    return sponsor.isin([label for label in labels if name in str(label).split(separator)])
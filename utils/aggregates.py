@@ -0,0 +1,138 @@
+# utils/aggregates.py
+
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# sponsor key of the rows aggregating every video
+ALL_SPONSORS = '*'
+TOTAL_COLUMNS = ['videos', 'views', 'likes', 'comments']
+DURATION_BIN_PREFIX = 'duration_'
+
+
+def build_aggregate_cube(df: pd.DataFrame, separator: Optional[str] = None, bin_seconds: int = 60,
+                         max_bins: int = 240) -> pd.DataFrame:
+    """
+    Aggregate a processed video table per day and sponsor into prefix sums.
+
+    Each row holds, for one sponsor, the number of videos, views, likes and comments of the videos published up to
+    and including its date, and the number of those videos in each duration bin. The totals of a date range are
+    then the difference of two rows.
+
+    Args:
+        df (pd.DataFrame): Processed video statistics with date, sponsor, views, likes, comments and duration.
+        separator (Optional[str]): Separator of the labels of videos with several sponsors, which then count
+            towards each of their sponsors.
+        bin_seconds (int): Width of the duration bins in seconds.
+        max_bins (int): Number of bins after which longer videos share the last bin.
+
+    Returns:
+        pd.DataFrame: Columns date, sponsor (ALL_SPONSORS for every video), the TOTAL_COLUMNS and one
+            duration_<first second> column per bin, sorted by sponsor and date.
+    """
+    duration = pd.to_numeric(df['duration'], errors='coerce')
+    n_bins = int(min(max(duration.max() // bin_seconds + 1, 1), max_bins)) if duration.notna().any() else 1
+    rows = pd.DataFrame({
+        'date': pd.to_datetime(df['date']).to_numpy(),
+        'label': df['sponsor'].astype(str).to_numpy(),
+        'videos': 1,
+        'views': df['views'].to_numpy(dtype='int64'),
+        'likes': df['likes'].to_numpy(dtype='int64'),
+        'comments': df['comments'].to_numpy(dtype='int64'),
+    })
+    daily = rows.groupby(['label', 'date'])[TOTAL_COLUMNS].sum()
+    # videos without a duration are counted in the totals but in no bin, as in a histogram of the rows
+    bins = (duration // bin_seconds).clip(upper=n_bins - 1).to_numpy()
+    known = ~np.isnan(bins)
+    histogram = (rows[known].assign(bin=bins[known].astype('int64'))
+                 .groupby(['label', 'date', 'bin']).size()
+                 .unstack(fill_value=0)
+                 .reindex(columns=range(n_bins), fill_value=0))
+    histogram.columns = [f'{DURATION_BIN_PREFIX}{i * bin_seconds}' for i in range(n_bins)]
+    daily = daily.join(histogram).fillna(0).astype('int64')
+
+    labels = daily.index.get_level_values('label')
+    sponsors = {ALL_SPONSORS: list(labels.unique())}
+    for label in labels.unique():
+        for name in {label, *(label.split(separator) if separator else [])}:
+            sponsors.setdefault(name, []).append(label)
+
+    cubes = []
+    for name, sponsor_labels in sponsors.items():
+        sums = daily[labels.isin(sponsor_labels)].groupby(level='date').sum().sort_index().cumsum()
+        cubes.append(sums.reset_index().assign(sponsor=name))
+    cube = pd.concat(cubes, ignore_index=True)
+    return cube[['date', 'sponsor', *daily.columns]].sort_values(['sponsor', 'date'], ignore_index=True)
+
+
+class AggregateCube:
+    """
+    Date range totals and duration histograms answered from the prefix sums of build_aggregate_cube.
+
+    A query is two binary searches and a subtraction, whatever the number of videos.
+
+    Usage:
+        cube = AggregateCube(build_aggregate_cube(df_videos, separator=config.SPONSOR_SEPARATOR))
+        totals = cube.totals(input.date_range(), sponsor='XTB')
+    """
+
+    def __init__(self, cube: pd.DataFrame):
+        """
+        Args:
+            cube (pd.DataFrame): Prefix sums as returned by build_aggregate_cube, or read back from storage.
+        """
+        bin_columns = [name for name in cube.columns if name.startswith(DURATION_BIN_PREFIX)]
+        self.bin_edges = np.array([float(name[len(DURATION_BIN_PREFIX):]) for name in bin_columns])
+        self.bin_seconds = float(self.bin_edges[1] - self.bin_edges[0]) if len(self.bin_edges) > 1 else 60.0
+        self.columns = TOTAL_COLUMNS + bin_columns
+        self._sums: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for sponsor, rows in cube.groupby('sponsor', sort=False):
+            sums = rows[self.columns].to_numpy(dtype='int64')
+            # a leading row of zeros, so that a range starting with the first day needs no special case
+            self._sums[sponsor] = (pd.to_datetime(rows['date']).to_numpy(dtype='datetime64[ns]'),
+                                   np.vstack([np.zeros((1, len(self.columns)), dtype='int64'), sums]))
+
+    def _between(self, date_range: Tuple[date, date], sponsor: Optional[str]) -> np.ndarray:
+        key = ALL_SPONSORS if sponsor is None else sponsor
+        if key not in self._sums:
+            return np.zeros(len(self.columns), dtype='int64')
+        dates, sums = self._sums[key]
+        start_date, end_date = sorted(date_range)
+        # the same range as filter_by_date: the end date is extended by two days
+        start, stop = np.searchsorted(dates, [np.datetime64(start_date, 'ns'),
+                                              np.datetime64(end_date + timedelta(days=2), 'ns')])
+        return sums[stop] - sums[start]
+
+    def totals(self, date_range: Tuple[date, date], sponsor: Optional[str] = None) -> Dict[str, int]:
+        """
+        Return the number of videos and their views, likes and comments in a date range.
+
+        Args:
+            date_range (Tuple[date, date]): Start and end dates, as for DateIndexedTable.between.
+            sponsor (Optional[str]): Sponsor name (default: every video).
+
+        Returns:
+            Dict[str, int]: Totals keyed by 'videos', 'views', 'likes' and 'comments'.
+        """
+        values = self._between(date_range, sponsor)
+        return {name: int(values[i]) for i, name in enumerate(TOTAL_COLUMNS)}
+
+    def duration_histogram(self, date_range: Tuple[date, date], sponsor: Optional[str] = None) -> pd.DataFrame:
+        """
+        Return the number of videos per duration bin in a date range, from the first to the last non-empty bin.
+
+        Args:
+            date_range (Tuple[date, date]): Start and end dates, as for DateIndexedTable.between.
+            sponsor (Optional[str]): Sponsor name (default: every video).
+
+        Returns:
+            pd.DataFrame: Columns 'duration' (first second of the bin) and 'videos'.
+        """
+        counts = self._between(date_range, sponsor)[len(TOTAL_COLUMNS):]
+        non_empty = np.flatnonzero(counts)
+        if len(non_empty) == 0:
+            return pd.DataFrame({'duration': pd.Series(dtype='float64'), 'videos': pd.Series(dtype='int64')})
+        first, last = non_empty[0], non_empty[-1] + 1
+        return pd.DataFrame({'duration': self.bin_edges[first:last], 'videos': counts[first:last]})
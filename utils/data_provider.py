@@ -0,0 +1,107 @@
+# utils/data_provider.py
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class DataProvider(Generic[T]):
+    """
+    The current version of a dataset, reloaded in a background thread when its files change.
+
+    The thread polls a cheap version function (e.g. modification times and sizes of the files); once a new
+    version has been stable for one poll, so that files still being written are not read, it loads that version
+    and swaps it in with a single assignment. Readers always see one complete version, the previous one until
+    the swap. A failed load is logged and retried at the next poll.
+
+    Usage:
+        provider = shared_provider(data_dir, load_data, data_version, interval=5)
+
+        @reactive.poll(lambda: provider.version, 5)
+        def data():
+            return provider.data
+    """
+
+    def __init__(self, load: Callable[[], T], version: Callable[[], Hashable], interval: float = 5.0,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            load (Callable[[], T]): Loads the dataset as it is on disk.
+            version (Callable[[], Hashable]): Returns the version of the dataset on disk.
+            interval (float): Seconds between two checks of the version.
+            logger (Optional[logging.Logger]): Logger of the reloads (default: this module's logger).
+        """
+        self._load = load
+        self._version = version
+        self.interval = interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.reloads = 0
+        # (version, data), replaced as a whole
+        self._current = (version(), load())
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name='data-provider', daemon=True)
+        self._thread.start()
+
+    @property
+    def version(self) -> Hashable:
+        return self._current[0]
+
+    @property
+    def data(self) -> T:
+        return self._current[1]
+
+    def reload(self) -> bool:
+        """Load the dataset if its version changed, and swap it in; return whether it did."""
+        version = self._version()
+        if version == self.version:
+            return False
+        start = time.perf_counter()
+        data = self._load()
+        self._current = (version, data)
+        self.reloads += 1
+        self.logger.info(f"Reloaded the data in {time.perf_counter() - start:.2f} s (reload {self.reloads}).")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        seen = self.version
+        while not self._stop.wait(self.interval):
+            try:
+                version = self._version()
+                # reload once a change has settled for one interval
+                if version != self.version and version == seen:
+                    self.reload()
+                seen = version
+            except Exception as e:
+                self.logger.error(f"Reloading the data failed, keeping the loaded version: {e}")
+
+
+# one provider per dataset and dashboard process; the app module runs once per session, this module once
+_providers: Dict[Hashable, DataProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def shared_provider(key: Hashable, load: Callable[[], T], version: Callable[[], Hashable],
+                    interval: float = 5.0, logger: Optional[logging.Logger] = None) -> DataProvider[T]:
+    """
+    Return the process-wide provider of a dataset, creating and loading it on the first call.
+
+    Args:
+        key (Hashable): Identifies the dataset, e.g. its directory.
+        load (Callable[[], T]): Loads the dataset, see DataProvider.
+        version (Callable[[], Hashable]): Version of the dataset on disk, see DataProvider.
+        interval (float): Seconds between two checks of the version.
+        logger (Optional[logging.Logger]): Logger of the reloads.
+
+    Returns:
+        DataProvider[T]: The provider shared by every session.
+    """
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = DataProvider(load, version, interval, logger)
+        return _providers[key]
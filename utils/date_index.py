@@ -0,0 +1,74 @@
+# utils/date_index.py
+
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class DateIndexedTable:
+    """
+    A table sorted by date once, answering date range queries by binary search.
+
+    A query returns a slice of the sorted table, not a filtered copy, so its cost does not depend on the number
+    of rows. Each sponsor has its own sorted sub-table, so selecting a sponsor and a date range is one lookup.
+
+    Usage:
+        videos = DateIndexedTable(df_videos, separator=config.SPONSOR_SEPARATOR)
+        xtb_videos = videos.between(input.date_range(), sponsor='XTB')
+    """
+
+    def __init__(self, df: pd.DataFrame, date_column: str = 'date', sponsor_column: Optional[str] = 'sponsor',
+                 separator: Optional[str] = None):
+        """
+        Args:
+            df (pd.DataFrame): Table with a date column.
+            date_column (str): Column the queries select on.
+            sponsor_column (Optional[str]): Column of the sponsor sub-tables, or None for no sub-tables.
+            separator (Optional[str]): Separator of the labels of videos with several sponsors, which are then
+                also part of the sub-table of each of their sponsors.
+        """
+        df = df.assign(**{date_column: pd.to_datetime(df[date_column])})
+        if not df[date_column].is_monotonic_increasing:
+            df = df.sort_values(by=date_column, kind='stable')
+        self.date_column = date_column
+        self.df = df
+        self._tables: Dict[Optional[str], Tuple[pd.DataFrame, np.ndarray]] = {None: self._indexed(df)}
+        if sponsor_column is not None:
+            sponsors = df[sponsor_column]
+            labels_of: Dict[str, set] = {}
+            for label in sponsors.dropna().unique():
+                for name in {label, *(label.split(separator) if separator else [])}:
+                    labels_of.setdefault(name, set()).add(label)
+            for name, labels in labels_of.items():
+                self._tables[name] = self._indexed(df[sponsors.isin(list(labels))])
+
+    def _indexed(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+        return df, df[self.date_column].to_numpy(dtype='datetime64[ns]')
+
+    def between(self, date_range: Tuple[date, date], sponsor: Optional[str] = None) -> pd.DataFrame:
+        """
+        Return the rows of a date range, as filter_by_date does, optionally of one sponsor only.
+
+        Args:
+            date_range (Tuple[date, date]): Start and end dates; the end date is extended by two days.
+            sponsor (Optional[str]): Sponsor name (default: every row).
+
+        Returns:
+            pd.DataFrame: Slice of the sorted table, or of the sponsor's sub-table.
+        """
+        if sponsor not in self._tables:
+            return self.df.iloc[:0]
+        df, dates = self._tables[sponsor]
+        start_date, end_date = sorted(date_range)
+        start, stop = np.searchsorted(dates, [np.datetime64(start_date, 'ns'),
+                                              np.datetime64(end_date + timedelta(days=2), 'ns')])
+        return df.iloc[start:stop]
+
+    def span(self) -> Optional[Tuple[date, date]]:
+        """Return the first and last dates of the table, or None when it is empty."""
+        dates = self._tables[None][1]
+        if not len(dates) or np.isnat(dates[0]):
+            return None
+        return pd.Timestamp(dates[0]).date(), pd.Timestamp(dates[-1]).date()
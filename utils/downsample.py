@@ -0,0 +1,63 @@
+# utils/downsample.py
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select the points of a series that keep its visual shape, with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are kept; every other point is chosen from one of n_out - 2 equal buckets as the
+    one forming the largest triangle with the previously chosen point and the average of the next bucket.
+
+    Args:
+        x (np.ndarray): Increasing x values (numbers or datetime64).
+        y (np.ndarray): y values.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted positions of the kept points, all of them when there are at most n_out.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype('int64')
+    x = (x - x[0]).astype('float64')
+    y = np.asarray(y, dtype='float64')
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    indices = np.empty(n_out, dtype='int64')
+    indices[0], indices[-1] = 0, n - 1
+    chosen = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        areas = np.abs((x[chosen] - next_x) * (y[start:stop] - y[chosen])
+                       - (x[chosen] - x[start:stop]) * (next_y - y[chosen]))
+        chosen = start + int(areas.argmax()) if len(areas) else start
+        indices[i + 1] = chosen
+    return indices
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int) -> pd.DataFrame:
+    """
+    Reduce a table plotted as a line to at most max_points rows, see lttb_indices.
+
+    Ranges with fewer rows, such as a narrow date range, are returned whole, so they keep full resolution.
+
+    Args:
+        df (pd.DataFrame): Rows sorted by x.
+        x (str): Column plotted on the x axis.
+        y (str): Column plotted on the y axis.
+        max_points (int): Point budget of the line.
+
+    Returns:
+        pd.DataFrame: The kept rows.
+    """
+    if len(df) <= max_points:
+        return df
+    return df.iloc[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), max_points)]
@@ -0,0 +1,120 @@
+# utils/figure_cache.py
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Union
+
+import plotly.graph_objects as go
+
+# JSON bytes per data point of a figure not serialized yet, e.g. '"2024-07-25T00:00:00",' or '1234567.0,'
+ESTIMATED_BYTES_PER_VALUE = 16
+
+
+class FigureCache:
+    """
+    A bounded LRU cache of Plotly figures, shared by every session of a dashboard process.
+
+    A figure is kept as built and serialized to JSON on its first hit only: most slider moves select a new
+    range, so a miss returns a widget of the figure without paying for the serialization. Hits rebuild the
+    widget from the JSON without validating it again, which is what makes them cheap: building and validating
+    a figure costs about ten times more. Keys include the version of the data they were built from, and entries
+    of other versions are dropped when the version changes.
+
+    Usage:
+        figure_cache.set_version(storage.table_version(processed_path))
+
+        @render_plotly
+        def plot():
+            return figure_cache.figure(('plot', input.date_range(), None, version), build_figure)
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 2 ** 20):
+        """
+        Args:
+            max_entries (int): Number of figures kept.
+            max_bytes (int): Total size of the figures' JSON kept, estimated for those not serialized yet.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version: Optional[Hashable] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Hashable, Union[str, go.Figure]]' = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def set_version(self, version: Hashable) -> None:
+        """Make version the current data version, dropping the figures of any other version."""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Union[str, go.Figure]]:
+        """Return a cached figure, as JSON once it has been serialized, and mark it as recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: Union[str, go.Figure]) -> None:
+        """Cache a figure or its JSON, evicting the least recently used ones beyond the limits."""
+        size = len(entry) if isinstance(entry, str) else _estimated_bytes(entry)
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                self._bytes -= self._sizes.pop(key)
+            self._entries[key] = entry
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+                self.evictions += 1
+
+    def figure(self, key: Hashable, build: Callable[[], go.Figure]) -> go.FigureWidget:
+        """
+        Return the figure of a key, building it with build on a miss.
+
+        Args:
+            key (Hashable): Chart id, date range, sponsor and data version of the figure.
+            build (Callable[[], go.Figure]): Builds the figure.
+
+        Returns:
+            go.FigureWidget: Widget of the figure, ready for render_plotly.
+        """
+        entry = self.get(key)
+        if entry is None:
+            fig = build()
+            self.put(key, fig)
+            return go.FigureWidget(fig)
+        if not isinstance(entry, str):
+            # reused at least once: serialized now, for this hit and the next ones
+            entry = entry.to_json()
+            self.put(key, entry)
+        # the JSON was validated when the figure was built
+        return go.FigureWidget(json.loads(entry), _validate=False)
+
+    def summary(self) -> str:
+        return (f"figure cache {self.hits} hits, {self.misses} misses, {self.evictions} evictions, "
+                f"{len(self._entries)} figures in {self._bytes / 2 ** 20:.1f} MB")
+
+
+def _estimated_bytes(fig: go.Figure) -> int:
+    columns = (getattr(trace, name, None) for trace in fig.data for name in ('x', 'y', 'text', 'customdata'))
+    values = sum(len(column) for column in columns if column is not None and not isinstance(column, str))
+    return (values + 1) * ESTIMATED_BYTES_PER_VALUE
+
+
+# one cache per dashboard process; the app module runs once per session, this module once per process
+figure_cache = FigureCache()
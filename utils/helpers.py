@@ -1,9 +1,14 @@
 # utils/helpers.py
 
+import os
 from datetime import datetime, timedelta
+from typing import List
 
 import pandas as pd
 
+# the '<ID>. ' prefix data_processing adds to titles
+TITLE_ID_PREFIX = r'^\d+\. '
+
 
 def string_to_date(date_str: str) -> datetime.date:
     """
@@ -31,5 +36,108 @@ def filter_by_date(df: pd.DataFrame, date_range: tuple) -> pd.DataFrame:
     """
     start_date, end_date = sorted(date_range)
     end_date += timedelta(days=2)
-    dates = pd.to_datetime(df["date"], format="%Y-%m-%d").dt.date
-    return df[(dates >= start_date) & (dates < end_date)]
+    dates = df["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%Y-%m-%d")
+    return df[(dates >= pd.Timestamp(start_date)) & (dates < pd.Timestamp(end_date))]
+
+
+def compact_videos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Give a processed video table compact in-memory types: a categorical sponsor, datetime64 dates, the
+    narrowest integer type that holds each count, float32 durations, and titles without their ID prefix
+    (see titles_with_id) stored as Arrow strings.
+
+    Args:
+        df (pd.DataFrame): Processed video statistics as stored.
+
+    Returns:
+        pd.DataFrame: The same table with compact column types.
+    """
+    columns = {}
+    for name, column in df.items():
+        if name == 'sponsor':
+            column = column.astype('category')
+        elif name == 'date':
+            column = pd.to_datetime(column)
+        elif name == 'title':
+            if 'ID' in df.columns:
+                column = column.str.replace(TITLE_ID_PREFIX, '', n=1, regex=True)
+            column = column.astype('string[pyarrow]')
+        elif pd.api.types.is_integer_dtype(column):
+            column = pd.to_numeric(column, downcast='integer')
+        elif pd.api.types.is_float_dtype(column):
+            column = column.astype('float32')
+        columns[name] = column
+    return pd.DataFrame(columns, index=df.index)
+
+
+def titles_with_id(df: pd.DataFrame) -> pd.Series:
+    """
+    Return the titles of a compact video table prefixed with their ID, as shown in the dashboard.
+
+    Args:
+        df (pd.DataFrame): Video table with 'ID' and 'title' columns, see compact_videos.
+
+    Returns:
+        pd.Series: Titles of the form '<ID>. <title>'.
+    """
+    return df['ID'].astype(str) + '. ' + df['title'].astype(object)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """
+    Return the memory used by a DataFrame, including the strings it holds, in MB.
+
+    Args:
+        df (pd.DataFrame): Any DataFrame.
+
+    Returns:
+        float: Memory usage in MB.
+    """
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def channel_data_dir(data_dir: str, channel_id: str) -> str:
+    """
+    Return the directory holding the data partition of one channel.
+
+    Args:
+        data_dir (str): The project's data directory.
+        channel_id (str): YouTube channel ID.
+
+    Returns:
+        str: Path of the form data_dir/channel=<channel_id>.
+    """
+    return os.path.join(data_dir, f'channel={channel_id}')
+
+
+def list_channel_partitions(data_dir: str) -> List[str]:
+    """
+    List the channel IDs that have a data partition.
+
+    Args:
+        data_dir (str): The project's data directory.
+
+    Returns:
+        List[str]: Sorted channel IDs.
+    """
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(name.split('=', 1)[1] for name in os.listdir(data_dir)
+                  if name.startswith('channel=') and os.path.isdir(os.path.join(data_dir, name)))
+
+
+def resolve_channel_dir(data_dir: str, channel_id: str) -> str:
+    """
+    Return the partition directory of a channel, or data_dir itself for data collected before partitioning.
+
+    Args:
+        data_dir (str): The project's data directory.
+        channel_id (str): YouTube channel ID.
+
+    Returns:
+        str: Directory containing the channel's CSV files.
+    """
+    channel_dir = channel_data_dir(data_dir, channel_id)
+    return channel_dir if os.path.isdir(channel_dir) else data_dir
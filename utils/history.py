@@ -0,0 +1,280 @@
+# utils/history.py
+
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils import storage
+
+STATISTICS = ['views', 'likes', 'comments']
+HEAD_FILE = 'head.parquet'
+SEGMENT_PREFIX = 'segment-'
+
+logger = logging.getLogger(__name__)
+
+
+def _seconds(times: pd.Series) -> np.ndarray:
+    """Return timestamps as seconds since the epoch, naive ones being UTC; missing ones are -1."""
+    times = pd.to_datetime(times, utc=True)
+    seconds = times.dt.tz_convert(None).to_numpy(dtype='datetime64[s]').astype('int64')
+    return np.where(times.isna().to_numpy(), -1, seconds)
+
+
+class HistoryStore:
+    """
+    Append-only history of the statistics of a channel's videos, one Parquet segment per collection run.
+
+    A run only writes the videos whose views, likes or comments changed since the run that last saw them: each
+    row starts a run of values that lasts until the next row of the same video (run-length encoding over
+    collection runs). The row also holds when the values it replaces were last seen (previous_seen_at), so the
+    unobserved gap between two runs is known exactly. The head file holds the open run of every video and the
+    last time it was seen, so that an append compares with it instead of reading the history, and queries know
+    until when the last values held. Segments are sorted by video, with delta-encoded integer columns.
+
+    Usage:
+        store = HistoryStore(os.path.join(channel_dir, config.HISTORY_DIR))
+        store.append(video_df[['video_id', 'views', 'likes', 'comments']], fetched_at)
+        views = store.index().at_age(published, days=30)
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Directory of the segments and the head file, created on the first append.
+        """
+        self.directory = directory
+
+    @property
+    def head_path(self) -> str:
+        return os.path.join(self.directory, HEAD_FILE)
+
+    def segment_paths(self) -> List[str]:
+        """Return the paths of the segments, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))
+                if name.startswith(SEGMENT_PREFIX) and name.endswith('.parquet')]
+
+    def head(self) -> pd.DataFrame:
+        """Return the open run of every video: its values, when they were first and last seen."""
+        if not os.path.exists(self.head_path):
+            return pd.DataFrame({name: pd.Series(dtype='int64' if kind == 'int64' else 'object')
+                                 for name, kind in storage.HISTORY_HEAD_SCHEMA.items()})
+        return storage.read_table(self.head_path, schema=storage.HISTORY_HEAD_SCHEMA)
+
+    def append(self, observations: pd.DataFrame, fetched_at: datetime) -> int:
+        """
+        Record the statistics of the videos fetched by one collection run.
+
+        Args:
+            observations (pd.DataFrame): video_id, views, likes and comments of the fetched videos.
+            fetched_at (datetime): Time of the run. A run that is not later than every run recorded before, e.g.
+                a second one within the same second or one after the clock moved back, is skipped.
+
+        Returns:
+            int: Number of rows written, the videos that are new or whose statistics changed.
+        """
+        pa = storage._import_pyarrow()
+        fetched_at = pd.Timestamp(fetched_at)
+        fetched_at = fetched_at.tz_localize('UTC') if fetched_at.tzinfo is None else fetched_at.tz_convert('UTC')
+        fetched_at = fetched_at.floor('s')
+        head = self.head()
+        last_run = pd.to_datetime(head['seen_at'], utc=True).max() if not head.empty else None
+        if last_run is not None and fetched_at <= last_run:
+            # runs are ordered by time: an earlier one cannot be added after the fact
+            logger.warning(f"Skipped the run at {fetched_at} in the history of {self.directory}, which already has "
+                           f"a run at {last_run}.")
+            return 0
+
+        observed = observations[['video_id', *STATISTICS]].drop_duplicates('video_id', keep='last')
+        observed = observed.astype({name: 'int64' for name in STATISTICS})
+        merged = observed.merge(head, on='video_id', how='left', suffixes=('', '_head'))
+        changed = merged['seen_at'].isna().to_numpy()
+        for name in STATISTICS:
+            changed |= (merged[name] != merged[f'{name}_head']).to_numpy()
+        rows = merged.loc[changed, ['video_id', *STATISTICS]].assign(
+            fetched_at=fetched_at, previous_seen_at=pd.to_datetime(merged.loc[changed, 'seen_at'], utc=True))
+        rows = rows[list(storage.HISTORY_SCHEMA)].sort_values(by='video_id', kind='stable')
+
+        os.makedirs(self.directory, exist_ok=True)
+        if not rows.empty:
+            segment_path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{fetched_at:%Y%m%dT%H%M%S}.parquet")
+            table = pa.Table.from_pandas(rows, schema=storage.arrow_schema(storage.HISTORY_SCHEMA),
+                                         preserve_index=False)
+            # consecutive run times and statistics of a video differ little from each other
+            _write_atomically(table, segment_path, use_dictionary=['video_id'], column_encoding={
+                name: 'DELTA_BINARY_PACKED' for name in ['fetched_at', 'previous_seen_at', *STATISTICS]})
+
+        # the open runs: values of the changed videos start at this run, every observed video was seen now
+        head = head.set_index('video_id')
+        updates = merged.set_index('video_id')
+        head = head.reindex(head.index.union(updates.index))
+        head.loc[updates.index, 'seen_at'] = fetched_at
+        changed_ids = updates.index[changed]
+        head.loc[changed_ids, 'fetched_at'] = fetched_at
+        for name in STATISTICS:
+            head.loc[changed_ids, name] = updates.loc[changed_ids, name]
+        head = head.rename_axis('video_id').reset_index()
+        _write_atomically(pa.Table.from_pandas(head[list(storage.HISTORY_HEAD_SCHEMA)].astype(
+            {name: 'int64' for name in STATISTICS}), schema=storage.arrow_schema(storage.HISTORY_HEAD_SCHEMA),
+            preserve_index=False), self.head_path)
+        return len(rows)
+
+    def read(self, video_ids: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Return the recorded rows, sorted by video and time.
+
+        Args:
+            video_ids (Optional[Sequence[str]]): Videos to read (default: all of them).
+        """
+        pa = storage._import_pyarrow()
+        schema = storage.arrow_schema(storage.HISTORY_SCHEMA)
+        filters = [('video_id', 'in', list(video_ids))] if video_ids is not None else None
+        tables = [pa.parquet.read_table(path, schema=schema, filters=filters) for path in self.segment_paths()]
+        history = pa.concat_tables(tables).to_pandas() if tables else schema.empty_table().to_pandas()
+        return history.sort_values(by=['video_id', 'fetched_at'], kind='stable', ignore_index=True)
+
+    def index(self) -> 'HistoryIndex':
+        """Read the whole history into an index answering point-in-time queries."""
+        return HistoryIndex(self.read(), self.head())
+
+
+def _write_atomically(table, path: str, **options) -> None:
+    pa = storage._import_pyarrow()
+    tmp_path = path + '.tmp'
+    pa.parquet.write_table(table, tmp_path, compression=storage.PARQUET_COMPRESSION, **options)
+    os.replace(tmp_path, path)
+
+
+class HistoryIndex:
+    """
+    The history of every video, sorted by video and time, answering "value at a time" for many videos at once
+    by binary search on (video, time) keys.
+
+    Between two runs of values the statistics are interpolated linearly over the gap in which they were not
+    observed, and before the first observation from 0 at publication, when the publication time is given, as
+    long as that gap lasts at most max_gap_days. Over longer gaps, e.g. from the publication of an old video to
+    the first run that saw it, and after the last time a video was seen, they are unknown (NaN).
+    """
+
+    def __init__(self, history: pd.DataFrame, head: pd.DataFrame):
+        """
+        Args:
+            history (pd.DataFrame): Rows of HistoryStore.read, sorted by video and time.
+            head (pd.DataFrame): Open runs of HistoryStore.head.
+        """
+        self.video_ids = pd.Index(head['video_id'].astype(str).sort_values().unique())
+        codes = self.video_ids.get_indexer(history['video_id'].astype(str))
+        self._codes = codes.astype('int64')
+        self._times = _seconds(history['fetched_at'])
+        self._keys = (self._codes << 32) | self._times
+        self._previous_seen = _seconds(history['previous_seen_at'])
+        # a row without the end of the run it closes has no gap before it
+        self._previous_seen = np.where(self._previous_seen < 0, self._times, self._previous_seen)
+        self._values = {name: history[name].to_numpy(dtype='float64') for name in STATISTICS}
+        self._seen_at = np.full(len(self.video_ids), -1, dtype='int64')
+        self._seen_at[self.video_ids.get_indexer(head['video_id'].astype(str))] = _seconds(head['seen_at'])
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def values_at(self, video_ids: Sequence[str], times: pd.Series, statistic: str = 'views',
+                  published: Optional[pd.Series] = None, max_gap_days: float = 2) -> np.ndarray:
+        """
+        Return a statistic of videos at given times.
+
+        Args:
+            video_ids (Sequence[str]): Videos, repeated as needed.
+            times (pd.Series): Time of each video's value.
+            statistic (str): 'views', 'likes' or 'comments'.
+            published (Optional[pd.Series]): Publication time of each video, from which the value is
+                interpolated from 0 up to its first observation (default: unknown before it).
+            max_gap_days (float): Longest unobserved gap, in days, over which values are interpolated.
+
+        Returns:
+            np.ndarray: Values, NaN where unknown.
+        """
+        codes = self.video_ids.get_indexer(pd.Index(video_ids).astype(str)).astype('int64')
+        times = _seconds(pd.Series(times))
+        values = self._values[statistic]
+        result = np.full(len(codes), np.nan)
+        if not len(self._keys):
+            return result
+        known = codes >= 0
+        # last row of the video at or before each time
+        row = np.searchsorted(self._keys, (np.maximum(codes, 0) << 32) | times, side='right') - 1
+        safe_row = np.clip(row, 0, len(self._keys) - 1)
+        observed = known & (row >= 0) & (self._codes[safe_row] == codes)
+        next_row = np.clip(row + 1, 0, len(self._keys) - 1)
+        has_next = observed & (row + 1 < len(self._keys)) & (self._codes[next_row] == codes)
+        # the run of values of that row lasts until the next row's previous_seen_at, or the last time seen
+        run_end = np.where(has_next, self._previous_seen[next_row], self._seen_at[np.maximum(codes, 0)])
+        within = observed & (times <= run_end)
+        result[within] = values[safe_row[within]]
+        max_gap = max_gap_days * 86400
+        gap = observed & ~within & has_next & (self._times[next_row] - run_end <= max_gap)
+        result[gap] = _interpolate(run_end[gap], values[safe_row[gap]], self._times[next_row[gap]],
+                                   values[next_row[gap]], times[gap])
+        if published is not None:
+            # before the first observation, from 0 at publication
+            start = _seconds(pd.Series(published))
+            first_row = np.clip(row + 1, 0, len(self._keys) - 1)
+            before = known & ~observed & (self._codes[first_row] == codes) & (times >= start) & \
+                (self._times[first_row] - start <= max_gap)
+            result[before] = _interpolate(start[before], np.zeros(before.sum()), self._times[first_row[before]],
+                                          values[first_row[before]], times[before])
+        return result
+
+    def at_age(self, published: pd.Series, days: float, statistic: str = 'views',
+               max_gap_days: float = 2) -> pd.Series:
+        """
+        Return a statistic of videos a number of days after their publication.
+
+        Args:
+            published (pd.Series): Publication time of each video, indexed by video_id.
+            days (float): Age of the videos.
+            statistic (str): 'views', 'likes' or 'comments'.
+            max_gap_days (float): Longest unobserved gap, in days, over which values are interpolated.
+
+        Returns:
+            pd.Series: Values indexed by video_id, NaN where unknown, e.g. for videos younger than days or first
+                seen long after that age.
+        """
+        published = pd.to_datetime(published, utc=True)
+        values = self.values_at(published.index, published + pd.Timedelta(days=days), statistic,
+                                published=published, max_gap_days=max_gap_days)
+        return pd.Series(values, index=published.index, name=f'{statistic}_{days:g}d')
+
+
+def _interpolate(x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray, x: np.ndarray) -> np.ndarray:
+    span = np.maximum(x1 - x0, 1)
+    return y0 + (y1 - y0) * np.clip((x - x0) / span, 0, 1)
+
+
+def growth_table(index: HistoryIndex, videos: pd.DataFrame, ages: Sequence[int],
+                 statistic: str = 'views', max_gap_days: float = 2) -> pd.DataFrame:
+    """
+    Build the table of a statistic of each video at given ages, which the dashboard charts without reading
+    the history.
+
+    Args:
+        index (HistoryIndex): History of the videos.
+        videos (pd.DataFrame): video_id and publication time ('published') of each video, with any other
+            columns to keep, e.g. date and sponsor.
+        ages (Sequence[int]): Ages in days.
+        statistic (str): 'views', 'likes' or 'comments'.
+        max_gap_days (float): Longest unobserved gap, in days, over which values are interpolated.
+
+    Returns:
+        pd.DataFrame: The columns of videos without 'published', and one <statistic>_<age>d column per age,
+            NaN where unknown.
+    """
+    published = pd.Series(pd.to_datetime(videos['published'], utc=True).to_numpy(),
+                          index=videos['video_id'].astype(str))
+    columns: Dict[str, np.ndarray] = {
+        f'{statistic}_{age}d': index.at_age(published, age, statistic, max_gap_days).to_numpy() for age in ages}
+    return videos.drop(columns=['published']).reset_index(drop=True).assign(**columns)
@@ -0,0 +1,295 @@
+# utils/instrumentation.py
+
+import atexit
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRIC_PREFIX = 'youtube_analysis_stage'
+
+
+def peak_rss_bytes() -> int:
+    """Return the highest resident memory of this process so far, in bytes (0 where it is not available)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageStats:
+    """Totals of one stage: calls, failed calls, wall time, rows and peak memory."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.peak_rss_bytes = 0
+        self.rss_growth_bytes = 0
+
+
+class Stage:
+    """One running stage; rows can be set while it runs, when they are only known at the end."""
+
+    def __init__(self, name: str, rows: Optional[int] = None):
+        self.name = name
+        self.rows = rows
+
+
+class Metrics:
+    """
+    Wall time, calls, rows and peak memory of the stages of a process, logged as one JSON line per call and
+    exported in the Prometheus text format.
+
+    Memory is the high-water mark of the process's resident memory (ru_maxrss): a stage records the mark at its
+    end and how much it raised it. This costs one system call per stage, where tracing allocations would slow
+    the stages down several times, but stages running at the same time share the growth of the mark. Stages
+    run by worker processes are counted by those processes.
+
+    Usage:
+        @metrics.timed('collection.get_video_details', rows=len)
+        def get_video_details(youtube, video_ids):
+            ...
+
+        with metrics.stage('process.sort', rows=len(df)):
+            df = df.sort_values(by='date')
+
+        metrics.write_prometheus('logs/data_processing.prom')
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            logger (Optional[logging.Logger]): Logger of the stage calls (default: this module's logger).
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[Stage]:
+        """Time the enclosed block as one call of the stage name, processing rows rows."""
+        stage = Stage(name, rows)
+        peak_before = peak_rss_bytes()
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield stage
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(stage.name, time.perf_counter() - start, stage.rows, peak_before, peak_rss_bytes(), failed)
+
+    def timed(self, name: str, rows: Union[None, str, Callable[[Any], int]] = None) -> Callable:
+        """
+        Decorate a function so that each call is timed as one call of the stage name.
+
+        Args:
+            name (str): Name of the stage.
+            rows (Union[None, str, Callable[[Any], int]]): Rows processed by a call: the length of the argument
+                of that name, or a function of the result, e.g. len.
+        """
+        def decorator(function: Callable) -> Callable:
+            signature = inspect.signature(function) if isinstance(rows, str) else None
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name) as stage:
+                    if signature is not None:
+                        stage.rows = len(signature.bind(*args, **kwargs).arguments[rows])
+                    result = function(*args, **kwargs)
+                    if callable(rows):
+                        stage.rows = rows(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def record(self, name: str, seconds: float, rows: Optional[int] = None, peak_before: int = 0,
+               peak_after: int = 0, failed: bool = False) -> None:
+        """Add one call of a stage to its totals and log it."""
+        with self._lock:
+            stats = self.stages.setdefault(name, StageStats())
+            stats.calls += 1
+            stats.errors += failed
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows or 0
+            stats.peak_rss_bytes = max(stats.peak_rss_bytes, peak_after)
+            stats.rss_growth_bytes = max(stats.rss_growth_bytes, peak_after - peak_before)
+        self.logger.info(json.dumps({
+            'stage': name, 'seconds': round(seconds, 6), 'rows': rows, 'failed': failed,
+            'peak_rss_mb': round(peak_after / 2 ** 20, 1),
+            'rss_growth_mb': round((peak_after - peak_before) / 2 ** 20, 1),
+            'pid': os.getpid(), 'thread': threading.current_thread().name,
+        }))
+
+    def prometheus_text(self) -> str:
+        """Return the totals of every stage in the Prometheus text exposition format."""
+        with self._lock:
+            stages = sorted(self.stages.items())
+            metrics = [
+                ('calls_total', 'counter', 'Calls of the stage.', [s.calls for _, s in stages]),
+                ('errors_total', 'counter', 'Calls of the stage that raised an exception.',
+                 [s.errors for _, s in stages]),
+                ('seconds_total', 'counter', 'Wall time spent in the stage.', [s.seconds for _, s in stages]),
+                ('seconds_max', 'gauge', 'Longest call of the stage.', [s.max_seconds for _, s in stages]),
+                ('rows_total', 'counter', 'Rows processed by the stage.', [s.rows for _, s in stages]),
+                ('peak_rss_bytes', 'gauge', 'Highest resident memory of the process at the end of a call.',
+                 [s.peak_rss_bytes for _, s in stages]),
+                ('rss_growth_bytes', 'gauge', 'Largest rise of the resident memory high-water mark during a call.',
+                 [s.rss_growth_bytes for _, s in stages]),
+            ]
+        lines = []
+        for suffix, kind, help_text, values in metrics:
+            lines.append(f'# HELP {METRIC_PREFIX}_{suffix} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{suffix} {kind}')
+            lines.extend(f'{METRIC_PREFIX}_{suffix}{{stage="{name}"}} {value}'
+                         for (name, _), value in zip(stages, values))
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the totals to a .prom file, e.g. for the textfile collector of the Prometheus node exporter."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        # the collector never reads a partly written file
+        os.replace(tmp_path, path)
+
+    def summary(self) -> str:
+        with self._lock:
+            return ', '.join(f"{name} x{stats.calls} {stats.seconds:.2f} s"
+                             for name, stats in sorted(self.stages.items()))
+
+
+# one registry per process, shared by the modules it instruments
+metrics = Metrics(logging.getLogger('instrumentation'))
+
+_servers: Dict[int, ThreadingHTTPServer] = {}
+_servers_lock = threading.Lock()
+
+
+def serve_metrics(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """
+    Serve the Prometheus text of the process's metrics at http://host:port/metrics from a background thread,
+    starting the server on the first call for a port only.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _servers_lock:
+        if port not in _servers:
+            server = ThreadingHTTPServer((host, port), Handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+            _servers[port] = server
+        return _servers[port]
+
+
+class SamplingProfiler:
+    """
+    A statistical profiler: a background thread records the Python stack of every other thread at a fixed
+    interval, and the counts of identical stacks are written in the folded format read by flamegraph.pl and
+    speedscope. Its cost depends on the interval, not on the code profiled.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Args:
+            interval (float): Seconds between two samples.
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        """Write the sampled stacks, one 'outermost;...;innermost count' line each."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+
+
+_profiler: Optional[SamplingProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def start_profiler_from_env(path_env: str, interval_env: str) -> Optional[SamplingProfiler]:
+    """
+    Start the process's sampling profiler if the environment variable path_env is set, once per process; its
+    samples are written to that path when the process exits.
+
+    Args:
+        path_env (str): Variable holding the path of the folded stacks file.
+        interval_env (str): Variable holding the milliseconds between two samples (default: 10).
+
+    Returns:
+        Optional[SamplingProfiler]: The running profiler, or None when profiling is off.
+    """
+    global _profiler
+    path = os.environ.get(path_env)
+    if not path:
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = SamplingProfiler(float(os.environ.get(interval_env, 10)) / 1000).start()
+
+            def write():
+                _profiler.stop()
+                _profiler.write(path)
+            atexit.register(write)
+        return _profiler
@@ -0,0 +1,71 @@
+# utils/reactive_stats.py
+
+import functools
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Optional
+
+
+class ReactiveStats:
+    """
+    Count and time the evaluations of a session's reactive calcs, and log them once per flush, that is once
+    per user interaction such as a move of the date slider.
+
+    Usage:
+        stats = ReactiveStats()
+
+        @reactive.calc
+        @stats.timed('filtered_all')
+        def filtered_all():
+            ...
+
+        session.on_flushed(stats.flushed, once=False)
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, details: Optional[Callable[[], str]] = None):
+        """
+        Args:
+            logger (Optional[logging.Logger]): Logger of the interactions (default: this module's logger).
+            details (Optional[Callable[[], str]]): Returns further statistics appended to each logged line.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.details = details
+        self.interactions = 0
+        self.evaluations: Counter = Counter()
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self._started: Optional[float] = None
+
+    def timed(self, name: str) -> Callable:
+        """Decorate a function so that its evaluations are counted and timed under name."""
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                if self._started is None:
+                    self._started = start
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.evaluations[name] += 1
+                    self.seconds[name] += time.perf_counter() - start
+            return wrapper
+        return decorator
+
+    def summary(self) -> str:
+        calcs = ', '.join(f"{name} x{count} {self.seconds[name] * 1000:.2f} ms"
+                          for name, count in sorted(self.evaluations.items()))
+        total = (time.perf_counter() - self._started) * 1000 if self._started is not None else 0.0
+        summary = (f"Interaction {self.interactions}: {sum(self.evaluations.values())} evaluations "
+                   f"in {sum(self.seconds.values()) * 1000:.2f} ms ({calcs}), {total:.1f} ms until flushed")
+        return f"{summary}; {self.details()}" if self.details else summary
+
+    def flushed(self) -> None:
+        """Log the evaluations since the previous flush and start counting the next interaction."""
+        if not self.evaluations:
+            return
+        self.interactions += 1
+        self.logger.info(self.summary())
+        self.evaluations.clear()
+        self.seconds.clear()
+        self._started = None
@@ -0,0 +1,338 @@
+# utils/storage.py
+
+import os
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# column types of each table; pandas dtypes are derived for CSV and Arrow types for Parquet
+RAW_VIDEO_SCHEMA = {
+    'video_id': 'string',
+    'title': 'string',
+    'date': 'timestamp',
+    'likes': 'int64',
+    'dislikes': 'int64',
+    'comments': 'int64',
+    'views': 'int64',
+    'duration': 'string',
+    'duration_seconds': 'float64',
+    'description': 'string',
+}
+PROCESSED_VIDEO_SCHEMA = {
+    'video_id': 'string',
+    'title': 'string',
+    'date': 'date',
+    'likes': 'int64',
+    'comments': 'int64',
+    'views': 'int64',
+    'duration': 'float64',
+    'sponsor': 'string',
+    'cumulative_views': 'int64',
+    'cumulative_views_XTB': 'int64',
+    'cumulative_views_No_sponsor': 'int64',
+    'ID': 'int64',
+}
+# prefix sums of utils.aggregates; the duration_<second> bin columns are int64 as well
+AGGREGATE_SCHEMA = {
+    'date': 'date',
+    'sponsor': 'string',
+    'videos': 'int64',
+    'views': 'int64',
+    'likes': 'int64',
+    'comments': 'int64',
+}
+# runs of statistics of utils.history, and the open run of each video with the last time it was seen
+HISTORY_SCHEMA = {
+    'video_id': 'string',
+    'fetched_at': 'timestamp',
+    'views': 'int64',
+    'likes': 'int64',
+    'comments': 'int64',
+    'previous_seen_at': 'timestamp',
+}
+HISTORY_HEAD_SCHEMA = {
+    'video_id': 'string',
+    'fetched_at': 'timestamp',
+    'seen_at': 'timestamp',
+    'views': 'int64',
+    'likes': 'int64',
+    'comments': 'int64',
+}
+# statistics of each video at given ages after publication; the views_<days>d columns are float64
+GROWTH_SCHEMA = {
+    'video_id': 'string',
+    'date': 'date',
+    'sponsor': 'string',
+}
+CHANNEL_SCHEMA = {
+    'title': 'string',
+    'subscriberCount': 'int64',
+    'viewCount': 'int64',
+    'videoCount': 'int64',
+}
+
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet'}
+PARQUET_COMPRESSION = 'zstd'
+# rows per Parquet row group, the unit that is decompressed at once when a table is read in batches
+PARQUET_ROW_GROUP_ROWS = 50_000
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The Parquet storage format requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def arrow_schema(schema: Dict[str, str], columns: Optional[List[str]] = None):
+    """
+    Build the Arrow schema of a table.
+
+    Args:
+        schema (Dict[str, str]): Column types of the table, e.g. RAW_VIDEO_SCHEMA.
+        columns (Optional[List[str]]): Columns to include, in this order (default: all of them).
+
+    Returns:
+        pyarrow.Schema: Arrow schema of the selected columns.
+    """
+    pa = _import_pyarrow()
+    types = {
+        'string': pa.string(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'timestamp': pa.timestamp('s', tz='UTC'),
+        'date': pa.date32(),
+    }
+    return pa.schema([(name, types[schema[name]]) for name in (columns or schema) if name in schema])
+
+
+def storage_format(file_path: str) -> str:
+    """
+    Return the storage format of a data file from its extension.
+
+    Args:
+        file_path (str): Path of a .csv or .parquet file.
+
+    Returns:
+        str: 'csv' or 'parquet'.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    for fmt, fmt_extension in EXTENSIONS.items():
+        if extension == fmt_extension:
+            return fmt
+    raise ValueError(f"Unsupported storage format for {file_path}")
+
+
+def data_path(directory: str, name: str, fmt: str) -> str:
+    """
+    Return the path of a table stored in a given format, e.g. <directory>/video_stats.parquet.
+
+    Args:
+        directory (str): Directory holding the table.
+        name (str): Table name without extension.
+        fmt (str): 'csv' or 'parquet'.
+
+    Returns:
+        str: Path of the table.
+    """
+    return os.path.join(directory, name + EXTENSIONS[fmt])
+
+
+def find_data_path(directory: str, name: str, fmt: str) -> str:
+    """
+    Return the path of a table in the preferred format, or in another format if only that one exists.
+
+    Args:
+        directory (str): Directory holding the table.
+        name (str): Table name without extension.
+        fmt (str): Preferred format, 'csv' or 'parquet'.
+
+    Returns:
+        str: Path of the existing table, or of the preferred format when there is none.
+    """
+    preferred = data_path(directory, name, fmt)
+    if os.path.exists(preferred):
+        return preferred
+    for other in EXTENSIONS:
+        if os.path.exists(data_path(directory, name, other)):
+            return data_path(directory, name, other)
+    return preferred
+
+
+def table_version(file_path: str) -> str:
+    """
+    Return a version of a stored table that changes whenever the file is rewritten.
+
+    Args:
+        file_path (str): Path of a .csv or .parquet file.
+
+    Returns:
+        str: Modification time and size of the file.
+    """
+    stat = os.stat(file_path)
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+
+def is_up_to_date(file_path: str, source_path: str) -> bool:
+    """
+    Tell whether a table derived from another one exists and was written after it.
+
+    Args:
+        file_path (str): Path of the derived table.
+        source_path (str): Path of the table it is derived from.
+
+    Returns:
+        bool: True when file_path exists and is not older than source_path.
+    """
+    return os.path.exists(file_path) and (not os.path.exists(source_path) or
+                                          os.path.getmtime(file_path) >= os.path.getmtime(source_path))
+
+
+def read_columns(file_path: str, encoding: str = 'utf-8') -> List[str]:
+    """
+    Return the column names of a stored table without reading its rows.
+
+    Args:
+        file_path (str): Path of a .csv or .parquet file.
+
+    Returns:
+        List[str]: Column names.
+    """
+    if storage_format(file_path) == 'parquet':
+        return list(_import_pyarrow().parquet.read_schema(file_path).names)
+    return list(pd.read_csv(file_path, nrows=0, encoding=encoding).columns)
+
+
+def read_table(file_path: str, columns: Optional[List[str]] = None, schema: Optional[Dict[str, str]] = None,
+               encoding: str = 'utf-8') -> pd.DataFrame:
+    """
+    Read a stored table, loading only the requested columns.
+
+    Args:
+        file_path (str): Path of a .csv or .parquet file.
+        columns (Optional[List[str]]): Columns to read (default: all of them).
+        schema (Optional[Dict[str, str]]): Column types, used to skip dtype inference for CSV files.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    if storage_format(file_path) == 'parquet':
+        return _import_pyarrow().parquet.read_table(file_path, columns=columns).to_pandas()
+    dtype = None
+    if schema:
+        dtype = {name: kind for name, kind in schema.items() if kind in ('int64', 'float64')}
+    return pd.read_csv(file_path, usecols=columns, dtype=dtype, encoding=encoding)
+
+
+def iter_table_batches(file_path: str, batch_rows: int, columns: Optional[List[str]] = None,
+                       schema: Optional[Dict[str, str]] = None, encoding: str = 'utf-8') -> Iterator[pd.DataFrame]:
+    """
+    Read a stored table in batches of at most batch_rows rows, so memory stays bounded whatever its size.
+
+    Args:
+        file_path (str): Path of a .csv or .parquet file.
+        batch_rows (int): Maximum number of rows per batch.
+        columns (Optional[List[str]]): Columns to read (default: all of them).
+        schema (Optional[Dict[str, str]]): Column types, used to skip dtype inference for CSV files.
+
+    Returns:
+        Iterator[pd.DataFrame]: Consecutive batches of the table.
+    """
+    if storage_format(file_path) == 'parquet':
+        parquet_file = _import_pyarrow().parquet.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+    dtype = None
+    if schema:
+        dtype = {name: kind for name, kind in schema.items() if kind in ('int64', 'float64')}
+    with pd.read_csv(file_path, usecols=columns, dtype=dtype, encoding=encoding, chunksize=batch_rows) as reader:
+        yield from reader
+
+
+def write_table(df: pd.DataFrame, file_path: str, schema: Optional[Dict[str, str]] = None,
+                encoding: str = 'utf-8') -> None:
+    """
+    Write a table, with the given column types and compression for Parquet files.
+
+    Args:
+        df (pd.DataFrame): Table to write.
+        file_path (str): Path of a .csv or .parquet file.
+        schema (Optional[Dict[str, str]]): Column types; columns missing from it keep their inferred type.
+    """
+    if storage_format(file_path) == 'csv':
+        df.to_csv(file_path, index=False, encoding=encoding)
+        return
+    pa = _import_pyarrow()
+    if schema and 'timestamp' in schema.values():
+        df = df.assign(**{name: pd.to_datetime(df[name], utc=True) for name, kind in schema.items()
+                          if kind == 'timestamp' and name in df.columns})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if schema:
+        fields = arrow_schema(schema, list(df.columns))
+        table = table.cast(pa.schema([fields.field(name) if name in fields.names else table.schema.field(name)
+                                      for name in table.column_names]))
+    pa.parquet.write_table(table, file_path, compression=PARQUET_COMPRESSION, row_group_size=PARQUET_ROW_GROUP_ROWS)
+
+
+def write_snapshot(df: pd.DataFrame, file_path: str) -> None:
+    """
+    Write a table as an uncompressed Arrow IPC file, which read_snapshot maps into memory instead of parsing it.
+
+    The file is replaced atomically, so readers see either the previous snapshot or the new one.
+
+    Args:
+        df (pd.DataFrame): Table with the column types it is used with, e.g. categorical or Arrow strings.
+        file_path (str): Path of the .arrow file.
+    """
+    pa = _import_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = file_path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, file_path)
+
+
+def read_snapshot(file_path: str) -> pd.DataFrame:
+    """
+    Read a table written by write_snapshot, mapping the file into memory.
+
+    Columns without nulls are not copied, and strings stay in Arrow memory, so reading costs little more than
+    opening the file whatever its size.
+
+    Args:
+        file_path (str): Path of the .arrow file.
+
+    Returns:
+        pd.DataFrame: The table, with the column types it was written with.
+    """
+    pa = _import_pyarrow()
+    with pa.memory_map(file_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    strings = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+    return table.to_pandas(split_blocks=True, ignore_metadata=True, types_mapper=strings.get)
+
+
+def convert_csv_to_parquet(csv_path: str, parquet_path: str, schema: Dict[str, str]) -> None:
+    """
+    Convert a CSV file to Parquet batch by batch, so memory stays bounded whatever the size of the file.
+
+    Args:
+        csv_path (str): Source CSV file.
+        parquet_path (str): Destination Parquet file.
+        schema (Dict[str, str]): Column types of the table.
+    """
+    pa = _import_pyarrow()
+    import pyarrow.csv
+
+    column_names = read_columns(csv_path)
+    target = arrow_schema(schema, column_names)
+    convert_options = pyarrow.csv.ConvertOptions(column_types=target, strings_can_be_null=False)
+    reader = pyarrow.csv.open_csv(csv_path, convert_options=convert_options)
+    tmp_path = parquet_path + '.tmp'
+    with pa.parquet.ParquetWriter(tmp_path, target, compression=PARQUET_COMPRESSION) as writer:
+        for batch in reader:
+            writer.write_table(pa.Table.from_batches([batch]).cast(target))
+    os.replace(tmp_path, parquet_path)
@@ -0,0 +1,146 @@
+# utils/table_view.py
+
+import io
+from typing import Callable, Iterator, Optional, Sequence
+
+import pandas as pd
+
+
+def search_rows(df: pd.DataFrame, text: Optional[str], columns: Sequence[str] = ('title',)) -> pd.DataFrame:
+    """
+    Keep the rows containing a text, in any case, in one of the given columns.
+
+    Args:
+        df (pd.DataFrame): Table to search.
+        text (Optional[str]): Text to find; an empty text keeps every row.
+        columns (Sequence[str]): Columns searched.
+
+    Returns:
+        pd.DataFrame: Matching rows, in their order.
+    """
+    text = (text or '').strip()
+    if not text:
+        return df
+    found = pd.Series(False, index=df.index)
+    for name in columns:
+        values = df[name]
+        if not pd.api.types.is_string_dtype(values) or values.dtype == object:
+            values = values.astype('string')
+        found |= values.str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+    return df[found.to_numpy()]
+
+
+def sort_rows(df: pd.DataFrame, column: str, descending: bool = False) -> pd.DataFrame:
+    """
+    Sort a table by one column, keeping the order of equal rows; a table already in that order is returned as is.
+
+    Args:
+        df (pd.DataFrame): Table to sort.
+        column (str): Column to sort by.
+        descending (bool): Largest values first.
+
+    Returns:
+        pd.DataFrame: Sorted table.
+    """
+    values = df[column]
+    if (values.is_monotonic_decreasing if descending else values.is_monotonic_increasing):
+        return df
+    return df.sort_values(by=column, ascending=not descending, kind='stable')
+
+
+def page_count(n_rows: int, page_rows: int) -> int:
+    """Return the number of pages of n_rows rows, at least one."""
+    return max((n_rows + page_rows - 1) // page_rows, 1)
+
+
+def page_of(df: pd.DataFrame, page: int, page_rows: int) -> pd.DataFrame:
+    """
+    Return one page of a table.
+
+    Args:
+        df (pd.DataFrame): Table, in the order it is shown.
+        page (int): Page number from 1; numbers past the last page return the last page.
+        page_rows (int): Rows per page.
+
+    Returns:
+        pd.DataFrame: Slice of at most page_rows rows.
+    """
+    page = min(max(int(page or 1), 1), page_count(len(df), page_rows))
+    return df.iloc[(page - 1) * page_rows:page * page_rows]
+
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_rows: int,
+                    formatter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Iterator[str]:
+    """
+    Write a table as CSV text chunk by chunk, so only one chunk is formatted and held in memory at a time.
+
+    Args:
+        df (pd.DataFrame): Table to write.
+        chunk_rows (int): Rows per chunk.
+        formatter (Optional[Callable[[pd.DataFrame], pd.DataFrame]]): Applied to each chunk before writing.
+
+    Returns:
+        Iterator[str]: The header and rows of the CSV file, in order.
+    """
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if formatter:
+            chunk = formatter(chunk)
+        yield chunk.to_csv(index=False, header=start == 0)
+
+
+def iter_parquet_chunks(df: pd.DataFrame, chunk_rows: int,
+                        formatter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Iterator[bytes]:
+    """
+    Write a table as a Parquet file with one row group per chunk, yielding the bytes of each row group as soon
+    as it is written.
+
+    Args:
+        df (pd.DataFrame): Table to write.
+        chunk_rows (int): Rows per chunk.
+        formatter (Optional[Callable[[pd.DataFrame], pd.DataFrame]]): Applied to each chunk before writing.
+
+    Returns:
+        Iterator[bytes]: The consecutive bytes of the Parquet file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if formatter:
+            chunk = formatter(chunk)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression='zstd')
+        writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+class _ChunkSink(io.RawIOBase):
+    """A write-only file handing out what was written since the last drain, while tell() keeps counting."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data